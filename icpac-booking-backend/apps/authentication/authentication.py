@@ -0,0 +1,68 @@
+"""
+Authentication classes for ICPAC Booking System
+"""
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import ClaimsUser
+from .revocation import is_token_revoked
+
+
+class RevocableJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that honours the cached token deny-list
+    """
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_request_token(request, raw_token)
+        return self.get_user(validated_token), validated_token
+
+    def get_request_token(self, request, raw_token):
+        """
+        Validate ``raw_token`` once per request, so the replica routing
+        middleware and DRF authentication share a single decode
+        """
+        request = getattr(request, '_request', request)
+        cached = getattr(request, '_validated_token', None)
+        if cached is not None and cached[0] == raw_token:
+            return cached[1]
+
+        validated_token = self.get_validated_token(raw_token)
+        request._validated_token = (raw_token, validated_token)
+        return validated_token
+
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        if is_token_revoked(validated_token):
+            raise AuthenticationFailed(_('Token has been revoked.'), code='token_revoked')
+        return validated_token
+
+
+class TokenUserAuthentication(RevocableJWTAuthentication):
+    """
+    Zero-query JWT authentication for read endpoints.
+
+    Builds a read-only ClaimsUser from the ``role``, ``email`` and
+    ``full_name`` claims added by CustomTokenObtainPairSerializer instead of
+    loading the User row. Managed rooms come from the cached AccessScope.
+    Tokens issued before these claims existed fall back to a database lookup.
+    """
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        if 'role' not in validated_token:
+            return super().get_user(validated_token)
+
+        return ClaimsUser.from_claims(user_id, validated_token)
@@ -0,0 +1,120 @@
+"""
+Benchmark login throughput of a single worker process, and its CPU use under
+a credential-stuffing flood with and without the login throttles
+"""
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.authentication.throttling import rejection_counts
+from apps.authentication.views import CustomTokenObtainPairView
+from apps.rooms.models import Room
+from icpac_booking.benchmark import api_client, percentile
+
+User = get_user_model()
+
+PASSWORD = 'benchmark-login'
+
+
+class Command(BaseCommand):
+    help = 'Measure logins per second, password hashes and SQL queries per login attempt'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20, help='Number of benchmark accounts')
+        parser.add_argument('--logins', type=int, default=100, help='Number of login attempts')
+        parser.add_argument('--managed-rooms', type=int, default=50,
+                            help='Rooms assigned to the benchmark room admins')
+        parser.add_argument('--flood', type=int, default=0,
+                            help='Also send this many wrong-password attempts from one IP, '
+                                 'with and without throttling')
+
+    def handle(self, *args, **options):
+        emails = self.ensure_users(options)
+        client = api_client()
+        hasher_class = get_hasher().__class__
+        original_encode = hasher_class.encode
+        hashes = []
+
+        def counting_encode(hasher, *args, **kwargs):
+            hashes.append(1)
+            return original_encode(hasher, *args, **kwargs)
+
+        scenarios = [
+            ('valid credentials', lambda index: (emails[index % len(emails)], PASSWORD), 200),
+            ('wrong password', lambda index: (emails[index % len(emails)], 'wrong'), 401),
+            ('unknown email', lambda index: (f'nobody-{index}@icpac.net', PASSWORD), 401),
+        ]
+        with mock.patch.object(hasher_class, 'encode', counting_encode):
+            # Measure raw throughput without the throttles getting in the way
+            with mock.patch.object(CustomTokenObtainPairView, 'throttle_classes', []):
+                for label, credentials, expected_status in scenarios:
+                    self.run_scenario(client, label, credentials, expected_status, hashes, options['logins'])
+
+            if options['flood']:
+                self.stdout.write('')
+                with mock.patch.object(CustomTokenObtainPairView, 'throttle_classes', []):
+                    self.run_flood(client, 'flood, unthrottled', emails, hashes, options['flood'])
+                self.run_flood(client, 'flood, throttled', emails, hashes, options['flood'])
+
+    def run_scenario(self, client, label, credentials, expected_status, hashes, logins):
+        hashes.clear()
+        samples = []
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for index in range(logins):
+                email, password = credentials(index)
+                request_started = time.perf_counter()
+                response = client.post('/api/auth/login/', {'email': email, 'password': password})
+                samples.append((time.perf_counter() - request_started) * 1000)
+                if response.status_code != expected_status:
+                    raise CommandError(f'{label}: expected {expected_status}, got {response.status_code}')
+            elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"{label:<18} {logins / elapsed:>7.1f} logins/s  "
+            f"p50={percentile(samples, 50):.1f}ms p99={percentile(samples, 99):.1f}ms  "
+            f"hashes/login={len(hashes) / logins:.2f} queries/login={len(queries) / logins:.2f}"
+        )
+
+    def run_flood(self, client, label, emails, hashes, attempts):
+        """Hammer the login endpoint from a single IP and report CPU spent"""
+        cache.clear()
+        hashes.clear()
+        statuses = {}
+        wall_started = time.perf_counter()
+        cpu_started = time.process_time()
+        for index in range(attempts):
+            response = client.post('/api/auth/login/', {
+                'email': emails[index % len(emails)], 'password': 'wrong'
+            })
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        cpu = time.process_time() - cpu_started
+        wall = time.perf_counter() - wall_started
+
+        self.stdout.write(
+            f"{label:<18} {attempts} attempts in {wall:.1f}s, cpu={cpu:.1f}s "
+            f"({cpu / attempts * 1000:.1f}ms/attempt), hashes={len(hashes)}, "
+            f"statuses={dict(sorted(statuses.items()))}, rejections={rejection_counts()}"
+        )
+
+    def ensure_users(self, options):
+        """Create benchmark accounts, half of them room admins"""
+        password = make_password(PASSWORD)
+        room_ids = list(Room.objects.values_list('id', flat=True)[:options['managed_rooms']])
+        emails = []
+        for index in range(options['users']):
+            role = 'room_admin' if index % 2 else 'user'
+            user, created = User.objects.get_or_create(
+                email=f'bench-login-{index}@icpac.net',
+                defaults={'username': f'bench-login-{index}', 'password': password, 'role': role}
+            )
+            if created and role == 'room_admin':
+                user.managed_rooms.set(room_ids)
+            emails.append(user.email)
+        return emails
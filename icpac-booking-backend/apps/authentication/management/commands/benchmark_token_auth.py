@@ -0,0 +1,61 @@
+"""
+Benchmark read endpoints with database-backed and claims-based JWT authentication
+"""
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authentication import SessionAuthentication
+
+from apps.authentication.authentication import (
+    RevocableJWTAuthentication,
+    TokenUserAuthentication,
+)
+from apps.authentication.serializers import CustomTokenObtainPairSerializer
+from apps.bookings.views import calendar_events
+from apps.rooms.views import RoomListView, room_categories
+from icpac_booking.benchmark import api_client, measure, format_stats
+
+User = get_user_model()
+
+READ_VIEWS = [
+    ('rooms:room_list', '/api/rooms/', RoomListView),
+    ('rooms:room_categories', '/api/rooms/categories/', room_categories.cls),
+    ('bookings:calendar_events', '/api/bookings/calendar/events/', calendar_events),
+]
+
+
+class Command(BaseCommand):
+    help = 'Compare SQL queries and latency of read endpoints per JWT authentication class'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', help='User to authenticate as (defaults to the first active user)')
+        parser.add_argument('--iterations', type=int, default=50)
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(is_active=True)
+        if options['email']:
+            users = users.filter(email=options['email'])
+        user = users.order_by('id').first()
+        if user is None:
+            raise CommandError('No matching active user; create one or run generate_data first.')
+
+        access = CustomTokenObtainPairSerializer.get_token(user).access_token
+        client = api_client()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+        self.stdout.write(f'Authenticating as {user.email} ({user.role})')
+        for name, url, view in READ_VIEWS:
+            results = {}
+            for label, auth_class in (('db user', RevocableJWTAuthentication),
+                                      ('claims user', TokenUserAuthentication)):
+                classes = [auth_class, SessionAuthentication]
+                with mock.patch.object(view, 'authentication_classes', classes):
+                    response = client.get(url)
+                    if response.status_code != 200:
+                        raise CommandError(f'{url} returned {response.status_code}')
+                    results[label] = measure(lambda: client.get(url), iterations=options['iterations'])
+                self.stdout.write(format_stats(f'{name} [{label}]', results[label]))
+
+            saved = results['db user']['queries'] - results['claims user']['queries']
+            self.stdout.write(f'  -> {saved} fewer queries per request')
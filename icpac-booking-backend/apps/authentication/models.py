@@ -88,18 +88,44 @@ class User(AbstractUser):
         """Check if user is procurement officer"""
         return self.role == 'procurement_officer'
     
+    @property
+    def access_scope(self):
+        """Role and managed room IDs, resolved once per request"""
+        from .scope import get_access_scope
+        return get_access_scope(self)
+    
     def can_manage_room(self, room):
         """Check if user can manage a specific room"""
-        if self.is_super_admin:
-            return True
-        if self.is_room_admin:
-            return self.managed_rooms.filter(id=room.id).exists()
-        return False
+        return self.access_scope.manages_room(room.id)
     
     def can_approve_booking(self, booking):
         """Check if user can approve a booking"""
-        if self.is_super_admin:
-            return True
-        if self.is_room_admin:
-            return self.managed_rooms.filter(id=booking.room.id).exists()
-        return False
\ No newline at end of file
+        return self.access_scope.manages_room(booking.room_id)
+
+class ClaimsUser(User):
+    """
+    Read-only user built from JWT claims without a database query
+    """
+    class Meta:
+        proxy = True
+    
+    @classmethod
+    def from_claims(cls, user_id, claims):
+        """Build a user from the claims of a validated access token"""
+        first_name, _, last_name = claims.get('full_name', '').partition(' ')
+        user = cls(
+            id=user_id,
+            email=claims.get('email', ''),
+            role=claims['role'],
+            first_name=first_name,
+            last_name=last_name,
+            is_active=True,
+        )
+        user._state.adding = False
+        return user
+    
+    def save(self, *args, **kwargs):
+        raise TypeError('ClaimsUser is read-only; load a User to modify it.')
+    
+    def delete(self, *args, **kwargs):
+        raise TypeError('ClaimsUser is read-only; load a User to modify it.')
@@ -0,0 +1,56 @@
+"""
+Cached JWT deny-list for ICPAC Booking System
+
+Two kinds of entries are kept in the cache, both expiring once every token
+they could match has expired on its own:
+
+* ``jwt_denied:<jti>`` rejects a single token (logout, rotated refresh token)
+* ``jwt_revoked_before:<user_id>`` rejects every token of a user whose
+  session started before a timestamp (password, role or account status
+  change). The session start is the ``auth_time`` claim, which survives
+  token refreshes, falling back to ``iat``.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from rest_framework_simplejwt.settings import api_settings
+
+
+def _denied_key(jti):
+    return f'jwt_denied:{jti}'
+
+
+def _revoked_before_key(user_id):
+    return f'jwt_revoked_before:{user_id}'
+
+
+def deny_token(token):
+    """Reject a single access or refresh token until it expires"""
+    jti = token.get(api_settings.JTI_CLAIM)
+    if not jti:
+        return
+    remaining = int(token.get('exp', 0) - time.time())
+    if remaining > 0:
+        cache.set(_denied_key(jti), True, remaining)
+
+
+def revoke_user_tokens(user_id):
+    """Reject every token issued to a user up to now"""
+    lifetime = settings.SIMPLE_JWT['REFRESH_TOKEN_LIFETIME'].total_seconds()
+    cache.set(_revoked_before_key(user_id), time.time(), int(lifetime))
+
+
+def is_token_revoked(token):
+    """Check a validated token against the deny-list with one cache lookup"""
+    jti_key = _denied_key(token.get(api_settings.JTI_CLAIM))
+    user_key = _revoked_before_key(token.get(api_settings.USER_ID_CLAIM))
+    entries = cache.get_many([jti_key, user_key])
+
+    if entries.get(jti_key):
+        return True
+    revoked_before = entries.get(user_key)
+    if revoked_before is None:
+        return False
+    return token.get('auth_time', token.get('iat', 0)) < revoked_before
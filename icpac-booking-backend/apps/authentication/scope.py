@@ -0,0 +1,123 @@
+"""
+Access scope for ICPAC Booking System
+
+Resolves a user's role and managed room IDs once per request so that views,
+querysets and serializers can check room permissions without querying
+``managed_rooms`` again.
+"""
+from collections import defaultdict
+
+from django.core.cache import cache
+
+SCOPE_CACHE_TIMEOUT = 60 * 15  # 15 minutes
+
+
+class AccessScope:
+    """
+    Immutable snapshot of a user's role and the rooms they manage
+    """
+    __slots__ = ('user_id', 'role', 'managed_room_ids')
+
+    def __init__(self, user_id, role, managed_room_ids=()):
+        self.user_id = user_id
+        self.role = role
+        self.managed_room_ids = frozenset(managed_room_ids)
+
+    def __repr__(self):
+        return f"<AccessScope user={self.user_id} role={self.role} rooms={len(self.managed_room_ids)}>"
+
+    @property
+    def is_super_admin(self):
+        """Check if scope belongs to a super admin"""
+        return self.role == 'super_admin'
+
+    @property
+    def is_room_admin(self):
+        """Check if scope belongs to a room admin"""
+        return self.role == 'room_admin'
+
+    @property
+    def is_procurement_officer(self):
+        """Check if scope belongs to a procurement officer"""
+        return self.role == 'procurement_officer'
+
+    @property
+    def is_admin(self):
+        """Check if scope belongs to a super admin or room admin"""
+        return self.role in ('super_admin', 'room_admin')
+
+    def manages_room(self, room_id):
+        """Check if the user can manage the room with the given ID"""
+        if self.is_super_admin:
+            return True
+        if self.is_room_admin:
+            return room_id in self.managed_room_ids
+        return False
+
+
+def scope_cache_key(user_id):
+    """Cache key holding the managed room IDs of a user"""
+    return f'access_scope:{user_id}'
+
+
+def get_access_scope(user):
+    """
+    Return the AccessScope for a user.
+
+    The scope is memoised on the user object, which lives for the duration of
+    a request, and shared across requests through the cache. Cached entries
+    are invalidated by the signal handlers in ``apps.authentication.signals``.
+    """
+    scope = getattr(user, '_access_scope', None)
+    if scope is not None:
+        return scope
+
+    cached = cache.get(scope_cache_key(user.pk))
+    if cached is not None and cached[0] == user.role:
+        scope = AccessScope(user.pk, user.role, cached[1])
+    else:
+        managed_room_ids = ()
+        if user.role == 'room_admin':
+            managed_room_ids = user.managed_rooms.values_list('id', flat=True)
+        scope = AccessScope(user.pk, user.role, managed_room_ids)
+        cache.set(
+            scope_cache_key(user.pk),
+            (scope.role, sorted(scope.managed_room_ids)),
+            SCOPE_CACHE_TIMEOUT
+        )
+
+    user._access_scope = scope
+    return scope
+
+
+def invalidate_access_scope(*user_ids):
+    """Drop cached scopes so they are recomputed on the next request"""
+    if user_ids:
+        cache.delete_many([scope_cache_key(user_id) for user_id in user_ids])
+
+
+def warm_access_scopes():
+    """
+    Cache the scope of every active room admin with two queries, so that
+    expired entries do not fall back to per-request ``managed_rooms`` lookups.
+
+    Only missing entries are filled: the rows are read before the cache is
+    written, so overwriting an entry could restore a scope that a committed
+    assignment change has just invalidated. Returns the number of entries
+    added.
+    """
+    from django.contrib.auth import get_user_model
+    User = get_user_model()
+
+    managed = defaultdict(list)
+    assignments = User.managed_rooms.through.objects.filter(
+        user__role='room_admin', user__is_active=True
+    ).values_list('user_id', 'room_id')
+    for user_id, room_id in assignments:
+        managed[user_id].append(room_id)
+
+    admin_ids = User.objects.filter(role='room_admin', is_active=True).values_list('id', flat=True)
+    return sum(
+        cache.add(scope_cache_key(user_id), ('room_admin', sorted(managed[user_id])), SCOPE_CACHE_TIMEOUT)
+        for user_id in admin_ids
+    )
@@ -1,11 +1,16 @@
 """
 Authentication serializers for ICPAC Booking System
 """
+import time
+
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model, authenticate
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
+from .revocation import deny_token, is_token_revoked
 
 User = get_user_model()
 
@@ -24,6 +29,9 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         token['role'] = user.role
         token['full_name'] = user.get_full_name()
         
+        # Sub-second login time, kept across refreshes, checked by the deny-list
+        token['auth_time'] = time.time()
+        
         return token
 
     def validate(self, attrs):
@@ -32,25 +40,18 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         password = attrs.get('password')
         
         if email and password:
+            # A single password hash verification per attempt: the backend
+            # also runs the hasher once for unknown emails to keep timing flat
             user = authenticate(
                 request=self.context.get('request'),
                 username=email,  # Django uses username field, but we want email
                 password=password
             )
             
+            # authenticate() returns None for unknown emails, wrong passwords
+            # and disabled accounts alike
             if not user:
-                # Try to get user by email and check if user exists
-                try:
-                    user_obj = User.objects.get(email=email)
-                    if not user_obj.check_password(password):
-                        raise serializers.ValidationError('Invalid email or password.')
-                except User.DoesNotExist:
-                    raise serializers.ValidationError('Invalid email or password.')
-                    
-                user = user_obj
-            
-            if not user.is_active:
-                raise serializers.ValidationError('User account is disabled.')
+                raise serializers.ValidationError('Invalid email or password.')
             
             # Get the token
             refresh = self.get_token(user)
@@ -58,12 +59,30 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
             return {
                 'refresh': str(refresh),
                 'access': str(refresh.access_token),
-                'user': UserSerializer(user).data
+                'user': LoginUserSerializer(user).data
             }
         else:
             raise serializers.ValidationError('Must include email and password.')
 
 
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Token refresh serializer that honours the token deny-list
+    """
+    def validate(self, attrs):
+        refresh = RefreshToken(attrs['refresh'])
+        if is_token_revoked(refresh):
+            raise TokenError('Token has been revoked.')
+        
+        data = super().validate(attrs)
+        
+        # The rotated refresh token must not be usable again
+        if 'refresh' in data:
+            deny_token(refresh)
+        
+        return data
+
+
 class UserRegistrationSerializer(serializers.ModelSerializer):
     """
     Serializer for user registration
@@ -164,6 +183,29 @@ class UserSerializer(serializers.ModelSerializer):
         return []
 
 
+class LoginUserSerializer(serializers.ModelSerializer):
+    """
+    Slim user payload returned on login
+
+    Managed rooms are returned as IDs read from the cached access scope, so
+    building the payload needs no queries beyond authentication itself.
+    """
+    full_name = serializers.CharField(source='get_full_name', read_only=True)
+    managed_rooms = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = User
+        fields = [
+            'id', 'username', 'email', 'first_name', 'last_name', 'full_name',
+            'role', 'department', 'managed_rooms'
+        ]
+        read_only_fields = fields
+    
+    def get_managed_rooms(self, obj):
+        """Get IDs of the rooms a room admin manages"""
+        return sorted(obj.access_scope.managed_room_ids)
+
+
 class UserUpdateSerializer(serializers.ModelSerializer):
     """
     Serializer for updating user information
@@ -0,0 +1,76 @@
+"""
+Authentication signal handlers for ICPAC Booking System
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .revocation import revoke_user_tokens
+from .scope import invalidate_access_scope
+
+User = get_user_model()
+
+CREDENTIAL_FIELDS = frozenset({'password', 'role', 'is_active'})
+
+
+def assignment_user_ids(instance, action, reverse, pk_set):
+    """The users whose managed rooms an ``m2m_changed`` event touches"""
+    if not reverse:
+        # user.managed_rooms.add/remove/clear(...)
+        return [instance.pk]
+    if action == 'pre_clear':
+        # room.admins.clear() - pk_set is not provided, so collect the admins
+        # before they are removed and keep them for post_clear
+        instance._cleared_admin_ids = list(instance.admins.values_list('pk', flat=True))
+    if action.endswith('_clear'):
+        return getattr(instance, '_cleared_admin_ids', [])
+    # room.admins.add/remove(...)
+    return list(pk_set or ())
+
+
+@receiver(m2m_changed, sender=User.managed_rooms.through)
+def managed_rooms_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Invalidate cached access scopes when room assignments change. A request
+    running meanwhile can cache the old scope again before the change
+    commits, so the scopes are dropped once more after the commit.
+    """
+    user_ids = assignment_user_ids(instance, action, reverse, pk_set)
+    if not user_ids:
+        return
+    if action.startswith('pre_'):
+        invalidate_access_scope(*user_ids)
+    else:
+        transaction.on_commit(lambda: invalidate_access_scope(*user_ids))
+
+
+@receiver(pre_save, sender=User)
+def revoke_tokens_on_credential_change(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Revoke issued tokens when the password, role or active flag changes"""
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not CREDENTIAL_FIELDS.intersection(update_fields):
+        # e.g. update_last_login, which runs on every login
+        return
+    
+    previous = User.objects.filter(pk=instance.pk).values(*CREDENTIAL_FIELDS).first()
+    if previous and (
+        previous['password'] != instance.password or
+        previous['role'] != instance.role or
+        previous['is_active'] != instance.is_active
+    ):
+        revoke_user_tokens(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, **kwargs):
+    """Invalidate the cached access scope when a user is saved"""
+    invalidate_access_scope(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    """Invalidate the cached access scope and tokens of a deleted user"""
+    invalidate_access_scope(instance.pk)
+    revoke_user_tokens(instance.pk)
@@ -0,0 +1,12 @@
+"""
+Celery tasks for ICPAC Booking System authentication
+"""
+from celery import shared_task
+
+from .scope import warm_access_scopes as warm
+
+
+@shared_task(ignore_result=True)
+def warm_access_scopes():
+    """Fill room admin scopes missing from the cache"""
+    warm()
@@ -1,3 +1,209 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher
+from django.contrib.auth.models import update_last_login
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.rooms.models import Room
+from .models import ClaimsUser
+from .serializers import CustomTokenObtainPairSerializer
+from .throttling import LoginIPThrottle
+from .scope import get_access_scope, scope_cache_key, warm_access_scopes
+
+User = get_user_model()
+
+
+class AccessScopeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.room = Room.objects.create(name='Boardroom', capacity=10, category='boardroom')
+        self.other_room = Room.objects.create(name='Library', capacity=10, category='meeting_room')
+        self.admin = User.objects.create_user(
+            username='roomadmin', email='roomadmin@icpac.net', password='pass12345',
+            role='room_admin'
+        )
+        self.admin.managed_rooms.add(self.room)
+
+    def fresh_admin(self):
+        return User.objects.get(pk=self.admin.pk)
+
+    def test_scope_is_resolved_once_per_request(self):
+        user = self.fresh_admin()
+        with self.assertNumQueries(1):
+            self.assertTrue(user.can_manage_room(self.room))
+            self.assertFalse(user.can_manage_room(self.other_room))
+            self.assertEqual(user.access_scope.managed_room_ids, {self.room.id})
+
+    def test_scope_is_shared_across_requests(self):
+        get_access_scope(self.fresh_admin())
+        user = self.fresh_admin()
+        with self.assertNumQueries(0):
+            self.assertEqual(user.access_scope.managed_room_ids, {self.room.id})
+
+    def test_scope_is_invalidated_on_room_assignment(self):
+        get_access_scope(self.fresh_admin())
+        self.other_room.admins.add(self.admin)
+        self.assertEqual(
+            self.fresh_admin().access_scope.managed_room_ids,
+            {self.room.id, self.other_room.id}
+        )
+        self.admin.managed_rooms.clear()
+        self.assertEqual(self.fresh_admin().access_scope.managed_room_ids, frozenset())
+
+    def test_scope_cached_during_assignment_is_dropped_on_commit(self):
+        def cache_stale_scope(**kwargs):
+            # A concurrent request caching the scope it read before the commit
+            if kwargs['action'] == 'post_add':
+                cache.set(scope_cache_key(self.admin.pk), ('room_admin', [self.room.id]))
+
+        m2m_changed.connect(cache_stale_scope, sender=User.managed_rooms.through)
+        self.addCleanup(m2m_changed.disconnect, cache_stale_scope, sender=User.managed_rooms.through)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin.managed_rooms.add(self.other_room)
+        self.assertEqual(
+            self.fresh_admin().access_scope.managed_room_ids,
+            {self.room.id, self.other_room.id}
+        )
+
+    def test_warmed_scope_needs_no_queries(self):
+        warm_access_scopes()
+        user = self.fresh_admin()
+        with self.assertNumQueries(0):
+            self.assertEqual(user.access_scope.managed_room_ids, {self.room.id})
+
+    def test_warm_does_not_overwrite_cached_scope(self):
+        # Cached by a request that read the assignments after the warm did
+        cache.set(scope_cache_key(self.admin.pk), ('room_admin', [self.room.id, self.other_room.id]))
+        self.assertEqual(warm_access_scopes(), 0)
+        self.assertEqual(
+            cache.get(scope_cache_key(self.admin.pk)),
+            ('room_admin', [self.room.id, self.other_room.id])
+        )
+
+    def test_scope_follows_role_change(self):
+        get_access_scope(self.fresh_admin())
+        User.objects.filter(pk=self.admin.pk).update(role='super_admin')
+        user = self.fresh_admin()
+        self.assertTrue(user.access_scope.is_super_admin)
+        self.assertTrue(user.can_manage_room(self.other_room))
+
+
+class TokenUserAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='reader', email='reader@icpac.net', password='pass12345',
+            first_name='Ada', last_name='Reader', role='user'
+        )
+        self.refresh = CustomTokenObtainPairSerializer.get_token(self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.refresh.access_token}')
+
+    def test_read_endpoint_does_not_load_user(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/rooms/categories/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_logout_revokes_tokens(self):
+        response = self.client.post('/api/auth/logout/', {'refresh': str(self.refresh)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/api/rooms/categories/').status_code, 401)
+        response = APIClient().post('/api/auth/token/refresh/', {'refresh': str(self.refresh)})
+        self.assertEqual(response.status_code, 401)
+
+    def test_role_change_revokes_tokens(self):
+        self.user.role = 'room_admin'
+        self.user.save()
+        self.assertEqual(self.client.get('/api/rooms/categories/').status_code, 401)
+        self.assertEqual(self.client.get('/api/auth/profile/').status_code, 401)
+
+    def test_profile_update_keeps_tokens(self):
+        self.user.department = 'Climate'
+        self.user.save()
+        self.assertEqual(self.client.get('/api/rooms/categories/').status_code, 200)
+
+    def test_last_login_update_skips_revocation_check(self):
+        with self.assertNumQueries(1):
+            update_last_login(None, self.user)
+        self.assertEqual(self.client.get('/api/rooms/categories/').status_code, 200)
+
+    def test_claims_user_cannot_be_saved(self):
+        user = ClaimsUser.from_claims(self.user.pk, self.refresh.access_token.payload)
+        with self.assertRaises(TypeError):
+            user.save()
+        with self.assertRaises(TypeError):
+            user.delete()
+
+    def test_password_change_issues_working_tokens(self):
+        response = self.client.post('/api/auth/password/change/', {
+            'old_password': 'pass12345',
+            'new_password': 'n3w-Passw0rd!',
+            'new_password_confirm': 'n3w-Passw0rd!',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/api/rooms/categories/').status_code, 401)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['tokens']['access']}")
+        self.assertEqual(self.client.get('/api/rooms/categories/').status_code, 200)
+
+
+class LoginTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.room = Room.objects.create(name='Boardroom', capacity=10, category='boardroom')
+        self.admin = User.objects.create_user(
+            username='roomadmin', email='roomadmin@icpac.net', password='pass12345',
+            role='room_admin'
+        )
+        self.admin.managed_rooms.add(self.room)
+
+    def test_login_returns_slim_payload(self):
+        response = APIClient().post('/api/auth/login/', {
+            'email': 'roomadmin@icpac.net', 'password': 'pass12345'
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user']['managed_rooms'], [self.room.id])
+        self.assertNotIn('managed_rooms_data', response.data['user'])
+
+    def test_login_rejects_wrong_password_and_disabled_accounts(self):
+        client = APIClient()
+        response = client.post('/api/auth/login/', {
+            'email': 'roomadmin@icpac.net', 'password': 'wrong'
+        })
+        self.assertEqual(response.status_code, 401)
+
+        User.objects.filter(pk=self.admin.pk).update(is_active=False)
+        response = client.post('/api/auth/login/', {
+            'email': 'roomadmin@icpac.net', 'password': 'pass12345'
+        })
+        self.assertEqual(response.status_code, 401)
+
+    def test_login_flood_is_rejected_before_hashing(self):
+        client = APIClient()
+        hasher_class = get_hasher().__class__
+        with mock.patch.dict(LoginIPThrottle.THROTTLE_RATES, {'login_ip': '3/min'}), \
+                mock.patch.object(hasher_class, 'encode', wraps=hasher_class().encode) as encode:
+            statuses = [
+                client.post('/api/auth/login/', {
+                    'email': 'roomadmin@icpac.net', 'password': 'wrong'
+                }).status_code
+                for _ in range(5)
+            ]
+        self.assertEqual(statuses, [401, 401, 401, 429, 429])
+        self.assertEqual(encode.call_count, 3)
 
-# Create your tests here.
+    def test_spoofed_forwarded_for_shares_one_bucket(self):
+        client = APIClient()
+        with mock.patch.dict(LoginIPThrottle.THROTTLE_RATES, {'login_ip': '3/min'}):
+            statuses = [
+                client.post('/api/auth/login/', {
+                    'email': f'user{attempt}@icpac.net', 'password': 'wrong'
+                }, HTTP_X_FORWARDED_FOR=f'10.0.0.{attempt}, 203.0.113.7').status_code
+                for attempt in range(5)
+            ]
+        # nginx appends the real address; only that last entry identifies the client
+        self.assertEqual(statuses, [401, 401, 401, 429, 429])
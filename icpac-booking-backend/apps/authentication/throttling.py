@@ -0,0 +1,92 @@
+"""
+Login and registration throttling for ICPAC Booking System
+
+Password hashing is deliberately expensive, so credential endpoints are
+throttled before the view runs. Each throttle is a token bucket stored in the
+default cache (Redis in production, local memory in development): a bucket
+holds up to ``N`` tokens for a rate of ``N/period`` and refills continuously,
+which allows short bursts while bounding the sustained hash rate.
+"""
+import hashlib
+import logging
+
+from django.core.cache import cache
+from rest_framework.throttling import SimpleRateThrottle
+
+logger = logging.getLogger(__name__)
+
+REJECTION_COUNTER_FORMAT = 'throttle_rejections_%(scope)s'
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Token bucket throttle keyed by ``get_cache_key``
+    """
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        capacity = self.num_requests
+        refill_rate = self.num_requests / self.duration
+        now = self.timer()
+
+        tokens, updated_at = self.cache.get(self.key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * refill_rate)
+
+        if tokens < 1:
+            self.wait_time = (1 - tokens) / refill_rate
+            record_rejection(self.scope)
+            logger.warning('Throttled %s request for %s', self.scope, self.key)
+            return False
+
+        self.cache.set(self.key, (tokens - 1, now), self.duration)
+        return True
+
+    def wait(self):
+        return getattr(self, 'wait_time', None)
+
+
+class LoginIPThrottle(TokenBucketThrottle):
+    """Throttle login attempts per client IP"""
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class LoginEmailThrottle(TokenBucketThrottle):
+    """Throttle login attempts per target account, whatever the client IP"""
+    scope = 'login_email'
+
+    def get_cache_key(self, request, view):
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if not email or not isinstance(email, str):
+            return None
+        ident = hashlib.sha256(email.strip().lower().encode()).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class RegistrationIPThrottle(LoginIPThrottle):
+    """Throttle account registrations per client IP"""
+    scope = 'register_ip'
+
+
+def record_rejection(scope):
+    """Count a rejected request for the throttle metrics"""
+    key = REJECTION_COUNTER_FORMAT % {'scope': scope}
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def rejection_counts(scopes=('login_ip', 'login_email', 'register_ip')):
+    """Return the number of rejected requests per throttle scope"""
+    keys = {REJECTION_COUNTER_FORMAT % {'scope': scope}: scope for scope in scopes}
+    counts = cache.get_many(list(keys))
+    return {scope: counts.get(key, 0) for key, scope in keys.items()}
@@ -3,16 +3,20 @@ Authentication views for ICPAC Booking System
 """
 from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
-from django.core.mail import send_mail
-from django.conf import settings
+from django.db import transaction
 from django.utils.crypto import get_random_string
+from apps.notifications.emails import queue_welcome_email
+from .revocation import deny_token
+from .throttling import LoginEmailThrottle, LoginIPThrottle, RegistrationIPThrottle
 from .serializers import (
     CustomTokenObtainPairSerializer,
+    CustomTokenRefreshSerializer,
     UserRegistrationSerializer,
     UserSerializer,
     UserUpdateSerializer,
@@ -28,6 +32,7 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     Custom login view that returns JWT tokens with user info
     """
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -42,6 +47,13 @@ class CustomTokenObtainPairView(TokenObtainPairView):
         return Response(serializer.validated_data, status=status.HTTP_200_OK)
 
 
+class CustomTokenRefreshView(TokenRefreshView):
+    """
+    Token refresh view that rejects revoked refresh tokens
+    """
+    serializer_class = CustomTokenRefreshSerializer
+
+
 class UserRegistrationView(generics.CreateAPIView):
     """
     User registration endpoint
@@ -49,6 +61,7 @@ class UserRegistrationView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserRegistrationSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [RegistrationIPThrottle]
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -56,7 +69,7 @@ class UserRegistrationView(generics.CreateAPIView):
         user = serializer.save()
         
         # Generate JWT tokens for the new user
-        refresh = RefreshToken.for_user(user)
+        refresh = CustomTokenObtainPairSerializer.get_token(user)
         
         return Response({
             'message': 'User registered successfully.',
@@ -93,16 +106,24 @@ class PasswordChangeView(APIView):
     def post(self, request):
         serializer = PasswordChangeSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
-            serializer.save()
+            user = serializer.save()
+            
+            # Saving the new password revokes all existing tokens, so hand
+            # the current session a fresh pair
+            refresh = CustomTokenObtainPairSerializer.get_token(user)
             return Response({
-                'message': 'Password changed successfully.'
+                'message': 'Password changed successfully.',
+                'tokens': {
+                    'refresh': str(refresh),
+                    'access': str(refresh.access_token),
+                }
             }, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 class LogoutView(APIView):
     """
-    Logout user by blacklisting refresh token
+    Logout user by adding the refresh and access tokens to the deny-list
     """
     permission_classes = [permissions.IsAuthenticated]
 
@@ -110,8 +131,9 @@ class LogoutView(APIView):
         try:
             refresh_token = request.data.get('refresh')
             if refresh_token:
-                token = RefreshToken(refresh_token)
-                token.blacklist()
+                deny_token(RefreshToken(refresh_token))
+            if request.auth is not None:
+                deny_token(request.auth)
             
             return Response({
                 'message': 'Logged out successfully.'
@@ -132,52 +154,32 @@ class UserListView(generics.ListCreateAPIView):
     
     def get_queryset(self):
         user = self.request.user
+        # The serializer lists every user's managed rooms
+        users = User.objects.prefetch_related('managed_rooms')
         
         # Super admin can see all users
         if user.role == 'super_admin':
-            return User.objects.all().order_by('-date_joined')
+            return users.order_by('-date_joined')
         
         # Room admin can see users who have booked their rooms
         elif user.role == 'room_admin':
-            managed_room_ids = user.managed_rooms.values_list('id', flat=True)
-            return User.objects.filter(
+            managed_room_ids = user.access_scope.managed_room_ids
+            return users.filter(
                 bookings__room_id__in=managed_room_ids
             ).distinct().order_by('-date_joined')
         
         # Regular users can only see themselves
-        return User.objects.filter(id=user.id)
+        return users.filter(id=user.id)
     
     def perform_create(self, serializer):
         # Only super admin can create users through API
         if self.request.user.role != 'super_admin':
-            raise permissions.PermissionDenied('Only super admins can create users.')
-        
-        user = serializer.save()
+            raise PermissionDenied('Only super admins can create users.')
         
-        # Send welcome email (optional)
-        if hasattr(settings, 'EMAIL_HOST_USER') and settings.EMAIL_HOST_USER:
-            try:
-                send_mail(
-                    subject='Welcome to ICPAC Booking System',
-                    message=f"""
-                    Hello {user.get_full_name()},
-                    
-                    Your account has been created for the ICPAC Booking System.
-                    
-                    Email: {user.email}
-                    Role: {user.get_role_display()}
-                    
-                    Please contact an administrator to get your login credentials.
-                    
-                    Best regards,
-                    ICPAC IT Team
-                    """,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[user.email],
-                    fail_silently=True,
-                )
-            except Exception as e:
-                pass  # Don't fail user creation if email fails
+        # The welcome email is stored with the user and sent by a worker
+        with transaction.atomic():
+            user = serializer.save()
+            queue_welcome_email(user)
 
 
 class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -197,7 +199,7 @@ class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
         
         # Room admin can view users who have booked their rooms
         elif user.role == 'room_admin':
-            managed_room_ids = user.managed_rooms.values_list('id', flat=True)
+            managed_room_ids = user.access_scope.managed_room_ids
             return User.objects.filter(
                 bookings__room_id__in=managed_room_ids
             ).distinct()
@@ -209,17 +211,17 @@ class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
         # Only super admin can update other users' roles
         if (serializer.instance != self.request.user and 
             self.request.user.role != 'super_admin'):
-            raise permissions.PermissionDenied('Only super admins can modify other users.')
+            raise PermissionDenied('Only super admins can modify other users.')
         
         serializer.save()
     
     def perform_destroy(self, instance):
         # Only super admin can delete users, and can't delete themselves
         if self.request.user.role != 'super_admin':
-            raise permissions.PermissionDenied('Only super admins can delete users.')
+            raise PermissionDenied('Only super admins can delete users.')
         
         if instance == self.request.user:
-            raise permissions.PermissionDenied('You cannot delete your own account.')
+            raise PermissionDenied('You cannot delete your own account.')
         
         instance.delete()
 
@@ -250,12 +252,12 @@ def user_dashboard_stats(request):
     if user.role in ['super_admin', 'room_admin']:
         if user.role == 'super_admin':
             all_bookings = Booking.objects.all()
-            managed_rooms_count = user.managed_rooms.count() if user.role == 'room_admin' else 0
+            managed_rooms_count = 0
         else:
             # Room admin stats for their managed rooms
-            managed_room_ids = user.managed_rooms.values_list('id', flat=True)
+            managed_room_ids = user.access_scope.managed_room_ids
             all_bookings = Booking.objects.filter(room_id__in=managed_room_ids)
-            managed_rooms_count = user.managed_rooms.count()
+            managed_rooms_count = len(managed_room_ids)
         
         stats.update({
             'total_system_bookings': all_bookings.count(),
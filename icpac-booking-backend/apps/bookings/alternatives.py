@@ -0,0 +1,137 @@
+"""
+Alternative slots for conflicting booking requests in ICPAC Booking System
+
+A rejected request carries what the user would otherwise find by trial and
+error: the nearest free slots of the same length in the requested room, and
+comparable rooms that are free at the requested time. The live bookings of
+the requested room around the request and of every room during the request
+are loaded in one query, which also decides whether there is a conflict at
+all; rooms are only loaded, in one more query, when there is one.
+Suggestions stay on the requested days and within the opening hours of
+the room they are for.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import Booking
+
+SEARCH_HOURS = 4
+SLOT_STEP = timedelta(minutes=30)
+MAX_ALTERNATIVES = 3
+
+
+class BookingIntervals:
+    """Live bookings around a requested slot, grouped by room"""
+
+    def __init__(self, room, start_at, end_at, exclude_pk=None):
+        self.room = room
+        self.start_at = start_at
+        self.end_at = end_at
+        window = timedelta(hours=SEARCH_HOURS)
+
+        bookings = (
+            Booking.objects.live().overlapping(start_at - window, end_at + window).filter(room=room) |
+            Booking.objects.live().overlapping(start_at, end_at)
+        )
+        if exclude_pk:
+            bookings = bookings.exclude(pk=exclude_pk)
+
+        self.busy = {}
+        for room_id, busy_start, busy_end in bookings.order_by().values_list('room_id', 'start_at', 'end_at'):
+            self.busy.setdefault(room_id, []).append((busy_start, busy_end))
+
+    def is_free(self, room_id, start_at, end_at):
+        return not any(
+            busy_start < end_at and busy_end > start_at
+            for busy_start, busy_end in self.busy.get(room_id, [])
+        )
+
+    def within_hours(self, room, start_at, end_at):
+        """
+        Whether a slot falls on the days of the request and lies within the
+        opening hours of ``room``
+        """
+        local_start, local_end = timezone.localtime(start_at), timezone.localtime(end_at)
+        return (
+            local_start.date() == timezone.localtime(self.start_at).date() and
+            local_end.date() == timezone.localtime(self.end_at).date() and
+            local_start.time() >= room.opening_time and
+            local_end.time() <= room.closing_time
+        )
+
+    @property
+    def has_conflict(self):
+        return not self.is_free(self.room.pk, self.start_at, self.end_at)
+
+    def nearest_free_slots(self, now=None, limit=MAX_ALTERNATIVES):
+        """Free slots of the requested length in the same room, nearest first"""
+        now = now or timezone.now()
+        duration = self.end_at - self.start_at
+        steps = int(timedelta(hours=SEARCH_HOURS) / SLOT_STEP)
+        offsets = sorted(
+            (step * sign for step in range(1, steps + 1) for sign in (-1, 1)),
+            key=lambda offset: (abs(offset), offset)
+        )
+
+        slots = []
+        for offset in offsets:
+            start_at = self.start_at + offset * SLOT_STEP
+            end_at = start_at + duration
+            if start_at < now or not self.within_hours(self.room, start_at, end_at):
+                continue
+            if not self.is_free(self.room.pk, start_at, end_at):
+                continue
+            slots.append((start_at, end_at))
+            if len(slots) == limit:
+                break
+        return slots
+
+    def free_rooms(self, expected_attendees=1, limit=MAX_ALTERNATIVES):
+        """
+        Active rooms free for the whole request, and open during it, that
+        seat the attendees and offer every amenity of the requested room,
+        closest in size first
+        """
+        from apps.rooms.models import Room
+
+        wanted = {amenity.lower() for amenity in self.room.get_amenities_list()}
+        candidates = Room.objects.filter(
+            is_active=True, capacity__gte=expected_attendees
+        ).exclude(pk=self.room.pk).order_by('capacity', 'name')
+
+        rooms = []
+        fields = ('id', 'name', 'capacity', 'location', 'amenities', 'opening_time', 'closing_time')
+        for room in candidates.only(*fields):
+            if not wanted <= {amenity.lower() for amenity in room.get_amenities_list()}:
+                continue
+            if not self.within_hours(room, self.start_at, self.end_at):
+                continue
+            if not self.is_free(room.pk, self.start_at, self.end_at):
+                continue
+            rooms.append(room)
+        rooms.sort(key=lambda room: (abs(room.capacity - self.room.capacity), room.capacity, room.name))
+        return rooms[:limit]
+
+    def alternatives(self, expected_attendees=1, now=None):
+        """Suggestions in the shape of the booking fields, ready to resubmit"""
+        return {
+            'slots': [
+                {
+                    'start_date': timezone.localtime(start_at).date().isoformat(),
+                    'end_date': timezone.localtime(end_at).date().isoformat(),
+                    'start_time': timezone.localtime(start_at).strftime('%H:%M'),
+                    'end_time': timezone.localtime(end_at).strftime('%H:%M'),
+                }
+                for start_at, end_at in self.nearest_free_slots(now)
+            ],
+            'rooms': [
+                {
+                    'id': room.id,
+                    'name': room.name,
+                    'capacity': room.capacity,
+                    'location': room.location,
+                }
+                for room in self.free_rooms(expected_attendees)
+            ],
+        }
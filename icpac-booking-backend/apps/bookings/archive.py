@@ -0,0 +1,133 @@
+"""
+Hot/cold booking archive for ICPAC Booking System
+
+Bookings that ended more than ``BOOKING_ARCHIVE_AFTER_DAYS`` ago and are no
+longer pending are moved, with their notes and procurement orders, from the
+live tables into ``bookings_archive``, ``booking_notes_archive`` and
+``procurement_orders_archive``. Overlap checks, availability and list
+queries then only scan bookings that can still matter. Bookings whose
+orders have attachments stay live so their documents remain linked.
+
+The job walks candidates in primary key batches; each batch is copied and
+deleted in one transaction, so an interrupted run loses nothing and the
+next run carries on where it stopped.
+
+Every archived booking ended before the horizon, so read endpoints only
+union the archive when the requested range starts before it.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Value
+from django.utils import timezone
+
+from .models import ArchivedBooking, ArchivedBookingNote, Booking, BookingNote
+
+logger = logging.getLogger(__name__)
+
+
+def archive_horizon(now=None):
+    """Bookings ending before this moment may be archived"""
+    now = now or timezone.now()
+    return now - timedelta(days=settings.BOOKING_ARCHIVE_AFTER_DAYS)
+
+
+def reaches_archive(range_start, now=None):
+    """Whether a range starting at ``range_start`` can include archived rows"""
+    return range_start is not None and range_start < archive_horizon(now)
+
+
+def archivable_bookings(horizon):
+    return Booking.objects.filter(end_at__lt=horizon).exclude(
+        approval_status='pending'
+    ).exclude(
+        procurement_orders__attachments__isnull=False
+    )
+
+
+def copy_rows(queryset, archive_model):
+    """Insert the rows of ``queryset`` into the archive model with the same fields"""
+    fields = [
+        field.attname for field in archive_model._meta.concrete_fields
+        if field.attname != 'archived_at'
+    ]
+    archive_model.objects.bulk_create(
+        [archive_model(**row) for row in queryset.values(*fields)],
+        ignore_conflicts=True
+    )
+
+
+def archive_bookings(now=None, batch_size=None):
+    """Move every archivable booking to the archive; returns how many moved"""
+    from apps.procurement.models import ArchivedProcurementOrder, ProcurementOrder
+
+    horizon = archive_horizon(now)
+    batch_size = batch_size or settings.BOOKING_ARCHIVE_BATCH_SIZE
+    archived = 0
+    last_id = 0
+    while True:
+        ids = list(
+            archivable_bookings(horizon).filter(pk__gt=last_id)
+            .order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+
+        with transaction.atomic():
+            copy_rows(Booking.objects.filter(pk__in=ids), ArchivedBooking)
+            copy_rows(BookingNote.objects.filter(booking_id__in=ids), ArchivedBookingNote)
+            copy_rows(ProcurementOrder.objects.filter(booking_id__in=ids), ArchivedProcurementOrder)
+            # Occurrences, notes and orders go with the booking
+            Booking.objects.filter(pk__in=ids).delete()
+
+        archived += len(ids)
+        last_id = ids[-1]
+
+    if archived:
+        logger.info('Archived %s bookings that ended before %s', archived, horizon)
+    return archived
+
+
+class BookingHistory:
+    """
+    Live and archived bookings as one sequence ordered newest first, which
+    Django's paginator can count and slice. A page costs one query for the
+    keys and one per table for the rows, whatever the page number.
+    """
+
+    def __init__(self, live, archived):
+        self.live = live.order_by()
+        self.archived = archived.order_by()
+
+    def count(self):
+        return self.live.count() + self.archived.count()
+
+    def __len__(self):
+        return self.count()
+
+    def keys(self):
+        live = self.live.annotate(is_archived=Value(False)).values_list('created_at', 'pk', 'is_archived')
+        archived = self.archived.annotate(is_archived=Value(True)).values_list('created_at', 'pk', 'is_archived')
+        return live.union(archived, all=True).order_by('-created_at', '-pk')
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+
+        keys = list(self.keys()[index])
+        live_ids = [pk for _, pk, is_archived in keys if not is_archived]
+        archived_ids = [pk for _, pk, is_archived in keys if is_archived]
+        rows = {}
+        if live_ids:
+            rows.update({
+                (False, booking.pk): booking
+                for booking in self.live.filter(pk__in=live_ids).select_related('room', 'user')
+            })
+        if archived_ids:
+            rows.update({
+                (True, booking.pk): booking
+                for booking in self.archived.filter(pk__in=archived_ids).select_related('room', 'user')
+            })
+        return [rows[(bool(is_archived), pk)] for _, pk, is_archived in keys]
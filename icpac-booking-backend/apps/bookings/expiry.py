@@ -0,0 +1,58 @@
+"""
+Expiry of stale pending bookings for ICPAC Booking System
+
+A pending booking whose start time has passed can no longer be approved in
+any meaningful way, but it still counts as pending on dashboards and still
+blocks its slot in every overlap check. The sweep moves such bookings to
+``expired`` with set-based UPDATEs in small batches, skipping the per-row
+``save()`` and ``full_clean()``. Each batch locks only its own rows, and
+rows that another transaction holds are left for the next run.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Booking, BookingOccurrence
+from .signals import bookings_status_changed
+
+
+def stale_pending_bookings(now=None):
+    """Pending bookings whose start date and time are not in the future"""
+    return Booking.objects.filter(approval_status='pending', start_at__lte=now or timezone.now())
+
+
+def expire_stale_bookings(now=None, batch_size=None):
+    """Mark stale pending bookings as expired; returns how many were expired"""
+    now = now or timezone.now()
+    batch_size = batch_size or settings.BOOKING_EXPIRY_BATCH_SIZE
+    stale = stale_pending_bookings(now).order_by('id')
+
+    expired = 0
+    last_id = 0
+    while True:
+        candidate_ids = list(stale.filter(id__gt=last_id).values_list('id', flat=True)[:batch_size])
+        if not candidate_ids:
+            break
+        last_id = candidate_ids[-1]
+
+        with transaction.atomic():
+            rows = list(
+                Booking.objects.select_for_update(skip_locked=True)
+                .filter(id__in=candidate_ids, approval_status='pending')
+                .values_list('id', 'room_id')
+            )
+            booking_ids = [booking_id for booking_id, _ in rows]
+            Booking.objects.filter(id__in=booking_ids).update(approval_status='expired', updated_at=now)
+            BookingOccurrence.objects.filter(booking_id__in=booking_ids).update(approval_status='expired')
+
+        if booking_ids:
+            expired += len(booking_ids)
+            bookings_status_changed.send(
+                sender=Booking,
+                booking_ids=booking_ids,
+                room_ids=sorted({room_id for _, room_id in rows}),
+                status='expired',
+            )
+        if len(candidate_ids) < batch_size:
+            break
+    return expired
@@ -0,0 +1,67 @@
+"""
+Benchmark date-bounded booking reads, before and after partitioning bookings
+"""
+from datetime import time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from apps.bookings.models import Booking, combine_datetime
+from apps.bookings.partitioning import is_partitioned
+from icpac_booking.benchmark import api_client, measure, format_stats
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure calendar and statistics endpoints over the existing bookings. Run it before '
+        'and after the partitioning migration; seed data with benchmark_booking_scope.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--explain', action='store_true',
+                            help='Print the PostgreSQL plan of the calendar query for each window')
+
+    def handle(self, *args, **options):
+        admin = User.objects.filter(role='super_admin', is_active=True).order_by('id').first()
+        if admin is None:
+            raise CommandError('No active super admin to benchmark as.')
+        client = api_client()
+        client.force_authenticate(admin)
+
+        today = timezone.localdate()
+        windows = [
+            ('last month', today - timedelta(days=31), today - timedelta(days=1)),
+            ('next week', today, today + timedelta(days=7)),
+            ('next month', today, today + timedelta(days=31)),
+        ]
+        cases = [
+            (f'calendar: {label}', '/api/bookings/calendar/events/',
+             {'start': start.isoformat(), 'end': end.isoformat()})
+            for label, start, end in windows
+        ] + [
+            ('dashboard stats', '/api/bookings/dashboard/stats/', {}),
+            ('rooms overview stats', '/api/rooms/stats/overview/', {}),
+        ]
+
+        self.stdout.write(
+            f"{Booking.objects.count()} bookings on {connection.vendor}, "
+            f"partitioned: {'yes' if is_partitioned() else 'no'}"
+        )
+        for label, url, params in cases:
+            response = client.get(url, params)
+            if response.status_code != 200:
+                raise CommandError(f'{url} returned {response.status_code}')
+            stats = measure(lambda: client.get(url, params), iterations=options['iterations'])
+            self.stdout.write(format_stats(label, stats))
+
+        if options['explain'] and connection.vendor == 'postgresql':
+            for label, start, end in windows:
+                queryset = Booking.objects.overlapping(
+                    combine_datetime(start, time.min), combine_datetime(end, time.min) + timedelta(days=1)
+                )
+                self.stdout.write(f'\n{label}:\n{queryset.explain()}')
@@ -0,0 +1,179 @@
+"""
+Benchmark room admin list queries: OR predicates versus UNION ALL scopes
+"""
+import random
+from datetime import date, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from apps.bookings.models import Booking, BookingOccurrence, combine_datetime
+from apps.bookings.scoping import union_scope
+from apps.procurement.models import ProcurementOrder
+from apps.rooms.models import Room
+from icpac_booking.benchmark import measure, format_stats
+
+User = get_user_model()
+
+BENCH_ADMIN_EMAIL = 'bench-room-admin@icpac.net'
+
+
+class Command(BaseCommand):
+    help = 'Compare room admin booking and procurement list latency for OR and UNION ALL scopes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=1_000_000,
+                            help='Number of bookings the database should contain')
+        parser.add_argument('--rooms', type=int, default=500, help='Number of rooms')
+        parser.add_argument('--managed-rooms', type=int, default=50,
+                            help='Number of rooms managed by the benchmark room admin')
+        parser.add_argument('--users', type=int, default=2000, help='Number of booking users')
+        parser.add_argument('--orders-per-booking', type=float, default=0.2,
+                            help='Fraction of bookings that get a procurement order')
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--no-seed', action='store_true',
+                            help='Do not create missing rows, benchmark the existing data')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        if not options['no_seed']:
+            self.seed(rng, options)
+
+        admin = User.objects.get(email=BENCH_ADMIN_EMAIL)
+        room_ids = list(admin.managed_rooms.values_list('id', flat=True))
+        bookings = Booking.objects.select_related('room', 'user').order_by('-created_at')
+        orders = ProcurementOrder.objects.select_related(
+            'booking__room', 'booking__user', 'created_by'
+        ).order_by('-created_at')
+
+        cases = [
+            ('bookings: OR predicate', lambda: bookings.filter(
+                Q(room_id__in=room_ids) | Q(user_id=admin.pk))),
+            ('bookings: UNION ALL scope', lambda: union_scope(
+                bookings, Q(room_id__in=room_ids), Q(user_id=admin.pk))),
+            ('procurement: OR predicate', lambda: orders.filter(
+                Q(booking__room_id__in=room_ids) | Q(created_by_id=admin.pk))),
+            ('procurement: UNION ALL scope', lambda: union_scope(
+                orders, Q(booking__room_id__in=room_ids), Q(created_by_id=admin.pk))),
+        ]
+
+        self.stdout.write(
+            f"{Booking.objects.count()} bookings, {ProcurementOrder.objects.count()} "
+            f"procurement orders, {len(room_ids)} managed rooms"
+        )
+        for label, build in cases:
+            def first_page(build=build):
+                queryset = build()
+                queryset.count()
+                list(queryset[:20])
+
+            stats = measure(first_page, iterations=options['iterations'])
+            self.stdout.write(format_stats(label, stats))
+
+    def seed(self, rng, options):
+        """Create rooms, users, bookings and orders in bulk until the targets are met"""
+        missing_rooms = options['rooms'] - Room.objects.count()
+        if missing_rooms > 0:
+            categories = [choice[0] for choice in Room.CATEGORY_CHOICES]
+            Room.objects.bulk_create([
+                Room(
+                    name=f'Benchmark Room {index}',
+                    capacity=rng.randint(4, 200),
+                    category=rng.choice(categories),
+                ) for index in range(missing_rooms)
+            ], batch_size=1000)
+
+        password = make_password('benchmark')
+        missing_users = options['users'] - User.objects.filter(role='user').count()
+        if missing_users > 0:
+            offset = User.objects.count()
+            User.objects.bulk_create([
+                User(
+                    username=f'bench-user-{offset + index}',
+                    email=f'bench-user-{offset + index}@icpac.net',
+                    password=password,
+                    role='user',
+                ) for index in range(missing_users)
+            ], batch_size=1000)
+
+        admin, created = User.objects.get_or_create(
+            email=BENCH_ADMIN_EMAIL,
+            defaults={'username': 'bench-room-admin', 'password': password, 'role': 'room_admin'}
+        )
+        if created or not admin.managed_rooms.exists():
+            room_ids = list(Room.objects.values_list('id', flat=True))
+            admin.managed_rooms.set(rng.sample(room_ids, min(options['managed_rooms'], len(room_ids))))
+
+        self.seed_bookings(rng, options)
+        self.seed_orders(rng, options)
+
+    def seed_bookings(self, rng, options):
+        missing_bookings = options['bookings'] - Booking.objects.count()
+        if missing_bookings <= 0:
+            return
+
+        room_ids = list(Room.objects.values_list('id', flat=True))
+        user_ids = list(User.objects.filter(role='user').values_list('id', flat=True))
+        origin = date.today() - timedelta(days=365)
+        batch = []
+        for index in range(missing_bookings):
+            start_date = origin + timedelta(days=rng.randrange(730))
+            start_hour = rng.randint(8, 16)
+            batch.append(Booking(
+                room_id=rng.choice(room_ids),
+                user_id=rng.choice(user_ids),
+                purpose='Benchmark meeting',
+                start_date=start_date,
+                end_date=start_date,
+                start_time=time(start_hour),
+                end_time=time(start_hour + 1),
+                start_at=combine_datetime(start_date, time(start_hour)),
+                end_at=combine_datetime(start_date, time(start_hour + 1)),
+                approval_status=rng.choice(['approved', 'approved', 'pending', 'rejected']),
+            ))
+            if len(batch) == 5000:
+                self.create_bookings(batch)
+                batch = []
+                self.stdout.write(f'  seeded {index + 1}/{missing_bookings} bookings')
+        if batch:
+            self.create_bookings(batch)
+
+    def create_bookings(self, batch):
+        """Insert bookings and their per-day occurrences, bypassing save()"""
+        bookings = Booking.objects.bulk_create(batch)
+        BookingOccurrence.objects.bulk_create(
+            [occurrence for booking in bookings for occurrence in booking.build_occurrences()],
+            batch_size=5000
+        )
+
+    def seed_orders(self, rng, options):
+        target = int(options['bookings'] * options['orders_per_booking'])
+        missing_orders = target - ProcurementOrder.objects.count()
+        if missing_orders <= 0:
+            return
+
+        order_types = [choice[0] for choice in ProcurementOrder.ORDER_TYPE_CHOICES]
+        bookings = Booking.objects.filter(procurement_orders__isnull=True).values_list('id', 'user_id', 'start_at')
+        batch = []
+        for booking_id, user_id, start_at in bookings.iterator(chunk_size=5000):
+            if rng.random() >= options['orders_per_booking']:
+                continue
+            batch.append(ProcurementOrder(
+                booking_id=booking_id,
+                created_by_id=user_id,
+                due_at=start_at,
+                order_type=rng.choice(order_types),
+                items_description='Benchmark order',
+                estimated_cost=rng.randint(50, 5000),
+            ))
+            if len(batch) == 5000:
+                ProcurementOrder.objects.bulk_create(batch)
+                batch = []
+            missing_orders -= 1
+            if missing_orders <= 0:
+                break
+        if batch:
+            ProcurementOrder.objects.bulk_create(batch)
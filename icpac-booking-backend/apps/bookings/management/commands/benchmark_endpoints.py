@@ -0,0 +1,86 @@
+"""
+Benchmark every API endpoint per role against query budgets and a baseline
+"""
+import os
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.bookings.models import Booking
+from apps.procurement.models import ProcurementOrder
+from apps.rooms.models import Room
+from icpac_booking.benchmark import format_stats
+from icpac_booking.endpoint_benchmarks import (
+    ENDPOINTS, ROLES, compare, load_baseline, role_users, run_suite, save_baseline
+)
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Request every endpoint as a user, room admin, super admin and procurement officer, '
+        'and fail when an endpoint exceeds its query budget or its median latency regresses '
+        'past the baseline. Run generate_data first, then --update-baseline once on the reference '
+        'machine.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--baseline', default=str(settings.BASE_DIR / 'endpoint_baseline.json'),
+                            help='Baseline results file')
+        parser.add_argument('--update-baseline', action='store_true',
+                            help='Write this run as the new baseline instead of comparing')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Allowed median latency growth over the baseline, as a fraction')
+        parser.add_argument('--min-delta-ms', type=float, default=5.0,
+                            help='Median latency changes smaller than this never fail')
+        parser.add_argument('--role', action='append', choices=ROLES, dest='roles',
+                            help='Only benchmark these roles (repeatable)')
+        parser.add_argument('--endpoint', action='append', choices=sorted(ENDPOINTS), dest='endpoints',
+                            help='Only benchmark these URL names (repeatable)')
+        parser.add_argument('--iterations', type=int, default=20)
+
+    def handle(self, *args, **options):
+        users = {
+            role: user for role, user in role_users().items()
+            if not options['roles'] or role in options['roles']
+        }
+        missing = set(options['roles'] or ROLES) - set(users)
+        if missing:
+            raise CommandError(f'No active user with role {", ".join(sorted(missing))}; run generate_data first.')
+
+        dataset = {
+            'users': User.objects.count(),
+            'rooms': Room.objects.count(),
+            'bookings': Booking.objects.count(),
+            'procurement_orders': ProcurementOrder.objects.count(),
+        }
+        self.stdout.write(', '.join(f'{count} {name}' for name, count in dataset.items()))
+
+        results = run_suite(users, options['endpoints'], options['iterations'])
+        for role, endpoints in results.items():
+            self.stdout.write(f'\n{role}')
+            for name, stats in endpoints.items():
+                if 'skipped' in stats:
+                    self.stdout.write(f'{name:<40} skipped: {stats["skipped"]}')
+                else:
+                    self.stdout.write(f'{format_stats(name, stats)} budget={ENDPOINTS[name][2]}')
+
+        if options['update_baseline']:
+            save_baseline(options['baseline'], results, dataset)
+            self.stdout.write(f'\nBaseline written to {options["baseline"]}')
+            failures = compare(results)
+        else:
+            baseline = None
+            if os.path.exists(options['baseline']):
+                baseline = load_baseline(options['baseline'])
+            else:
+                self.stdout.write(f'\nNo baseline at {options["baseline"]}; checking query budgets only')
+            failures = compare(results, baseline, options['threshold'], options['min_delta_ms'])
+
+        if failures:
+            for failure in failures:
+                self.stderr.write(failure)
+            raise CommandError(f'{len(failures)} endpoint regressions')
+        self.stdout.write('\nAll endpoints within budget')
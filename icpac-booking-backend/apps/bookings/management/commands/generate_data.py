@@ -0,0 +1,348 @@
+"""
+Generate production-scale synthetic data for benchmarking
+"""
+import math
+import random
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from apps.bookings.models import Booking, BookingNote, BookingOccurrence, combine_datetime
+from apps.procurement.models import AttachmentUpload, ProcurementAttachment, ProcurementOrder
+from apps.rooms.models import Room, RoomAmenity
+
+User = get_user_model()
+
+EMAIL_DOMAIN = 'generated.icpac.net'
+ROOM_PREFIX = 'Generated Room'
+PASSWORD = 'generated'
+
+# Relative booking volume per weekday, Monday first
+WEEKDAY_WEIGHTS = [0.9, 1.1, 1.1, 1.0, 0.7, 0.05, 0.02]
+# Relative likelihood of a meeting starting at each half hour from 08:00
+START_WEIGHTS = [3, 2, 6, 5, 6, 4, 3, 2, 1, 1, 2, 3, 5, 4, 4, 3, 2, 1, 1, 1]
+DURATION_CHOICES = [(1, 30), (2, 40), (3, 12), (4, 12), (6, 4), (8, 2)]  # half hours, weight
+DAY_START = time(8)
+DAY_SLOTS = 20  # half hours from 08:00 to 18:00
+
+PAST_STATUSES = [('approved', 75), ('rejected', 8), ('cancelled', 9), ('expired', 8)]
+FUTURE_STATUSES = [('approved', 60), ('pending', 35), ('cancelled', 5)]
+DEPARTMENTS = [
+    'Climate Services', 'Research', 'Capacity Development', 'Finance', 'Administration',
+    'ICT', 'Early Warning', 'Communications', 'Procurement', 'Directorate',
+]
+PURPOSES = [
+    'Team meeting', 'Project review', 'Partner consultation', 'Training session',
+    'Seasonal forecast briefing', 'Board meeting', 'Workshop', 'Interview panel',
+    'Budget planning', 'Technical working group',
+]
+NOTES = [
+    'Please set up the projector before the meeting.', 'Guests will arrive 15 minutes early.',
+    'Moved from the small meeting room.', 'Catering confirmed with procurement.',
+    'Hybrid meeting, remote participants will join.',
+]
+
+
+def weighted(rng, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights=weights)[0]
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk_create keep the created_at/updated_at values set on the objects"""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def parse_now(value):
+    moment = datetime.fromisoformat(value)
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate rooms, users with room admin assignments, conflict-free bookings with realistic '
+        'weekday and hour distributions, notes and procurement orders. The same seed, origin and '
+        'now always produce the same data; now defaults to noon a year after the origin. '
+        f'Generated users sign in with the password "{PASSWORD}".'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=500)
+        parser.add_argument('--users', type=int, default=20_000)
+        parser.add_argument('--room-admins', type=int, default=200,
+                            help='Users given the room admin role, each managing a few rooms')
+        parser.add_argument('--super-admins', type=int, default=5)
+        parser.add_argument('--procurement-officers', type=int, default=10)
+        parser.add_argument('--bookings', type=int, default=2_000_000)
+        parser.add_argument('--days', type=int, default=730, help='Length of the booking window')
+        parser.add_argument('--origin', type=date.fromisoformat,
+                            help='First day of the booking window (default: a year before today)')
+        parser.add_argument('--now', type=parse_now,
+                            help='Time treated as the present, splitting past from future bookings '
+                                 '(default: noon a year after the origin)')
+        parser.add_argument('--notes-per-booking', type=float, default=0.1)
+        parser.add_argument('--orders-per-booking', type=float, default=0.2)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--clear', action='store_true', help='Delete previously generated data first')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            self.clear()
+        elif User.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}').exists():
+            raise CommandError('Generated data already exists; pass --clear to regenerate it.')
+
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        origin = options['origin'] or timezone.localdate() - timedelta(days=365)
+        # Derived from the origin rather than the clock, so a rerun on
+        # another day generates the same data
+        self.now = options['now'] or combine_datetime(origin + timedelta(days=365), time(12))
+        self.joined = combine_datetime(origin, time())
+
+        with explicit_timestamps(Room, Booking, BookingNote, ProcurementOrder):
+            rooms = self.create_rooms(options['rooms'])
+            users = self.create_users(options['users'])
+            self.assign_roles(users, rooms, options)
+            self.create_bookings(rooms, users, origin, options)
+
+    def clear(self):
+        generated_users = User.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}')
+        rooms = Room.objects.filter(name__startswith=ROOM_PREFIX)
+        bookings = Booking.objects.filter(room__in=rooms)
+        # Delete dependants in bulk rather than through the ORM cascade, except
+        # the few attachments and uploads, which reference each other
+        orders = ProcurementOrder.objects.filter(booking__in=bookings)
+        AttachmentUpload.objects.filter(order__in=orders).delete()
+        ProcurementAttachment.objects.filter(order__in=orders).delete()
+        orders._raw_delete(ProcurementOrder.objects.db)
+        BookingNote.objects.filter(booking__in=bookings)._raw_delete(BookingNote.objects.db)
+        BookingOccurrence.objects.filter(room__in=rooms)._raw_delete(BookingOccurrence.objects.db)
+        bookings._raw_delete(Booking.objects.db)
+        User.managed_rooms.through.objects.filter(room__in=rooms).delete()
+        rooms.delete()
+        generated_users.delete()
+        self.stdout.write('Cleared previously generated data')
+
+    def create_rooms(self, count):
+        categories = [choice[0] for choice in Room.CATEGORY_CHOICES]
+        amenities = list(RoomAmenity.objects.values_list('name', flat=True)) or [
+            amenity['name'] for amenity in RoomAmenity.get_default_amenities()
+        ]
+        capacities = {
+            'boardroom': (10, 25), 'conference_room': (15, 60), 'meeting_room': (4, 16),
+            'training_room': (15, 40), 'event_hall': (80, 300),
+        }
+        rooms = []
+        for index in range(count):
+            category = self.rng.choice(categories)
+            low, high = capacities.get(category, (4, 40))
+            rooms.append(Room(
+                name=f'{ROOM_PREFIX} {index + 1:04d}',
+                capacity=self.rng.randint(low, high),
+                category=category,
+                location=f'Block {self.rng.choice("ABCDEFGH")}, Floor {self.rng.randint(0, 5)}',
+                amenities=sorted(self.rng.sample(amenities, self.rng.randint(1, min(6, len(amenities))))),
+                created_at=self.joined,
+                updated_at=self.joined,
+            ))
+        rooms = Room.objects.bulk_create(rooms, batch_size=self.batch_size)
+        self.stdout.write(f'Created {len(rooms)} rooms')
+        return rooms
+
+    def create_users(self, count):
+        # Hashing is deliberately slow, so every generated user shares one hash
+        password = make_password(PASSWORD)
+        users = []
+        for index in range(count):
+            users.append(User(
+                username=f'generated-{index:06d}',
+                email=f'user{index:06d}@{EMAIL_DOMAIN}',
+                first_name=f'User{index:06d}',
+                last_name=self.rng.choice(['Mwangi', 'Otieno', 'Abebe', 'Mohamed', 'Nkurunziza', 'Okello']),
+                department=self.rng.choice(DEPARTMENTS),
+                password=password,
+                role='user',
+                date_joined=self.joined,
+            ))
+        users = User.objects.bulk_create(users, batch_size=self.batch_size)
+        self.stdout.write(f'Created {len(users)} users')
+        return users
+
+    def assign_roles(self, users, rooms, options):
+        staff = self.rng.sample(users, min(
+            options['room_admins'] + options['super_admins'] + options['procurement_officers'], len(users)
+        ))
+        admins = staff[:options['room_admins']]
+        super_admins = staff[len(admins):len(admins) + options['super_admins']]
+        officers = staff[len(admins) + len(super_admins):]
+        for role, members in (('room_admin', admins), ('super_admin', super_admins),
+                              ('procurement_officer', officers)):
+            User.objects.filter(pk__in=[user.pk for user in members]).update(role=role)
+
+        through = User.managed_rooms.through
+        links = [
+            through(user_id=admin.pk, room_id=room.pk)
+            for admin in admins
+            for room in self.rng.sample(rooms, min(self.rng.randint(2, 6), len(rooms)))
+        ]
+        through.objects.bulk_create(links, batch_size=self.batch_size)
+        self.stdout.write(
+            f'Assigned {len(links)} rooms to {len(admins)} room admins, '
+            f'{len(super_admins)} super admins and {len(officers)} procurement officers'
+        )
+
+    def day_schedule(self, mean, backlog=0):
+        """
+        Non-overlapping ``(start slot, length)`` pairs for one room on one
+        day. ``backlog`` adds meetings that did not fit on earlier days.
+        """
+        wanted = min(self.poisson(mean) + backlog, DAY_SLOTS)
+        free = [True] * DAY_SLOTS
+        schedule = []
+        for _ in range(wanted * 3):
+            if len(schedule) == wanted:
+                break
+            start = self.rng.choices(range(DAY_SLOTS), weights=START_WEIGHTS)[0]
+            length = weighted(self.rng, DURATION_CHOICES)
+            if start + length <= DAY_SLOTS and all(free[start:start + length]):
+                free[start:start + length] = [False] * length
+                schedule.append((start, length))
+        return sorted(schedule)
+
+    def poisson(self, mean):
+        # Knuth's method is fine for the small means of a room-day
+        limit, count, product = math.exp(-mean), 0, self.rng.random()
+        while product > limit:
+            count += 1
+            product *= self.rng.random()
+        return count
+
+    def create_bookings(self, rooms, users, origin, options):
+        target = options['bookings']
+        weight_per_day = sum(WEEKDAY_WEIGHTS[(origin + timedelta(days=day)).weekday()]
+                             for day in range(options['days']))
+        mean_per_weekday = target / (len(rooms) * weight_per_day) if rooms and weight_per_day else 0
+        if mean_per_weekday > 6:
+            raise CommandError(
+                f'{target} bookings do not fit in {len(rooms)} rooms over {options["days"]} days; '
+                'add rooms or days.'
+            )
+
+        user_ids = [user.pk for user in users]
+        created = 0
+        expected = 0.0
+        batch = []
+        for offset in range(options['days']):
+            day = origin + timedelta(days=offset)
+            mean = mean_per_weekday * WEEKDAY_WEIGHTS[day.weekday()]
+            for room in rooms:
+                # Meetings that collided with others are carried to the next room-day
+                backlog = max(int(expected - created - len(batch)), 0) if mean else 0
+                expected += mean
+                for start, length in self.day_schedule(mean, backlog):
+                    if created + len(batch) >= target:
+                        break
+                    batch.append(self.build_booking(room, day, start, length, user_ids))
+                if len(batch) >= self.batch_size:
+                    created += self.save_bookings(batch, user_ids, options)
+                    batch = []
+                    self.stdout.write(f'  {created}/{target} bookings')
+            if created + len(batch) >= target:
+                break
+        if batch:
+            created += self.save_bookings(batch, user_ids, options)
+        self.stdout.write(f'Created {created} bookings')
+
+    def build_booking(self, room, day, start, length, user_ids):
+        start_at = combine_datetime(day, DAY_START) + timedelta(minutes=30 * start)
+        end_at = start_at + timedelta(minutes=30 * length)
+        past = end_at < self.now
+        status = weighted(self.rng, PAST_STATUSES if past else FUTURE_STATUSES)
+        created_at = start_at - timedelta(days=self.rng.randint(1, 30), minutes=self.rng.randint(0, 600))
+        booking = Booking(
+            room_id=room.pk,
+            user_id=self.rng.choice(user_ids),
+            purpose=self.rng.choice(PURPOSES),
+            start_date=day,
+            end_date=day,
+            start_time=start_at.time(),
+            end_time=end_at.time(),
+            start_at=start_at,
+            end_at=end_at,
+            booking_type='full_day' if length >= 16 else 'hourly',
+            expected_attendees=self.rng.randint(1, room.capacity),
+            approval_status=status,
+            created_at=min(created_at, self.now),
+            updated_at=min(created_at + timedelta(hours=self.rng.randint(1, 48)), self.now),
+        )
+        if status in ('approved', 'rejected'):
+            booking.approved_at = booking.updated_at
+        if status == 'approved' and past:
+            booking.reminder_sent_at = start_at - timedelta(minutes=30)
+        return booking
+
+    @transaction.atomic
+    def save_bookings(self, batch, user_ids, options):
+        bookings = Booking.objects.bulk_create(batch)
+        BookingOccurrence.objects.bulk_create(
+            [occurrence for booking in bookings for occurrence in booking.build_occurrences()]
+        )
+
+        notes, orders = [], []
+        for booking in bookings:
+            if self.rng.random() < options['notes_per_booking']:
+                notes.append(BookingNote(
+                    booking_id=booking.pk,
+                    user_id=self.rng.choice([booking.user_id, self.rng.choice(user_ids)]),
+                    note=self.rng.choice(NOTES),
+                    created_at=min(booking.created_at + timedelta(hours=self.rng.randint(1, 24)), self.now),
+                ))
+            if self.rng.random() < options['orders_per_booking']:
+                orders.append(self.build_order(booking))
+        BookingNote.objects.bulk_create(notes)
+        ProcurementOrder.objects.bulk_create(orders)
+        return len(bookings)
+
+    def build_order(self, booking):
+        past = booking.end_at < self.now
+        if booking.approval_status in ('rejected', 'cancelled', 'expired'):
+            status = 'cancelled'
+        elif past:
+            status = weighted(self.rng, [('delivered', 85), ('cancelled', 15)])
+        else:
+            status = weighted(self.rng, [('pending', 50), ('approved', 30), ('ordered', 20)])
+        created_at = booking.created_at + timedelta(hours=self.rng.randint(1, 72))
+        return ProcurementOrder(
+            booking_id=booking.pk,
+            created_by_id=booking.user_id,
+            due_at=booking.start_at,
+            order_type=weighted(self.rng, [
+                ('catering', 50), ('equipment', 20), ('supplies', 15),
+                ('decoration', 5), ('transport', 7), ('other', 3),
+            ]),
+            items_description='Refreshments and materials',
+            estimated_cost=Decimal(self.rng.randrange(2000, 500000)) / 100,
+            priority=weighted(self.rng, [('low', 20), ('medium', 50), ('high', 25), ('urgent', 5)]),
+            status=status,
+            created_at=min(created_at, self.now),
+            updated_at=min(created_at, self.now),
+        )
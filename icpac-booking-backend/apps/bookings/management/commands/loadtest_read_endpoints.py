@@ -0,0 +1,92 @@
+"""
+Load test the async read endpoints against a running server
+"""
+import json
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.authentication.serializers import CustomTokenObtainPairSerializer
+from apps.rooms.models import Room
+from icpac_booking.benchmark import percentile
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure requests/sec and latency of calendar, availability and stats endpoints on a '
+        'running server. Compare, for example, '
+        '"gunicorn icpac_booking.wsgi -w 4" with '
+        '"uvicorn icpac_booking.asgi:application --workers 4".'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Base URL of the server')
+        parser.add_argument('--email', help='Admin to authenticate as (defaults to the first super admin)')
+        parser.add_argument('--concurrency', type=int, default=32, help='Requests in flight at once')
+        parser.add_argument('--requests', type=int, default=500, help='Requests per endpoint')
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(is_active=True, role='super_admin')
+        if options['email']:
+            users = User.objects.filter(email=options['email'])
+        user = users.order_by('id').first()
+        room = Room.objects.filter(is_active=True).order_by('id').first()
+        if user is None or room is None:
+            raise CommandError('Needs an active super admin and room; run generate_data first.')
+        token = str(CustomTokenObtainPairSerializer.get_token(user).access_token)
+
+        today = timezone.localdate()
+        endpoints = [
+            ('calendar_events', 'GET', '/api/bookings/calendar/events/'
+             f'?start={today}&end={today + timedelta(days=31)}', None),
+            ('check_room_availability', 'POST', f'/api/rooms/{room.id}/availability/',
+             {'date': str(today + timedelta(days=1)), 'start_time': '09:00', 'end_time': '10:00'}),
+            ('booking_dashboard_stats', 'GET', '/api/bookings/dashboard/stats/', None),
+            ('rooms_overview_stats', 'GET', '/api/rooms/stats/overview/', None),
+        ]
+
+        base_url = options['url'].rstrip('/')
+        self.stdout.write(
+            f"{options['requests']} requests per endpoint, {options['concurrency']} concurrent, "
+            f'against {base_url}'
+        )
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            for name, method, path, body in endpoints:
+                def call(_, method=method, path=path, body=body):
+                    return self.request(base_url + path, method, body, token)
+
+                started = time.perf_counter()
+                results = list(pool.map(call, range(options['requests'])))
+                elapsed = time.perf_counter() - started
+
+                samples = [latency for ok, latency in results if ok]
+                errors = len(results) - len(samples)
+                self.stdout.write(
+                    f'{name:<28} {len(results) / elapsed:>8.1f} req/s '
+                    f'p50={percentile(samples, 50):>8.2f}ms p99={percentile(samples, 99):>8.2f}ms '
+                    f'errors={errors}'
+                )
+
+    def request(self, url, method, body, token):
+        """Return ``(succeeded, latency in ms)`` for one request"""
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(url, data=data, method=method, headers={
+            'Authorization': f'Bearer {token}',
+            'Content-Type': 'application/json',
+        })
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+                ok = response.status == 200
+        except (urllib.error.URLError, OSError):
+            ok = False
+        return ok, (time.perf_counter() - started) * 1000
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.7 on 2026-10-19 16:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_rename_attendee_count_booking_expected_attendees_and_more'),
+        ('rooms', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['approval_status', 'created_at'], name='bookings_status_created_idx'),
+        ),
+    ]
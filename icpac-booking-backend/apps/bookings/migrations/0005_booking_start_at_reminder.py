@@ -0,0 +1,47 @@
+# Generated by Django 5.0.7 on 2026-10-19 16:36
+
+from datetime import datetime
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_start_at(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+    batch = []
+    for booking in Booking.objects.only('id', 'start_date', 'start_time').iterator(chunk_size=1000):
+        booking.start_at = timezone.make_aware(datetime.combine(booking.start_date, booking.start_time))
+        batch.append(booking)
+        if len(batch) >= 1000:
+            Booking.objects.bulk_update(batch, ['start_at'])
+            batch = []
+    if batch:
+        Booking.objects.bulk_update(batch, ['start_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_booking_expired_status'),
+        ('rooms', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='reminder_sent_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='When the meeting reminder was queued', null=True),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='start_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Start date and time combined in the server time zone', null=True),
+        ),
+        migrations.RunPython(backfill_start_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('approval_status', 'approved'), ('reminder_sent_at__isnull', True)), fields=['start_at'], name='bookings_reminder_due_idx'),
+        ),
+    ]
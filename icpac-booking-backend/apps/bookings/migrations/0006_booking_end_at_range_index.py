@@ -0,0 +1,42 @@
+# Generated by Django 5.0.7 on 2026-10-19 16:39
+
+from django.conf import settings
+from datetime import datetime
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_end_at(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+    batch = []
+    for booking in Booking.objects.only('id', 'end_date', 'end_time').iterator(chunk_size=1000):
+        booking.end_at = timezone.make_aware(datetime.combine(booking.end_date, booking.end_time))
+        batch.append(booking)
+        if len(batch) >= 1000:
+            Booking.objects.bulk_update(batch, ['end_at'])
+            batch = []
+    if batch:
+        Booking.objects.bulk_update(batch, ['end_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0005_booking_start_at_reminder'),
+        ('rooms', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='end_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='End date and time combined in the server time zone', null=True),
+        ),
+        migrations.RunPython(backfill_end_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['room', 'start_at', 'end_at'], name='bookings_room_range_idx'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.0.7 on 2026-10-19 16:43
+
+from datetime import datetime, time, timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_occurrences(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+    BookingOccurrence = apps.get_model('bookings', 'BookingOccurrence')
+    batch = []
+    bookings = Booking.objects.only(
+        'id', 'room_id', 'start_date', 'end_date', 'start_at', 'end_at', 'approval_status'
+    )
+    for booking in bookings.iterator(chunk_size=1000):
+        day = booking.start_date
+        while day <= booking.end_date:
+            day_start = timezone.make_aware(datetime.combine(day, time.min))
+            slice_start = max(booking.start_at, day_start)
+            slice_end = min(booking.end_at, day_start + timedelta(days=1))
+            if slice_start < slice_end:
+                batch.append(BookingOccurrence(
+                    booking_id=booking.id, room_id=booking.room_id, date=day,
+                    start_at=slice_start, end_at=slice_end, approval_status=booking.approval_status
+                ))
+            day += timedelta(days=1)
+        if len(batch) >= 1000:
+            BookingOccurrence.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        BookingOccurrence.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0006_booking_end_at_range_index'),
+        ('rooms', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingOccurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Calendar day')),
+                ('start_at', models.DateTimeField(help_text='Start of the booking within this day')),
+                ('end_at', models.DateTimeField(help_text='End of the booking within this day')),
+                ('approval_status', models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected'), ('cancelled', 'Cancelled'), ('expired', 'Expired')], help_text='Approval status of the booking (denormalized)', max_length=20)),
+                ('booking', models.ForeignKey(help_text='Booking this day belongs to', on_delete=django.db.models.deletion.CASCADE, related_name='occurrences', to='bookings.booking')),
+                ('room', models.ForeignKey(help_text='Room of the booking (denormalized)', on_delete=django.db.models.deletion.CASCADE, related_name='booking_occurrences', to='rooms.room')),
+            ],
+            options={
+                'verbose_name': 'Booking Occurrence',
+                'verbose_name_plural': 'Booking Occurrences',
+                'db_table': 'booking_occurrences',
+                'ordering': ['date', 'start_at'],
+                'indexes': [models.Index(fields=['room', 'date', 'start_at'], name='occurrence_room_date_idx'), models.Index(fields=['date', 'approval_status'], name='occurrence_date_status_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='bookingoccurrence',
+            constraint=models.UniqueConstraint(fields=('booking', 'date'), name='unique_booking_occurrence_date'),
+        ),
+        migrations.RunPython(backfill_occurrences, migrations.RunPython.noop),
+    ]
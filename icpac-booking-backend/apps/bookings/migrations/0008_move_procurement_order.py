@@ -0,0 +1,20 @@
+# Generated by Django 5.0.7 on 2026-10-19 17:02
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0007_booking_occurrences'),
+    ]
+
+    operations = [
+        # The procurement_orders table stays; apps.procurement takes it over
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.DeleteModel(name='ProcurementOrder'),
+            ],
+            database_operations=[],
+        ),
+    ]
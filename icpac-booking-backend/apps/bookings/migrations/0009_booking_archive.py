@@ -0,0 +1,71 @@
+# Generated by Django 5.0.7 on 2026-10-19 17:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0008_move_procurement_order'),
+        ('rooms', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedBooking',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('purpose', models.CharField(help_text='Meeting/event purpose or title', max_length=255)),
+                ('special_requirements', models.TextField(blank=True, help_text='Special requirements or notes')),
+                ('start_date', models.DateField(help_text='Start date of booking')),
+                ('end_date', models.DateField(help_text='End date of booking')),
+                ('start_time', models.TimeField(help_text='Start time')),
+                ('end_time', models.TimeField(help_text='End time')),
+                ('booking_type', models.CharField(choices=[('hourly', 'Hourly'), ('full_day', 'Full Day'), ('multi_day', 'Multi Day'), ('weekly', 'Weekly')], default='hourly', help_text='Type of booking', max_length=20)),
+                ('expected_attendees', models.PositiveIntegerField(default=1, help_text='Expected number of attendees')),
+                ('approval_status', models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected'), ('cancelled', 'Cancelled'), ('expired', 'Expired')], help_text='Final booking approval status', max_length=20)),
+                ('approved_at', models.DateTimeField(blank=True, help_text='When the booking was approved/rejected', null=True)),
+                ('rejection_reason', models.TextField(blank=True, help_text='Reason for rejection if booking was rejected')),
+                ('start_at', models.DateTimeField(help_text='Start date and time combined in the server time zone')),
+                ('end_at', models.DateTimeField(help_text='End date and time combined in the server time zone')),
+                ('created_at', models.DateTimeField(help_text='When the booking was made')),
+                ('updated_at', models.DateTimeField(help_text='When the booking last changed')),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('approved_by', models.ForeignKey(blank=True, help_text='Admin who approved/rejected the booking', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='approved_archived_bookings', to=settings.AUTH_USER_MODEL)),
+                ('room', models.ForeignKey(help_text='Room that was booked', on_delete=django.db.models.deletion.CASCADE, related_name='archived_bookings', to='rooms.room')),
+                ('user', models.ForeignKey(help_text='User who made the booking', on_delete=django.db.models.deletion.CASCADE, related_name='archived_bookings', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Archived Booking',
+                'verbose_name_plural': 'Archived Bookings',
+                'db_table': 'bookings_archive',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedBookingNote',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('note', models.TextField()),
+                ('is_internal', models.BooleanField(default=False, help_text='Internal notes visible only to admins')),
+                ('created_at', models.DateTimeField()),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notes', to='bookings.archivedbooking')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'booking_notes_archive',
+                'ordering': ['created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedbooking',
+            index=models.Index(fields=['room', 'start_at', 'end_at'], name='bookings_archive_range_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedbooking',
+            index=models.Index(fields=['user', 'created_at'], name='bookings_archive_user_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def partition_bookings(apps, schema_editor):
+    from apps.bookings.partitioning import partition_bookings_table
+
+    partition_bookings_table(schema_editor)
+
+
+class Migration(migrations.Migration):
+    """
+    Convert bookings into a table range-partitioned by start_date on
+    PostgreSQL; nothing changes on other databases. The table stays
+    partitioned when migrating backwards, which the ORM handles the same.
+    The conversion drops the foreign keys referencing bookings, which the
+    model state records as db_constraint=False.
+    """
+
+    dependencies = [
+        ('bookings', '0009_booking_archive'),
+        ('procurement', '0003_procurement_order_archive'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(partition_bookings, migrations.RunPython.noop),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='bookingnote',
+                    name='booking',
+                    field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='notes', to='bookings.booking'),
+                ),
+                migrations.AlterField(
+                    model_name='bookingoccurrence',
+                    name='booking',
+                    field=models.ForeignKey(db_constraint=False, help_text='Booking this day belongs to', on_delete=django.db.models.deletion.CASCADE, related_name='occurrences', to='bookings.booking'),
+                ),
+            ],
+        ),
+    ]
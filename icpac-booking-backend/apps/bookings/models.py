@@ -1,16 +1,69 @@
 """
 Booking models for ICPAC Booking System
 """
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from datetime import datetime, time, timedelta
 
+from icpac_booking.db_routing import use_primary
+
 User = get_user_model()
 
 
+def combine_datetime(date_value, time_value):
+    """Combine a booking date and time into an aware datetime"""
+    return timezone.make_aware(datetime.combine(date_value, time_value))
+
+
+class BookingQuerySet(models.QuerySet):
+    """
+    Range predicates on the materialized ``start_at``/``end_at`` columns.
+
+    A booking occupies its room continuously from ``start_at`` to ``end_at``.
+    The redundant ``start_date`` bounds let PostgreSQL skip the monthly
+    partitions of ``bookings`` a query cannot match.
+    """
+    def live(self):
+        """Bookings that hold their slot (pending or approved)"""
+        return self.filter(approval_status__in=['pending', 'approved'])
+    
+    def overlapping(self, start_at, end_at):
+        """Bookings sharing any part of ``[start_at, end_at)``"""
+        return self.filter(
+            start_at__lt=end_at, end_at__gt=start_at,
+            start_date__lte=timezone.localtime(end_at).date()
+        )
+    
+    def on_date(self, date):
+        """Bookings occupying any part of a calendar day"""
+        day_start = combine_datetime(date, time.min)
+        return self.overlapping(day_start, day_start + timedelta(days=1))
+    
+    def starting_between(self, start_date, end_date):
+        """Bookings starting on any day from ``start_date`` to ``end_date`` inclusive"""
+        return self.filter(
+            start_at__gte=combine_datetime(start_date, time.min),
+            start_at__lt=combine_datetime(end_date, time.min) + timedelta(days=1),
+            start_date__range=(start_date, end_date)
+        )
+    
+    def in_progress(self, now=None):
+        """Bookings running at ``now``"""
+        now = now or timezone.now()
+        return self.filter(start_at__lte=now, end_at__gt=now)
+    
+    def upcoming(self, now=None):
+        """Bookings that have not started yet"""
+        return self.filter(start_at__gt=now or timezone.now())
+    
+    def completed(self, now=None):
+        """Bookings that have ended"""
+        return self.filter(end_at__lte=now or timezone.now())
+
+
 class Booking(models.Model):
     """
     Main booking model for room reservations
@@ -27,6 +80,7 @@ class Booking(models.Model):
         ('approved', 'Approved'),
         ('rejected', 'Rejected'),
         ('cancelled', 'Cancelled'),
+        ('expired', 'Expired'),
     ]
     
     # Basic booking information
@@ -102,15 +156,51 @@ class Booking(models.Model):
         help_text='Reason for rejection if booking was rejected'
     )
     
+    # Materialized start/end for indexed range queries, kept in sync by save()
+    start_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text='Start date and time combined in the server time zone'
+    )
+    
+    end_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text='End date and time combined in the server time zone'
+    )
+    
+    reminder_sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text='When the meeting reminder was queued'
+    )
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = BookingQuerySet.as_manager()
+    
     class Meta:
         db_table = 'bookings'
         verbose_name = 'Booking'
         verbose_name_plural = 'Bookings'
         ordering = ['-created_at']
+        indexes = [
+            # Pending-approval digests scan recent pending bookings
+            models.Index(fields=['approval_status', 'created_at'], name='bookings_status_created_idx'),
+            # Overlap, availability and calendar range lookups
+            models.Index(fields=['room', 'start_at', 'end_at'], name='bookings_room_range_idx'),
+            # Reminder engine: approved bookings still waiting for a reminder
+            models.Index(
+                fields=['start_at'],
+                name='bookings_reminder_due_idx',
+                condition=models.Q(approval_status='approved', reminder_sent_at__isnull=True)
+            ),
+        ]
         
         # Prevent double booking (same room, overlapping times)
         constraints = [
@@ -149,35 +239,75 @@ class Booking(models.Model):
             errors['expected_attendees'] = f'Attendee count ({self.expected_attendees}) exceeds room capacity ({self.room.capacity}).'
         
         # Check for overlapping bookings (only for approved/pending bookings)
-        if self.room:
-            overlapping = Booking.objects.filter(
-                room=self.room,
-                approval_status__in=['pending', 'approved'],
-                start_date__lte=self.end_date,
-                end_date__gte=self.start_date,
-            ).exclude(pk=self.pk if self.pk else None)
-            
-            # Check time overlap for same dates
-            for booking in overlapping:
-                if (self.start_date <= booking.end_date and self.end_date >= booking.start_date):
-                    # Same day, check time overlap
-                    if (self.start_time < booking.end_time and self.end_time > booking.start_time):
-                        errors['start_time'] = f'Time slot conflicts with existing booking: {booking.purpose}'
-                        break
+        if self.room and self.start_date and self.end_date and self.start_time and self.end_time:
+            with use_primary():
+                conflict = Booking.objects.live().filter(room=self.room).overlapping(
+                    combine_datetime(self.start_date, self.start_time),
+                    combine_datetime(self.end_date, self.end_time)
+                ).exclude(pk=self.pk).first()
+            if conflict:
+                errors['start_time'] = f'Time slot conflicts with existing booking: {conflict.purpose}'
         
         if errors:
             raise ValidationError(errors)
     
     def save(self, *args, **kwargs):
         self.full_clean()
-        super().save(*args, **kwargs)
+        start_at = combine_datetime(self.start_date, self.start_time)
+        rescheduled = start_at != self.start_at
+        if rescheduled:
+            # A rescheduled meeting gets a new reminder
+            self.reminder_sent_at = None
+        self.start_at = start_at
+        self.end_at = combine_datetime(self.end_date, self.end_time)
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'start_at', 'end_at', 'reminder_sent_at'}
+        with transaction.atomic():
+            moved = rescheduled and not self._state.adding
+            super().save(*args, **kwargs)
+            self.sync_occurrences()
+            if moved:
+                self.procurement_orders.update(due_at=start_at)
+    
+    def build_occurrences(self):
+        """Unsaved per-day slices of the booking, one per calendar day it touches"""
+        start_at, end_at = self.get_start_at(), self.get_end_at()
+        occurrences = []
+        day = self.start_date
+        while day <= self.end_date:
+            day_start = combine_datetime(day, time.min)
+            day_end = combine_datetime(day + timedelta(days=1), time.min)
+            slice_start, slice_end = max(start_at, day_start), min(end_at, day_end)
+            if slice_start < slice_end:
+                occurrences.append(BookingOccurrence(
+                    booking_id=self.pk, room_id=self.room_id, date=day,
+                    start_at=slice_start, end_at=slice_end, approval_status=self.approval_status
+                ))
+            day += timedelta(days=1)
+        return occurrences
+    
+    def sync_occurrences(self):
+        """Bring the occurrence rows in line with the booking; one query when unchanged"""
+        fields = ('date', 'start_at', 'end_at', 'room_id', 'approval_status')
+        wanted = self.build_occurrences()
+        existing = set(self.occurrences.values_list(*fields))
+        if existing == {tuple(getattr(occurrence, field) for field in fields) for occurrence in wanted}:
+            return
+        self.occurrences.all().delete()
+        BookingOccurrence.objects.bulk_create(wanted)
+    
+    def get_start_at(self):
+        """Start as an aware datetime, also for unsaved bookings"""
+        return self.start_at or combine_datetime(self.start_date, self.start_time)
+    
+    def get_end_at(self):
+        """End as an aware datetime, also for unsaved bookings"""
+        return self.end_at or combine_datetime(self.end_date, self.end_time)
     
     def get_duration_hours(self):
         """Calculate booking duration in hours"""
         if self.start_time and self.end_time:
-            start_datetime = datetime.combine(self.start_date, self.start_time)
-            end_datetime = datetime.combine(self.end_date, self.end_time)
-            duration = end_datetime - start_datetime
+            duration = self.get_end_at() - self.get_start_at()
             return duration.total_seconds() / 3600
         return 0
     
@@ -213,36 +343,22 @@ class Booking(models.Model):
         """Check if booking is currently in progress"""
         if not self.is_approved:
             return False
-            
-        now = timezone.now()
-        current_date = now.date()
-        current_time = now.time()
         
-        return (
-            self.start_date <= current_date <= self.end_date and
-            self.start_time <= current_time <= self.end_time
-        )
+        now = timezone.now()
+        return self.get_start_at() <= now < self.get_end_at()
     
     @property
     def is_upcoming(self):
         """Check if booking is upcoming"""
         if not self.is_approved:
             return False
-            
-        now = timezone.now()
-        start_datetime = datetime.combine(self.start_date, self.start_time)
-        start_datetime = timezone.make_aware(start_datetime)
         
-        return start_datetime > now
+        return self.get_start_at() > timezone.now()
     
     @property
     def is_completed(self):
         """Check if booking is completed"""
-        now = timezone.now()
-        end_datetime = datetime.combine(self.end_date, self.end_time)
-        end_datetime = timezone.make_aware(end_datetime)
-        
-        return end_datetime < now
+        return self.get_end_at() <= timezone.now()
     
     def approve(self, approved_by_user):
         """Approve the booking"""
@@ -262,16 +378,12 @@ class Booking(models.Model):
     
     def can_be_modified_by(self, user):
         """Check if user can modify this booking"""
-        # Super admin can modify any booking
-        if user.role == 'super_admin':
-            return True
-        
-        # Room admin can modify bookings for their rooms
-        if user.role == 'room_admin':
+        # Super admin can modify any booking, room admin bookings for their rooms
+        if user.access_scope.manages_room(self.room_id):
             return True
         
         # User can modify their own bookings (pending or approved)
-        if self.user == user and self.approval_status in ['pending', 'approved']:
+        if self.user_id == user.pk and self.approval_status in ['pending', 'approved']:
             return True
         
         return False
@@ -282,15 +394,65 @@ class Booking(models.Model):
         if not self.is_pending:
             return False
         
-        # Super admin can approve any booking
-        if user.role == 'super_admin':
-            return True
-        
-        # Room admin can approve bookings for their rooms
-        if user.role == 'room_admin':
-            return True
-        
-        return False
+        # Super admin can approve any booking, room admin bookings for their rooms
+        return user.access_scope.manages_room(self.room_id)
+
+
+class BookingOccurrence(models.Model):
+    """
+    One calendar day of a booking
+
+    Derived from Booking and rewritten whenever the booking is saved, so that
+    daily views, availability and utilization read only the rows for the
+    days they cover instead of reinterpreting multi-day and weekly bookings.
+    """
+    # No database constraint: a partitioned bookings table cannot be
+    # referenced (see apps.bookings.partitioning)
+    booking = models.ForeignKey(
+        Booking,
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        related_name='occurrences',
+        help_text='Booking this day belongs to'
+    )
+    
+    room = models.ForeignKey(
+        'rooms.Room',
+        on_delete=models.CASCADE,
+        related_name='booking_occurrences',
+        help_text='Room of the booking (denormalized)'
+    )
+    
+    date = models.DateField(help_text='Calendar day')
+    start_at = models.DateTimeField(help_text='Start of the booking within this day')
+    end_at = models.DateTimeField(help_text='End of the booking within this day')
+    
+    approval_status = models.CharField(
+        max_length=20,
+        choices=Booking.APPROVAL_STATUS_CHOICES,
+        help_text='Approval status of the booking (denormalized)'
+    )
+    
+    class Meta:
+        db_table = 'booking_occurrences'
+        verbose_name = 'Booking Occurrence'
+        verbose_name_plural = 'Booking Occurrences'
+        ordering = ['date', 'start_at']
+        constraints = [
+            models.UniqueConstraint(fields=['booking', 'date'], name='unique_booking_occurrence_date'),
+        ]
+        indexes = [
+            models.Index(fields=['room', 'date', 'start_at'], name='occurrence_room_date_idx'),
+            models.Index(fields=['date', 'approval_status'], name='occurrence_date_status_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.booking_id} on {self.date}"
+    
+    @property
+    def duration_hours(self):
+        """Hours of the booking falling on this day"""
+        return (self.end_at - self.start_at).total_seconds() / 3600
 
 
 class BookingNote(models.Model):
@@ -300,6 +462,7 @@ class BookingNote(models.Model):
     booking = models.ForeignKey(
         Booking,
         on_delete=models.CASCADE,
+        db_constraint=False,
         related_name='notes'
     )
     
@@ -320,93 +483,107 @@ class BookingNote(models.Model):
         return f"Note for {self.booking.purpose} by {self.user.get_full_name()}"
 
 
-class ProcurementOrder(models.Model):
+class ArchivedBooking(models.Model):
     """
-    Procurement orders for booking-related purchases
+    Bookings moved out of the live table by ``apps.bookings.archive`` once
+    they ended more than ``BOOKING_ARCHIVE_AFTER_DAYS`` ago. Rows keep their
+    original id and the field names of ``Booking``, so the same filters,
+    scoping and list serializer apply to both.
     """
-    ORDER_TYPE_CHOICES = [
-        ('catering', 'Catering'),
-        ('equipment', 'Equipment'),
-        ('supplies', 'Office Supplies'),
-        ('decoration', 'Decoration'),
-        ('transport', 'Transportation'),
-        ('other', 'Other'),
-    ]
-    
-    PRIORITY_CHOICES = [
-        ('low', 'Low'),
-        ('medium', 'Medium'),
-        ('high', 'High'),
-        ('urgent', 'Urgent'),
-    ]
-    
-    STATUS_CHOICES = [
-        ('pending', 'Pending'),
-        ('approved', 'Approved'),
-        ('ordered', 'Ordered'),
-        ('delivered', 'Delivered'),
-        ('cancelled', 'Cancelled'),
-    ]
+    id = models.BigIntegerField(primary_key=True)
     
-    booking = models.ForeignKey(
-        Booking,
+    room = models.ForeignKey(
+        'rooms.Room',
         on_delete=models.CASCADE,
-        related_name='procurement_orders',
-        help_text='Related booking'
+        related_name='archived_bookings',
+        help_text='Room that was booked'
     )
     
-    order_type = models.CharField(
-        max_length=20,
-        choices=ORDER_TYPE_CHOICES,
-        default='other',
-        help_text='Type of procurement order'
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_bookings',
+        help_text='User who made the booking'
     )
     
-    items_description = models.TextField(
-        help_text='Detailed description of items to be procured'
-    )
+    purpose = models.CharField(max_length=255, help_text='Meeting/event purpose or title')
+    special_requirements = models.TextField(blank=True, help_text='Special requirements or notes')
     
-    estimated_cost = models.DecimalField(
-        max_digits=10,
-        decimal_places=2,
-        validators=[MinValueValidator(0)],
-        help_text='Estimated cost in local currency'
-    )
+    start_date = models.DateField(help_text='Start date of booking')
+    end_date = models.DateField(help_text='End date of booking')
+    start_time = models.TimeField(help_text='Start time')
+    end_time = models.TimeField(help_text='End time')
     
-    priority = models.CharField(
+    booking_type = models.CharField(
         max_length=20,
-        choices=PRIORITY_CHOICES,
-        default='medium',
-        help_text='Order priority level'
+        choices=Booking.BOOKING_TYPE_CHOICES,
+        default='hourly',
+        help_text='Type of booking'
     )
     
-    status = models.CharField(
+    expected_attendees = models.PositiveIntegerField(default=1, help_text='Expected number of attendees')
+    
+    approval_status = models.CharField(
         max_length=20,
-        choices=STATUS_CHOICES,
-        default='pending',
-        help_text='Order processing status'
+        choices=Booking.APPROVAL_STATUS_CHOICES,
+        help_text='Final booking approval status'
     )
     
-    notes = models.TextField(
+    approved_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
         blank=True,
-        help_text='Additional notes or requirements'
+        related_name='approved_archived_bookings',
+        help_text='Admin who approved/rejected the booking'
     )
     
-    created_by = models.ForeignKey(
-        User,
+    approved_at = models.DateTimeField(null=True, blank=True, help_text='When the booking was approved/rejected')
+    rejection_reason = models.TextField(blank=True, help_text='Reason for rejection if booking was rejected')
+    
+    start_at = models.DateTimeField(help_text='Start date and time combined in the server time zone')
+    end_at = models.DateTimeField(help_text='End date and time combined in the server time zone')
+    
+    created_at = models.DateTimeField(help_text='When the booking was made')
+    updated_at = models.DateTimeField(help_text='When the booking last changed')
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    objects = BookingQuerySet.as_manager()
+    
+    class Meta:
+        db_table = 'bookings_archive'
+        verbose_name = 'Archived Booking'
+        verbose_name_plural = 'Archived Bookings'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['room', 'start_at', 'end_at'], name='bookings_archive_range_idx'),
+            models.Index(fields=['user', 'created_at'], name='bookings_archive_user_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.purpose} - {self.room.name} ({self.start_date}, archived)"
+
+
+class ArchivedBookingNote(models.Model):
+    """
+    Notes of archived bookings
+    """
+    id = models.BigIntegerField(primary_key=True)
+    
+    booking = models.ForeignKey(
+        ArchivedBooking,
         on_delete=models.CASCADE,
-        related_name='created_procurement_orders',
-        help_text='User who created this order'
+        related_name='notes'
     )
     
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    note = models.TextField()
+    is_internal = models.BooleanField(default=False, help_text='Internal notes visible only to admins')
+    created_at = models.DateTimeField()
     
     class Meta:
-        db_table = 'procurement_orders'
-        verbose_name = 'Procurement Order'
-        verbose_name_plural = 'Procurement Orders'
-        ordering = ['-created_at']
+        db_table = 'booking_notes_archive'
+        ordering = ['created_at']
     
     def __str__(self):
-        return f"Procurement Order #{self.id} - {self.get_order_type_display()} for {self.booking.purpose}"
\ No newline at end of file
+        return f"Note for archived booking #{self.booking_id}"
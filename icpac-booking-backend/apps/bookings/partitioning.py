@@ -0,0 +1,184 @@
+"""
+Range partitioning of bookings for ICPAC Booking System
+
+On PostgreSQL the ``bookings`` table is declaratively partitioned by
+``start_date``, one partition per month (``bookings_p2026_03``) plus a
+``bookings_default`` partition catching anything outside them. Queries
+that bound ``start_date`` only touch the months they ask for; the
+``BookingQuerySet`` range helpers add those bounds.
+
+PostgreSQL requires every unique constraint on a partitioned table to
+include the partition key, so the primary key becomes ``(id, start_date)``
+and ``id`` is drawn from a sequence. Foreign keys from other tables can no
+longer reference ``bookings.id`` and are dropped, so the models declare
+them with ``db_constraint=False``; Django still cascades deletes through
+the ORM. The foreign keys of ``bookings`` itself to rooms and users are
+recreated on the partitioned table.
+
+A beat task keeps ``BOOKING_PARTITION_MONTHS_AHEAD`` months of partitions
+created ahead of today. Every function here is a no-op on other databases
+and on an unpartitioned table, so SQLite development is unchanged.
+"""
+import logging
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+TABLE = 'bookings'
+DEFAULT_PARTITION = 'bookings_default'
+ID_SEQUENCE = 'bookings_partitioned_id_seq'
+
+
+def next_month(month):
+    """The ``(year, month)`` after ``month``"""
+    return (month[0] + month[1] // 12, month[1] % 12 + 1)
+
+
+def add_months(month, count):
+    index = month[0] * 12 + month[1] - 1 + count
+    return (index // 12, index % 12 + 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month[0]:04d}_{month[1]:02d}'
+
+
+def month_bound(month):
+    return f'{month[0]:04d}-{month[1]:02d}-01'
+
+
+def is_partitioned(using=None):
+    """Whether the bookings table is a partitioned PostgreSQL table"""
+    using = using or connection
+    if using.vendor != 'postgresql':
+        return False
+    with using.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+def existing_partitions(cursor):
+    cursor.execute(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = to_regclass(%s)", [TABLE]
+    )
+    return {name for name, in cursor.fetchall()}
+
+
+def attach_month(cursor, month):
+    """
+    Create the partition for ``month``. Rows that already landed in the
+    default partition are moved into it before it is attached, since
+    PostgreSQL refuses a partition whose range the default still holds.
+    """
+    name = partition_name(month)
+    start, end = month_bound(month), month_bound(next_month(month))
+    cursor.execute(f'CREATE TABLE "{name}" (LIKE "{TABLE}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    if DEFAULT_PARTITION in existing_partitions(cursor):
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" '
+            f'WHERE start_date >= %s AND start_date < %s RETURNING *) '
+            f'INSERT INTO "{name}" SELECT * FROM moved', [start, end]
+        )
+    cursor.execute(
+        f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{name}" FOR VALUES FROM (%s) TO (%s)', [start, end]
+    )
+
+
+def create_partitions(first, last, using=None):
+    """Create the missing monthly partitions from ``first`` to ``last`` inclusive"""
+    using = using or connection
+    created = []
+    with transaction.atomic(using=using.alias), using.cursor() as cursor:
+        existing = existing_partitions(cursor)
+        month = first
+        while month <= last:
+            if partition_name(month) not in existing:
+                attach_month(cursor, month)
+                created.append(partition_name(month))
+            month = next_month(month)
+    return created
+
+
+def ensure_future_partitions(today=None, months_ahead=None, using=None):
+    """Keep partitions created from this month to ``months_ahead`` months out"""
+    if not is_partitioned(using):
+        return []
+    today = today or timezone.localdate()
+    months_ahead = settings.BOOKING_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    current = (today.year, today.month)
+    created = create_partitions(current, add_months(current, months_ahead), using)
+    if created:
+        logger.info('Created booking partitions %s', ', '.join(created))
+    return created
+
+
+def partition_bookings_table(schema_editor, months_ahead=None):
+    """
+    Convert the plain ``bookings`` table into a partitioned one, copying
+    every row. Runs inside the migration's transaction, which holds an
+    exclusive lock on ``bookings`` until it commits.
+    """
+    using = schema_editor.connection
+    if using.vendor != 'postgresql' or is_partitioned(using):
+        return
+    months_ahead = settings.BOOKING_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+
+    with using.cursor() as cursor:
+        cursor.execute(
+            "SELECT conname, conrelid::regclass::text FROM pg_constraint "
+            "WHERE confrelid = to_regclass(%s) AND contype = 'f'", [TABLE]
+        )
+        for name, table in cursor.fetchall():
+            cursor.execute(f'ALTER TABLE {table} DROP CONSTRAINT "{name}"')
+
+        # LIKE copies only check constraints; the foreign keys to rooms and
+        # users are added back once the rows are copied
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype = 'f'", [TABLE]
+        )
+        foreign_keys = cursor.fetchall()
+
+        # Secondary indexes are recreated on the partitioned table once the
+        # old one is dropped, which cascades them to every partition
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes WHERE tablename = %s AND schemaname = current_schema() "
+            "AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s))",
+            [TABLE, TABLE]
+        )
+        index_definitions = [definition for definition, in cursor.fetchall()]
+
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO bookings_unpartitioned')
+        cursor.execute(
+            f'CREATE TABLE "{TABLE}" (LIKE bookings_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            f'PARTITION BY RANGE (start_date)'
+        )
+        cursor.execute(f'CREATE SEQUENCE "{ID_SEQUENCE}" OWNED BY "{TABLE}".id')
+        cursor.execute(f'ALTER TABLE "{TABLE}" ALTER COLUMN id SET DEFAULT nextval(\'"{ID_SEQUENCE}"\')')
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD PRIMARY KEY (id, start_date)')
+
+        cursor.execute('SELECT MIN(start_date) FROM bookings_unpartitioned')
+        oldest = cursor.fetchone()[0] or timezone.localdate()
+        today = timezone.localdate()
+        month = (oldest.year, oldest.month)
+        last = add_months((today.year, today.month), months_ahead)
+        while month <= last:
+            attach_month(cursor, month)
+            month = next_month(month)
+        cursor.execute(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{TABLE}" DEFAULT')
+
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM bookings_unpartitioned')
+        cursor.execute(f'SELECT setval(\'"{ID_SEQUENCE}"\', COALESCE(MAX(id), 0) + 1, false) FROM "{TABLE}"')
+        cursor.execute('DROP TABLE bookings_unpartitioned')
+
+        for definition in index_definitions:
+            cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" {definition}')
@@ -0,0 +1,73 @@
+"""
+Meeting reminders for ICPAC Booking System
+
+Every minute the reminder engine selects approved bookings that start within
+the next ``MEETING_REMINDER_LEAD_MINUTES`` and have not been reminded yet.
+The query is a single range scan on the partial ``bookings_reminder_due_idx``
+index, which only holds bookings still waiting for a reminder, so its cost
+does not grow with the booking history. Outbox rows and ``reminder_sent_at``
+markers are written in the same transaction, so at most one reminder is
+queued per booking and start time; rescheduling a booking clears the
+marker. Delivery from the outbox is at least once, so a worker crashing
+between sending and recording the send can repeat a reminder.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.template.loader import get_template
+from django.utils import timezone
+
+from apps.notifications.models import EmailOutbox
+from apps.notifications.outbox import queue_emails
+from .models import Booking
+
+REMINDER_KIND = 'meeting_reminder'
+
+
+def due_reminders(now, lead_minutes):
+    """Approved bookings starting in ``(now, now + lead_minutes]`` not yet reminded"""
+    return Booking.objects.filter(
+        approval_status='approved',
+        reminder_sent_at__isnull=True,
+        start_at__gt=now,
+        start_at__lte=now + timedelta(minutes=lead_minutes),
+    )
+
+
+def send_meeting_reminders(now=None, lead_minutes=None, batch_size=None):
+    """Queue reminders for meetings about to start; returns how many were queued"""
+    now = now or timezone.now()
+    lead_minutes = lead_minutes or settings.MEETING_REMINDER_LEAD_MINUTES
+    batch_size = batch_size or settings.MEETING_REMINDER_BATCH_SIZE
+    subject_template = get_template(f'notifications/email/{REMINDER_KIND}_subject.txt')
+    body_template = get_template(f'notifications/email/{REMINDER_KIND}.txt')
+
+    queued = 0
+    while True:
+        with transaction.atomic():
+            bookings = list(
+                due_reminders(now, lead_minutes)
+                .select_for_update(skip_locked=True, of=('self',))
+                .select_related('room', 'user')
+                .order_by('start_at')[:batch_size]
+            )
+            if not bookings:
+                break
+
+            messages = []
+            for booking in bookings:
+                context = {'booking': booking, 'minutes': lead_minutes}
+                messages.append(EmailOutbox(
+                    kind=REMINDER_KIND,
+                    to=[booking.user.email] if booking.user.email else [],
+                    subject=' '.join(subject_template.render(context).split()),
+                    body=body_template.render(context),
+                    dedupe_key=f'{REMINDER_KIND}:{booking.pk}:{booking.start_at.isoformat()}',
+                ))
+            queued += queue_emails(messages)
+            Booking.objects.filter(id__in=[booking.id for booking in bookings]).update(reminder_sent_at=now)
+
+        if len(bookings) < batch_size:
+            break
+    return queued
@@ -4,8 +4,10 @@ Booking serializers for ICPAC Booking System
 from rest_framework import serializers
 from django.utils import timezone
 from datetime import datetime, timedelta
-from .models import Booking, ProcurementOrder
+from .alternatives import BookingIntervals
+from .models import Booking, combine_datetime
 from apps.rooms.models import Room
+from icpac_booking.db_routing import use_primary
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -104,20 +106,18 @@ class BookingSerializer(serializers.ModelSerializer):
         
         # Check for overlapping bookings
         if room:
-            overlapping_bookings = Booking.objects.filter(
-                room=room,
-                approval_status__in=['approved', 'pending'],
-                start_date__lte=end_date,
-                end_date__gte=start_date,
-                start_time__lt=end_time,
-                end_time__gt=start_time
+            overlapping_bookings = Booking.objects.live().filter(room=room).overlapping(
+                combine_datetime(start_date, start_time),
+                combine_datetime(end_date, end_time)
             )
             
             # Exclude current instance if updating
             if self.instance:
                 overlapping_bookings = overlapping_bookings.exclude(pk=self.instance.pk)
             
-            if overlapping_bookings.exists():
+            with use_primary():
+                conflict = overlapping_bookings.exists()
+            if conflict:
                 raise serializers.ValidationError({
                     'non_field_errors': 'This time slot conflicts with an existing booking.'
                 })
@@ -189,23 +189,21 @@ class BookingCreateUpdateSerializer(serializers.ModelSerializer):
                 'expected_attendees': f'Exceeds room capacity ({room.capacity}).'
             })
         
-        # Check overlapping bookings
+        # Check overlapping bookings, suggesting free alternatives on conflict
         if room:
-            overlapping = Booking.objects.filter(
-                room=room,
-                approval_status__in=['approved', 'pending'],
-                start_date__lte=end_date,
-                end_date__gte=start_date,
-                start_time__lt=end_time,
-                end_time__gt=start_time
-            )
-            
-            if self.instance:
-                overlapping = overlapping.exclude(pk=self.instance.pk)
+            # Conflicts are decided on the primary, never a lagging replica
+            with use_primary():
+                intervals = BookingIntervals(
+                    room,
+                    combine_datetime(start_date, start_time),
+                    combine_datetime(end_date, end_time),
+                    exclude_pk=self.instance.pk if self.instance else None
+                )
             
-            if overlapping.exists():
+            if intervals.has_conflict:
                 raise serializers.ValidationError({
-                    'non_field_errors': 'Time slot is already booked.'
+                    'non_field_errors': 'Time slot is already booked.',
+                    'alternatives': intervals.alternatives(expected_attendees),
                 })
         
         return attrs
@@ -240,63 +238,6 @@ class BookingApprovalSerializer(serializers.Serializer):
         return attrs
 
 
-class ProcurementOrderSerializer(serializers.ModelSerializer):
-    """
-    Serializer for procurement orders
-    """
-    booking_details = BookingListSerializer(source='booking', read_only=True)
-    created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
-    status_display = serializers.CharField(source='get_status_display', read_only=True)
-    
-    class Meta:
-        model = ProcurementOrder
-        fields = [
-            'id', 'booking', 'booking_details', 'order_type', 'items_description',
-            'estimated_cost', 'priority', 'status', 'status_display',
-            'notes', 'created_by', 'created_by_name', 'created_at', 'updated_at'
-        ]
-        read_only_fields = ['id', 'created_by', 'created_at', 'updated_at']
-    
-    def validate_estimated_cost(self, value):
-        """Validate estimated cost"""
-        if value <= 0:
-            raise serializers.ValidationError('Estimated cost must be greater than zero.')
-        return value
-
-
-class ProcurementOrderCreateSerializer(serializers.ModelSerializer):
-    """
-    Serializer for creating procurement orders
-    """
-    class Meta:
-        model = ProcurementOrder
-        fields = [
-            'booking', 'order_type', 'items_description',
-            'estimated_cost', 'priority', 'notes'
-        ]
-    
-    def validate_booking(self, value):
-        """Validate booking"""
-        request = self.context.get('request')
-        
-        # Check if booking exists and is approved
-        if value.approval_status != 'approved':
-            raise serializers.ValidationError('Can only create orders for approved bookings.')
-        
-        # Check if user has permission to create orders for this booking
-        if (request.user != value.user and 
-            request.user.role not in ['super_admin', 'room_admin', 'procurement_officer']):
-            raise serializers.ValidationError('You can only create orders for your own bookings.')
-        
-        return value
-    
-    def create(self, validated_data):
-        """Create order with current user"""
-        request = self.context.get('request')
-        validated_data['created_by'] = request.user
-        return super().create(validated_data)
-
-
 class BookingStatsSerializer(serializers.Serializer):
     """
     Serializer for booking statistics
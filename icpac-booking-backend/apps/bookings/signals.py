@@ -0,0 +1,9 @@
+"""
+Booking signals for ICPAC Booking System
+"""
+from django.dispatch import Signal
+
+# Sent after bulk status changes that bypass Booking.save(), with the
+# ``booking_ids`` and ``room_ids`` affected and the new ``status``.
+# apps.rooms.signals drops the cached room status and utilization.
+bookings_status_changed = Signal()
@@ -0,0 +1,98 @@
+"""
+Celery tasks for ICPAC Booking System bookings
+"""
+from datetime import timedelta
+
+from celery import shared_task
+from django.contrib.auth import get_user_model
+from django.db.models import Count
+from django.utils import timezone
+
+from apps.notifications.outbox import queue_templated_email
+from apps.rooms.models import Room
+from apps.rooms.stats import room_utilization, utilization_rate
+from .archive import archive_bookings
+from .expiry import expire_stale_bookings as expire
+from .models import Booking
+from .partitioning import ensure_future_partitions
+from .reminders import send_meeting_reminders as remind
+
+User = get_user_model()
+
+
+@shared_task(ignore_result=True)
+def expire_stale_bookings():
+    """Move pending bookings whose start time has passed to expired"""
+    expire()
+
+
+@shared_task(ignore_result=True)
+def send_meeting_reminders():
+    """Queue reminders for approved meetings about to start"""
+    remind()
+
+
+@shared_task(ignore_result=True)
+def archive_old_bookings():
+    """Move bookings that ended before the archive horizon to the archive tables"""
+    archive_bookings()
+
+
+@shared_task(ignore_result=True)
+def create_booking_partitions():
+    """Create the monthly bookings partitions coming up on PostgreSQL"""
+    ensure_future_partitions()
+
+
+def build_usage_report(start_date, end_date):
+    """Summarise bookings starting between two dates for the usage report"""
+    status_counts = dict(
+        Booking.objects.starting_between(start_date, end_date)
+        .values_list('approval_status')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    usage = room_utilization(start_date, end_date)
+    rooms = Room.objects.filter(id__in=usage).in_bulk()
+    room_rows = sorted(
+        (
+            {
+                'name': rooms[room_id].name,
+                'total_bookings': room_usage['total_bookings'],
+                'booked_hours': round(room_usage['booked_hours'], 1),
+                'utilization_rate': round(
+                    utilization_rate(room_usage['booked_hours'], start_date, end_date), 1
+                ),
+            }
+            for room_id, room_usage in usage.items() if room_id in rooms
+        ),
+        key=lambda row: row['booked_hours'],
+        reverse=True
+    )
+    return {
+        'start_date': start_date,
+        'end_date': end_date,
+        'total_bookings': sum(status_counts.values()),
+        'status_counts': {
+            label: status_counts.get(value, 0) for value, label in Booking.APPROVAL_STATUS_CHOICES
+        },
+        'rooms': room_rows,
+    }
+
+
+@shared_task(ignore_result=True)
+def send_weekly_usage_report():
+    """Email last week's booking and room usage summary to super admins"""
+    end_date = timezone.now().date() - timedelta(days=1)
+    start_date = end_date - timedelta(days=6)
+    report = build_usage_report(start_date, end_date)
+
+    recipients = list(
+        User.objects.filter(role='super_admin', is_active=True)
+        .exclude(email='')
+        .values_list('email', flat=True)
+    )
+    queue_templated_email(
+        'weekly_usage_report', recipients, {'report': report},
+        dedupe_key=f'weekly_usage_report:{start_date.isoformat()}'
+    )
@@ -1,3 +1,656 @@
-from django.test import TestCase
+from datetime import date, time, timedelta
+from io import StringIO
+from unittest import mock, skipIf, skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from django.utils import timezone
+
+from apps.authentication.scope import AccessScope
+from apps.notifications.models import EmailOutbox
+from icpac_booking.celery import app as celery_app
+from apps.rooms.models import Room
+from apps.procurement.models import ArchivedProcurementOrder, ProcurementAttachment, ProcurementOrder
+from apps.procurement.scoping import scope_procurement_orders
+from .archive import archive_bookings
+from .models import ArchivedBooking, Booking, BookingNote, BookingOccurrence, combine_datetime
+from .serializers import BookingCreateUpdateSerializer
+from .scoping import scope_bookings
+from .expiry import expire_stale_bookings
+from .partitioning import add_months, ensure_future_partitions, is_partitioned, partition_name
+from .reminders import send_meeting_reminders
+from .signals import bookings_status_changed
+from .tasks import send_weekly_usage_report
+
+User = get_user_model()
+
+
+class BookingTestMixin:
+    """Shared fixtures for booking tests"""
+
+    def create_user(self, name, role='user'):
+        return User.objects.create_user(
+            username=name, email=f'{name}@icpac.net', password='pass12345',
+            first_name=name.title(), role=role
+        )
+
+    def create_room(self, name, capacity=20):
+        return Room.objects.create(name=name, capacity=capacity, category='meeting_room')
+
+    def create_booking(self, room, user, days=1, start=9, end=10, **kwargs):
+        day = timezone.now().date() + timedelta(days=days)
+        return Booking.objects.create(
+            room=room, user=user, purpose='Meeting',
+            start_date=kwargs.pop('start_date', day), end_date=kwargs.pop('end_date', day),
+            start_time=time(start), end_time=time(end), **kwargs
+        )
+
+
+class ScopedQuerysetTests(BookingTestMixin, TestCase):
+    def setUp(self):
+        self.managed = self.create_room('Boardroom')
+        self.other = self.create_room('Library')
+        self.admin = self.create_user('admin', role='room_admin')
+        self.user = self.create_user('user')
+
+        self.in_managed = self.create_booking(self.managed, self.user)
+        self.own_in_managed = self.create_booking(self.managed, self.admin, start=11, end=12)
+        self.own_elsewhere = self.create_booking(self.other, self.admin)
+        self.hidden = self.create_booking(self.other, self.user, start=11, end=12)
+
+        for booking in (self.in_managed, self.own_in_managed, self.own_elsewhere, self.hidden):
+            ProcurementOrder.objects.create(
+                booking=booking, created_by=booking.user,
+                items_description='Tea', estimated_cost=10
+            )
+
+    def test_room_admin_sees_managed_and_own_bookings(self):
+        scope = AccessScope(self.admin.pk, 'room_admin', [self.managed.id])
+        bookings = scope_bookings(Booking.objects.all(), scope)
+        self.assertCountEqual(
+            bookings, [self.in_managed, self.own_in_managed, self.own_elsewhere]
+        )
+
+    def test_union_scope_returns_each_order_once(self):
+        scope = AccessScope(self.admin.pk, 'room_admin', [self.managed.id])
+        orders = scope_procurement_orders(ProcurementOrder.objects.order_by('id'), scope)
+        self.assertEqual(
+            [order.booking_id for order in orders],
+            [self.in_managed.id, self.own_in_managed.id, self.own_elsewhere.id]
+        )
+        self.assertEqual(orders.count(), 3)
+        self.assertEqual(orders.filter(booking__room=self.other).count(), 1)
+
+    def test_union_scope_without_managed_rooms(self):
+        scope = AccessScope(self.admin.pk, 'room_admin', [])
+        orders = scope_procurement_orders(ProcurementOrder.objects.all(), scope)
+        self.assertCountEqual(
+            [order.booking_id for order in orders],
+            [self.own_in_managed.id, self.own_elsewhere.id]
+        )
+
+    def test_regular_user_sees_orders_for_own_bookings(self):
+        ProcurementOrder.objects.create(
+            booking=self.hidden, created_by=self.admin,
+            items_description='Chairs', estimated_cost=10
+        )
+        scope = AccessScope(self.user.pk, 'user')
+        orders = scope_procurement_orders(ProcurementOrder.objects.all(), scope)
+        self.assertEqual(orders.count(), 3)
+        self.assertEqual(orders.filter(created_by=self.admin).count(), 1)
+
+    def test_list_endpoints_apply_scope(self):
+        self.admin.managed_rooms.add(self.managed)
+        client = APIClient()
+        client.force_authenticate(self.admin)
+
+        response = client.get('/api/bookings/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 3)
+
+        response = client.get('/api/bookings/procurement-orders/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 3)
+
+
+class BookingTaskTests(BookingTestMixin, TestCase):
+    def test_tasks_are_routed_by_latency_class(self):
+        router = celery_app.amqp.router
+        queues = {
+            name: router.route({}, name)['queue'].name
+            for name in (
+                'apps.notifications.tasks.deliver_email_outbox',
+                'apps.bookings.tasks.send_weekly_usage_report',
+                'apps.rooms.tasks.rollup_room_utilization',
+            )
+        }
+        self.assertEqual(queues, {
+            'apps.notifications.tasks.deliver_email_outbox': 'realtime',
+            'apps.bookings.tasks.send_weekly_usage_report': 'bulk',
+            'apps.rooms.tasks.rollup_room_utilization': 'bulk',
+        })
+
+    @override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+    def test_weekly_usage_report_runs_eagerly_through_outbox(self):
+        self.create_user('chief', role='super_admin')
+        room = self.create_room('Boardroom')
+        booking = self.create_booking(room, self.create_user('member'), approval_status='approved')
+        shift = timedelta(days=4)
+        Booking.objects.filter(pk=booking.pk).update(
+            start_date=F('start_date') - shift, end_date=F('end_date') - shift,
+            start_at=F('start_at') - shift, end_at=F('end_at') - shift
+        )
+        booking.refresh_from_db()
+        booking.sync_occurrences()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            send_weekly_usage_report.delay()
+            send_weekly_usage_report.delay()
+
+        self.assertEqual(EmailOutbox.objects.filter(kind='weekly_usage_report', status='sent').count(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['chief@icpac.net'])
+        self.assertIn('Boardroom: 1 booking, 1.0 h', mail.outbox[0].body)
+
+
+class BookingExpiryTests(BookingTestMixin, TestCase):
+    def setUp(self):
+        self.room = self.create_room('Boardroom')
+        self.user = self.create_user('member')
+        self.now = timezone.now().replace(hour=12, minute=0, second=0, microsecond=0)
+
+    def create_started_booking(self, days_ago, start, **kwargs):
+        booking = self.create_booking(self.room, self.user, days=10 + days_ago, start=start, end=start + 1, **kwargs)
+        day = self.now.date() - timedelta(days=days_ago)
+        Booking.objects.filter(pk=booking.pk).update(
+            start_date=day, end_date=day,
+            start_at=combine_datetime(day, time(start)), end_at=combine_datetime(day, time(start + 1))
+        )
+        return booking
+
+    def test_sweep_expires_started_pending_bookings_in_batches(self):
+        stale = [self.create_started_booking(days_ago, 9) for days_ago in (0, 1, 2, 3, 4)]
+        upcoming = self.create_started_booking(0, 14)
+        approved = self.create_started_booking(1, 15, approval_status='approved')
+
+        events = []
+        def receiver(sender, **kwargs):
+            events.append(kwargs)
+        bookings_status_changed.connect(receiver)
+        self.addCleanup(bookings_status_changed.disconnect, receiver)
+
+        self.assertEqual(expire_stale_bookings(now=self.now, batch_size=2), 5)
+        self.assertEqual(
+            set(Booking.objects.filter(approval_status='expired').values_list('id', flat=True)),
+            {booking.id for booking in stale}
+        )
+        upcoming.refresh_from_db()
+        approved.refresh_from_db()
+        self.assertEqual((upcoming.approval_status, approved.approval_status), ('pending', 'approved'))
+
+        self.assertEqual(
+            set(BookingOccurrence.objects.filter(approval_status='expired').values_list('booking_id', flat=True)),
+            {booking.id for booking in stale}
+        )
+        self.assertEqual([len(event['booking_ids']) for event in events], [2, 2, 1])
+        self.assertEqual(events[0]['room_ids'], [self.room.id])
+        self.assertEqual(expire_stale_bookings(now=self.now), 0)
+
+    def test_expired_booking_frees_its_slot(self):
+        self.create_started_booking(0, 11)
+        expire_stale_bookings(now=self.now)
+        self.assertFalse(self.room.get_bookings_for_date(self.now.date()).exists())
+
+
+class MeetingReminderTests(BookingTestMixin, TestCase):
+    def setUp(self):
+        self.room = self.create_room('Boardroom')
+        self.user = self.create_user('member')
+        self.soon = self.create_booking(self.room, self.user, start=9, end=10, approval_status='approved')
+        self.later = self.create_booking(self.room, self.user, start=11, end=12, approval_status='approved')
+        self.pending = self.create_booking(self.room, self.user, start=13, end=14)
+        # 08:45 on the day of the bookings
+        self.now = self.soon.start_at - timedelta(minutes=15)
+
+    def test_reminders_are_queued_once(self):
+        # The due bookings, the outbox dedupe lookup, the insert and the marker, in a savepoint
+        with self.assertNumQueries(6):
+            self.assertEqual(send_meeting_reminders(now=self.now, lead_minutes=30), 1)
+        self.assertEqual(send_meeting_reminders(now=self.now, lead_minutes=30), 0)
+
+        message = EmailOutbox.objects.get(kind='meeting_reminder')
+        self.assertEqual(message.to, ['member@icpac.net'])
+        self.assertEqual(message.subject, 'Reminder: Meeting starts at 09:00')
+        self.soon.refresh_from_db()
+        self.assertEqual(self.soon.reminder_sent_at, self.now)
+
+    def test_reminders_already_in_the_outbox_are_not_counted(self):
+        send_meeting_reminders(now=self.now, lead_minutes=30)
+        Booking.objects.filter(pk=self.soon.pk).update(reminder_sent_at=None)
+        self.assertEqual(send_meeting_reminders(now=self.now, lead_minutes=30), 0)
+        self.assertEqual(EmailOutbox.objects.filter(kind='meeting_reminder').count(), 1)
+
+    def test_batches_cover_all_due_bookings(self):
+        self.assertEqual(send_meeting_reminders(now=self.now, lead_minutes=24 * 60, batch_size=1), 2)
+        self.assertEqual(EmailOutbox.objects.filter(kind='meeting_reminder').count(), 2)
+
+    def test_rescheduling_clears_reminder(self):
+        send_meeting_reminders(now=self.now, lead_minutes=30)
+        self.soon.refresh_from_db()
+        self.soon.start_time = time(15)
+        self.soon.end_time = time(16)
+        self.soon.save()
+        self.assertIsNone(self.soon.reminder_sent_at)
+        self.assertEqual(
+            send_meeting_reminders(now=self.soon.start_at - timedelta(minutes=10), lead_minutes=30), 1
+        )
+
+
+class BookingRangeTests(BookingTestMixin, TestCase):
+    def setUp(self):
+        self.room = self.create_room('Boardroom')
+        self.user = self.create_user('member')
+        # 09:00 on day 1 to 17:00 on day 3
+        self.multi_day = self.create_booking(
+            self.room, self.user, days=1, start=9, end=17,
+            end_date=timezone.now().date() + timedelta(days=3), approval_status='approved'
+        )
+
+    def test_start_and_end_are_materialized(self):
+        self.assertEqual(self.multi_day.start_at, combine_datetime(self.multi_day.start_date, time(9)))
+        self.assertEqual(self.multi_day.end_at, combine_datetime(self.multi_day.end_date, time(17)))
+        self.assertEqual(self.multi_day.get_duration_hours(), 56)
+
+    def test_multi_day_booking_blocks_evenings_in_between(self):
+        # 18:00-20:00 on day 2 was accepted by the per-field time comparison
+        with self.assertRaises(ValidationError):
+            self.create_booking(self.room, self.user, days=2, start=18, end=20)
+        self.create_booking(self.room, self.user, days=3, start=17, end=19)
+
+    def test_multi_day_booking_is_in_progress_overnight(self):
+        night = combine_datetime(self.multi_day.start_date, time(23))
+        with mock.patch('django.utils.timezone.now', return_value=night):
+            self.assertTrue(self.multi_day.is_in_progress)
+            self.assertFalse(self.multi_day.is_upcoming)
+            self.assertFalse(self.multi_day.is_completed)
+        self.assertEqual(list(Booking.objects.in_progress(night)), [self.multi_day])
+
+    def test_bookings_for_date_include_spanning_bookings(self):
+        day_two = timezone.now().date() + timedelta(days=2)
+        self.assertEqual(list(self.room.get_bookings_for_date(day_two)), [self.multi_day])
+
+    def test_calendar_events_use_constant_queries(self):
+        for days in range(5, 10):
+            self.create_booking(self.room, self.create_user(f'user{days}'), days=days, approval_status='approved')
+        client = APIClient()
+        client.force_authenticate(self.create_user('chief', role='super_admin'))
+        with self.assertNumQueries(1):
+            response = client.get('/api/bookings/calendar/events/', {
+                'start': str(timezone.now().date() + timedelta(days=2)),
+                'end': str(timezone.now().date() + timedelta(days=6)),
+            })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_events'], 3)
+
+    def test_async_views_authenticate_like_drf_views(self):
+        client = APIClient()
+        url = '/api/bookings/calendar/events/'
+        self.assertEqual(client.get(url).status_code, 401)
+        client.force_authenticate(self.user)
+        self.assertEqual(client.post(url).status_code, 405)
+        self.assertEqual(client.get(url, {'start': 'soon'}).status_code, 400)
+        self.assertEqual(client.get('/api/rooms/stats/overview/').status_code, 403)
+
+
+class BookingOccurrenceTests(BookingTestMixin, TestCase):
+    def setUp(self):
+        self.room = self.create_room('Boardroom')
+        self.user = self.create_user('member')
+        self.day_one = timezone.now().date() + timedelta(days=1)
+        # 09:00 on day 1 to 17:00 on day 3
+        self.booking = self.create_booking(
+            self.room, self.user, days=1, start=9, end=17,
+            end_date=self.day_one + timedelta(days=2)
+        )
+
+    def test_occurrences_slice_the_booking_per_day(self):
+        slices = [
+            (occurrence.date, occurrence.duration_hours)
+            for occurrence in self.booking.occurrences.all()
+        ]
+        self.assertEqual(slices, [
+            (self.day_one, 15),
+            (self.day_one + timedelta(days=1), 24),
+            (self.day_one + timedelta(days=2), 17),
+        ])
+
+    def test_occurrences_follow_changes(self):
+        self.booking.end_date = self.day_one
+        self.booking.save()
+        self.assertEqual(list(self.booking.occurrences.values_list('date', flat=True)), [self.day_one])
+
+        self.booking.reject(self.create_user('chief', role='super_admin'))
+        self.assertEqual(set(self.booking.occurrences.values_list('approval_status', flat=True)), {'rejected'})
+
+        with self.assertNumQueries(1):
+            self.booking.sync_occurrences()
+
+    def test_availability_reads_one_day(self):
+        self.create_booking(self.room, self.user, days=4, start=10, end=12)
+        availability = self.room.get_availability_for_date(self.day_one + timedelta(days=2))
+        self.assertTrue(availability['is_available'])
+        self.assertEqual([slot['booking_id'] for slot in availability['booked_slots']], [self.booking.id])
+        self.assertEqual(
+            availability['free_slots'][0]['start'],
+            combine_datetime(self.day_one + timedelta(days=2), time(17))
+        )
+
+        self.assertFalse(self.room.get_availability_for_date(self.day_one + timedelta(days=1))['is_available'])
+
+    def test_availability_endpoint_checks_slot(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        day = str(self.day_one + timedelta(days=2))
+        busy = client.post(f'/api/rooms/{self.room.id}/availability/', {
+            'date': day, 'start_time': '16:00', 'end_time': '18:00'
+        })
+        free = client.post(f'/api/rooms/{self.room.id}/availability/', {
+            'date': day, 'start_time': '17:00', 'end_time': '18:00'
+        })
+        self.assertEqual(busy.status_code, 200)
+        self.assertFalse(busy.data['availability']['is_available'])
+        self.assertTrue(free.data['availability']['is_available'])
+
+    def test_availability_of_inactive_room_is_not_computed(self):
+        Room.objects.filter(pk=self.room.pk).update(is_active=False)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with mock.patch.object(Room, 'get_availability_for_date') as get_availability:
+            response = client.post(f'/api/rooms/{self.room.id}/availability/', {
+                'date': str(self.day_one), 'start_time': '09:00', 'end_time': '10:00'
+            })
+        self.assertEqual(response.status_code, 404)
+        get_availability.assert_not_called()
+
+
+class BookingAlternativeTests(BookingTestMixin, TestCase):
+    def setUp(self):
+        self.user = self.create_user('member')
+        self.room = Room.objects.create(
+            name='Boardroom', capacity=20, category='boardroom', amenities=['Projector']
+        )
+        self.day = timezone.now().date() + timedelta(days=2)
+        self.create_booking(self.room, self.user, days=2, start=9, end=10, approval_status='approved')
+        self.create_booking(self.room, self.user, days=2, start=10, end=11)
+
+        self.library = Room.objects.create(
+            name='Library', capacity=20, category='meeting_room', amenities=['projector', 'Whiteboard']
+        )
+        self.hall = Room.objects.create(
+            name='Hall', capacity=100, category='conference_room', amenities=['projector']
+        )
+        Room.objects.create(name='Annex', capacity=20, category='meeting_room', amenities=[])
+        Room.objects.create(name='Huddle', capacity=5, category='meeting_room', amenities=['projector'])
+        taken = Room.objects.create(name='Taken', capacity=20, category='meeting_room', amenities=['projector'])
+        self.create_booking(taken, self.user, days=2, start=10, end=12)
+
+    def request_data(self, start='10:00', end='11:00'):
+        return {
+            'room': self.room.id, 'start_date': str(self.day), 'end_date': str(self.day),
+            'start_time': start, 'end_time': end, 'purpose': 'Planning', 'expected_attendees': 10,
+        }
+
+    def test_conflict_suggests_slots_and_rooms(self):
+        serializer = BookingCreateUpdateSerializer(data=self.request_data())
+        # Room lookup, the interval query and the candidate rooms
+        with self.assertNumQueries(3):
+            self.assertFalse(serializer.is_valid())
+
+        alternatives = serializer.errors['alternatives']
+        self.assertEqual(
+            [(slot['start_time'], slot['end_time']) for slot in alternatives['slots']],
+            [('11:00', '12:00'), ('11:30', '12:30'), ('08:00', '09:00')]
+        )
+        self.assertEqual([room['name'] for room in alternatives['rooms']], ['Library', 'Hall'])
+
+    def test_free_slot_needs_one_interval_query(self):
+        serializer = BookingCreateUpdateSerializer(data=self.request_data('13:00', '14:00'))
+        with self.assertNumQueries(2):
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+
+    def test_slots_stay_within_room_hours(self):
+        self.create_booking(self.room, self.user, days=2, start=16, end=18)
+        serializer = BookingCreateUpdateSerializer(data=self.request_data('17:00', '18:00'))
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(
+            [(slot['start_time'], slot['end_time']) for slot in serializer.errors['alternatives']['slots']],
+            [('15:00', '16:00'), ('14:30', '15:30'), ('14:00', '15:00')]
+        )
+
+    def test_slots_do_not_cross_midnight(self):
+        Room.objects.filter(pk=self.room.pk).update(opening_time=time(0), closing_time=time(23, 59))
+        self.create_booking(self.room, self.user, days=2, start=21, end=23)
+        serializer = BookingCreateUpdateSerializer(data=self.request_data('22:00', '23:00'))
+        self.assertFalse(serializer.is_valid())
+        slots = serializer.errors['alternatives']['slots']
+        self.assertEqual(
+            [(slot['start_time'], slot['end_time']) for slot in slots],
+            [('20:00', '21:00'), ('19:30', '20:30'), ('19:00', '20:00')]
+        )
+        self.assertTrue(all(slot['end_date'] == str(self.day) for slot in slots))
+
+    def test_conflict_response_over_api(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post('/api/bookings/', self.request_data(), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['non_field_errors'], ['Time slot is already booked.'])
+        self.assertEqual(response.data['alternatives']['slots'][0]['start_date'], str(self.day))
+
+
+class BookingExportTests(BookingTestMixin, TestCase):
+    def setUp(self):
+        self.room = self.create_room('Boardroom')
+        self.user = self.create_user('member')
+        self.other = self.create_user('other')
+        for days in range(1, 6):
+            self.create_booking(self.room, self.user, days=days, approval_status='approved')
+        self.create_booking(self.room, self.user, days=6)
+        self.create_booking(self.room, self.other, days=7)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def export(self, **params):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/bookings/export.csv', params)
+            content = b''.join(response.streaming_content).decode()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        return content.splitlines()
+
+    def test_export_streams_scoped_rows(self):
+        lines = self.export()
+        self.assertTrue(lines[0].startswith('ID,Room,First name'))
+        self.assertEqual(len(lines), 7)
+        self.assertTrue(all(',Member,' in line for line in lines[1:]))
+
+    def test_export_applies_list_filters(self):
+        self.assertEqual(len(self.export(status='pending')), 2)
+
+    def test_unknown_format_is_rejected(self):
+        self.assertEqual(self.client.get('/api/bookings/export.pdf').status_code, 400)
+
+
+class BookingArchiveTests(BookingTestMixin, TestCase):
+    def setUp(self):
+        self.room = self.create_room('Boardroom')
+        self.user = self.create_user('member')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_past_booking(self, days_ago, **kwargs):
+        booking = self.create_booking(self.room, self.user, approval_status='approved', **kwargs)
+        Booking.objects.filter(pk=booking.pk).update(
+            start_date=F('start_date') - timedelta(days=days_ago + 1),
+            end_date=F('end_date') - timedelta(days=days_ago + 1),
+            start_at=F('start_at') - timedelta(days=days_ago + 1),
+            end_at=F('end_at') - timedelta(days=days_ago + 1),
+        )
+        return booking
+
+    def test_old_bookings_move_in_batches_with_notes_and_orders(self):
+        old = [self.create_past_booking(400 + days) for days in range(3)]
+        BookingNote.objects.create(booking=old[0], user=self.user, note='Projector was late')
+        ProcurementOrder.objects.create(
+            booking=old[1], created_by=self.user, items_description='Tea', estimated_cost=10
+        )
+        recent = self.create_past_booking(30)
+        pending = self.create_past_booking(500)
+        Booking.objects.filter(pk=pending.pk).update(approval_status='pending')
+
+        self.assertEqual(archive_bookings(batch_size=2), 3)
+        self.assertEqual(
+            set(Booking.objects.values_list('id', flat=True)), {recent.id, pending.id}
+        )
+        self.assertEqual(
+            set(ArchivedBooking.objects.values_list('id', flat=True)), {booking.id for booking in old}
+        )
+        self.assertFalse(BookingOccurrence.objects.filter(booking_id=old[0].id).exists())
+        self.assertEqual(ArchivedBooking.objects.get(pk=old[0].id).notes.get().note, 'Projector was late')
+        self.assertEqual(ArchivedProcurementOrder.objects.get().booking_id, old[1].id)
+        self.assertEqual(archive_bookings(), 0)
+
+    def test_bookings_with_attachments_stay_live(self):
+        booking = self.create_past_booking(400)
+        order = ProcurementOrder.objects.create(
+            booking=booking, created_by=self.user, items_description='Tea', estimated_cost=10
+        )
+        ProcurementAttachment.objects.create(
+            order=order, filename='quote.pdf', size=1, sha256='0' * 64, uploaded_by=self.user
+        )
+        self.assertEqual(archive_bookings(), 0)
+
+    def test_list_reads_archive_only_when_range_reaches_it(self):
+        for days_ago in range(400, 425):
+            self.create_past_booking(days_ago)
+        self.create_booking(self.room, self.user)
+        archive_bookings()
+
+        response = self.client.get('/api/bookings/')
+        self.assertEqual(response.data['count'], 1)
+
+        date_from = (timezone.now() - timedelta(days=500)).date().isoformat()
+        # Two counts, the union of keys, then rows from each table
+        with self.assertNumQueries(5):
+            response = self.client.get('/api/bookings/', {'date_from': date_from})
+        self.assertEqual(response.data['count'], 26)
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertEqual(response.data['results'][0]['room_name'], 'Boardroom')
+        response = self.client.get('/api/bookings/', {'date_from': date_from, 'page': 2})
+        self.assertEqual(len(response.data['results']), 6)
+
+        response = self.client.get('/api/bookings/export.csv', {'date_from': date_from})
+        self.assertEqual(len(b''.join(response.streaming_content).decode().splitlines()), 27)
+
+
+class BookingPartitioningTests(TestCase):
+    def test_partition_helpers(self):
+        self.assertEqual(add_months((2026, 11), 3), (2027, 2))
+        self.assertEqual(partition_name((2027, 2)), 'bookings_p2027_02')
+
+    @skipIf(connection.vendor == 'postgresql', 'partitions are created on PostgreSQL')
+    def test_partitioning_is_a_no_op_elsewhere(self):
+        self.assertFalse(is_partitioned())
+        self.assertEqual(ensure_future_partitions(), [])
+
+    @skipUnless(connection.vendor == 'postgresql', 'bookings are only partitioned on PostgreSQL')
+    def test_migration_partitions_bookings_and_keeps_outgoing_foreign_keys(self):
+        self.assertTrue(is_partitioned())
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT confrelid::regclass::text, a.attname FROM pg_constraint "
+                "JOIN pg_attribute a ON a.attrelid = conrelid AND a.attnum = ANY(conkey) "
+                "WHERE conrelid = 'bookings'::regclass AND contype = 'f'"
+            )
+            self.assertCountEqual(
+                cursor.fetchall(),
+                [('rooms', 'room_id'), ('users', 'user_id'), ('users', 'approved_by_id')]
+            )
+            cursor.execute(
+                "SELECT 1 FROM pg_constraint WHERE confrelid = 'bookings'::regclass AND contype = 'f'"
+            )
+            self.assertEqual(cursor.fetchall(), [])
+
+        room = Room.objects.create(name='Boardroom', capacity=20, category='boardroom')
+        user = User.objects.create_user(username='member', email='member@icpac.net', password='pass12345')
+        day = timezone.localdate() + timedelta(days=1)
+        booking = Booking.objects.create(
+            room=room, user=user, purpose='Meeting', start_date=day, end_date=day,
+            start_time=time(9), end_time=time(10)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT tableoid::regclass::text FROM bookings WHERE id = %s', [booking.pk])
+            self.assertEqual(cursor.fetchone()[0], partition_name((day.year, day.month)))
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Booking.objects.filter(pk=booking.pk).update(room_id=room.pk + 1000)
+            connection.check_constraints()
+
+        BookingNote.objects.create(booking=booking, user=user, note='Projector needed')
+        booking.delete()
+        self.assertFalse(BookingNote.objects.exists())
+
+
+class GenerateDataTests(TestCase):
+    def generate(self, *args, **options):
+        call_command(
+            'generate_data', *args, rooms=4, users=20, room_admins=2, bookings=150, days=30,
+            origin=date(2026, 3, 2), batch_size=40, stdout=StringIO(), **options
+        )
+        return list(Booking.objects.order_by('id').values_list(
+            'room__name', 'user__email', 'start_at', 'end_at', 'approval_status', 'created_at'
+        ))
+
+    def test_generated_data_is_deterministic_and_conflict_free(self):
+        bookings = self.generate()
+        self.assertEqual(len(bookings), 150)
+        self.assertEqual(BookingOccurrence.objects.count(), 150)
+        self.assertEqual(User.objects.filter(role='room_admin').count(), 2)
+
+        by_room = {}
+        for room, _, start_at, end_at, _, _ in bookings:
+            by_room.setdefault(room, []).append((start_at, end_at))
+        for slots in by_room.values():
+            slots.sort()
+            for (_, previous_end), (next_start, _) in zip(slots, slots[1:]):
+                self.assertLessEqual(previous_end, next_start)
+
+        self.assertEqual(self.generate(clear=True), bookings)
+
+    def test_generated_data_does_not_depend_on_the_clock(self):
+        def snapshot():
+            return (
+                self.generate(clear=True),
+                list(User.objects.order_by('username').values_list('username', 'role', 'date_joined')),
+                list(Room.objects.order_by('name').values_list('name', 'created_at')),
+                list(ProcurementOrder.objects.order_by('id').values_list('status', 'created_at')),
+            )
+
+        first = snapshot()
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(days=40)):
+            self.assertEqual(snapshot(), first)
+
+        self.generate('--now=2026-03-16T12:00', clear=True)
+        now = combine_datetime(date(2026, 3, 16), time(12))
+        past = set(Booking.objects.filter(end_at__lt=now).values_list('approval_status', flat=True))
+        future = set(Booking.objects.filter(end_at__gte=now).values_list('approval_status', flat=True))
+        self.assertIn('expired', past)
+        self.assertNotIn('pending', past)
+        self.assertIn('pending', future)
+        self.assertNotIn('expired', future)
@@ -2,6 +2,7 @@
 Booking URLs for ICPAC Booking System
 """
 from django.urls import path
+from apps.procurement import views as procurement_views
 from . import views
 
 app_name = 'bookings'
@@ -10,6 +11,7 @@ urlpatterns = [
     # Booking management endpoints
     path('', views.BookingListView.as_view(), name='booking_list'),
     path('<int:pk>/', views.BookingDetailView.as_view(), name='booking_detail'),
+    path('export.<str:extension>', views.export_bookings, name='booking_export'),
     
     # Booking approval
     path('<int:booking_id>/approve-reject/', views.approve_reject_booking, name='approve_reject_booking'),
@@ -22,7 +24,8 @@ urlpatterns = [
     path('dashboard/stats/', views.booking_dashboard_stats, name='booking_dashboard_stats'),
     path('calendar/events/', views.calendar_events, name='calendar_events'),
     
-    # Procurement order endpoints
-    path('procurement-orders/', views.ProcurementOrderListView.as_view(), name='procurement_order_list'),
-    path('procurement-orders/<int:pk>/', views.ProcurementOrderDetailView.as_view(), name='procurement_order_detail'),
+    # Procurement order endpoints, also served under /api/procurement/orders/
+    path('procurement-orders/', procurement_views.ProcurementOrderListView.as_view(), name='procurement_order_list'),
+    path('procurement-orders/<int:pk>/', procurement_views.ProcurementOrderDetailView.as_view(), name='procurement_order_detail'),
+    path('procurement-orders/export.<str:extension>', procurement_views.export_procurement_orders, name='procurement_order_export'),
 ]
\ No newline at end of file
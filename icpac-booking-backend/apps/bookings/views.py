@@ -1,25 +1,79 @@
 """
 Booking views for ICPAC Booking System
 """
+import asyncio
+
 from rest_framework import generics, status, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from django.utils import timezone
-from django.db.models import Q, Count, Avg
-from datetime import datetime, timedelta
-from .models import Booking, ProcurementOrder
+from django.db import transaction
+from django.db.models import Count
+from datetime import datetime, time, timedelta
+from asgiref.sync import sync_to_async
+from apps.authentication.authentication import TokenUserAuthentication
+from apps.notifications.emails import queue_booking_email
+from icpac_booking.async_views import alist, async_api_view
+from icpac_booking.exports import EXPORT_CHUNK_SIZE, ExportRenderer, stream_export
+from .archive import BookingHistory, reaches_archive
+from .models import ArchivedBooking, Booking, combine_datetime
+from .scoping import scope_bookings
 from .serializers import (
     BookingSerializer,
     BookingListSerializer,
     BookingCreateUpdateSerializer,
     BookingApprovalSerializer,
-    ProcurementOrderSerializer,
-    ProcurementOrderCreateSerializer,
     BookingStatsSerializer,
     DashboardStatsSerializer
 )
 
 
+def filter_bookings(queryset, params):
+    """Apply the booking list filters in ``params`` to ``queryset``"""
+    status_filter = params.get('status')
+    if status_filter:
+        queryset = queryset.filter(approval_status=status_filter)
+    
+    room_id = params.get('room')
+    if room_id:
+        try:
+            queryset = queryset.filter(room_id=int(room_id))
+        except ValueError:
+            pass
+    
+    date_from = params.get('date_from')
+    if date_from:
+        try:
+            date_from = datetime.strptime(date_from, '%Y-%m-%d').date()
+            queryset = queryset.filter(start_at__gte=combine_datetime(date_from, time.min))
+        except ValueError:
+            pass
+    
+    date_to = params.get('date_to')
+    if date_to:
+        try:
+            date_to = datetime.strptime(date_to, '%Y-%m-%d').date()
+            queryset = queryset.filter(
+                end_at__lt=combine_datetime(date_to, time.min) + timedelta(days=1)
+            )
+        except ValueError:
+            pass
+    
+    return queryset
+
+
+def includes_archive(params):
+    """Whether the ``date_from`` filter reaches back into archived bookings"""
+    try:
+        date_from = datetime.strptime(params.get('date_from', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return False
+    return reaches_archive(combine_datetime(date_from, time.min))
+
+
 class BookingListView(generics.ListCreateAPIView):
     """
     List all bookings or create a new booking
@@ -33,51 +87,70 @@ class BookingListView(generics.ListCreateAPIView):
     
     def get_queryset(self):
         user = self.request.user
-        queryset = Booking.objects.all().order_by('-created_at')
-        
-        # Filter based on user role
-        if user.role == 'super_admin':
-            # Super admin can see all bookings
-            pass
-        elif user.role == 'room_admin':
-            # Room admin can see bookings for their managed rooms
-            managed_room_ids = user.managed_rooms.values_list('id', flat=True)
-            queryset = queryset.filter(
-                Q(room_id__in=managed_room_ids) | Q(user=user)
-            )
-        else:
-            # Regular users can only see their own bookings
-            queryset = queryset.filter(user=user)
-        
-        # Apply filters
-        status_filter = self.request.query_params.get('status')
-        if status_filter:
-            queryset = queryset.filter(approval_status=status_filter)
+        queryset = Booking.objects.select_related('room', 'user').order_by('-created_at')
         
-        room_id = self.request.query_params.get('room')
-        if room_id:
-            try:
-                queryset = queryset.filter(room_id=int(room_id))
-            except ValueError:
-                pass
-        
-        date_from = self.request.query_params.get('date_from')
-        if date_from:
-            try:
-                date_from = datetime.strptime(date_from, '%Y-%m-%d').date()
-                queryset = queryset.filter(start_date__gte=date_from)
-            except ValueError:
-                pass
-        
-        date_to = self.request.query_params.get('date_to')
-        if date_to:
-            try:
-                date_to = datetime.strptime(date_to, '%Y-%m-%d').date()
-                queryset = queryset.filter(end_date__lte=date_to)
-            except ValueError:
-                pass
+        # Super admin sees all bookings, room admin bookings for their managed
+        # rooms plus their own, regular users only their own bookings
+        queryset = scope_bookings(queryset, user.access_scope)
+        queryset = filter_bookings(queryset, self.request.query_params)
         
+        # Archived bookings are only read when the requested range reaches them
+        if includes_archive(self.request.query_params):
+            archived = filter_bookings(
+                scope_bookings(ArchivedBooking.objects.all(), user.access_scope),
+                self.request.query_params
+            )
+            return BookingHistory(queryset, archived)
         return queryset
+    
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            booking = serializer.save()
+            queue_booking_email(booking, 'booking_received')
+
+
+BOOKING_EXPORT_COLUMNS = [
+    ('id', 'ID'),
+    ('room__name', 'Room'),
+    ('user__first_name', 'First name'),
+    ('user__last_name', 'Last name'),
+    ('user__email', 'Email'),
+    ('purpose', 'Purpose'),
+    ('start_date', 'Start date'),
+    ('start_time', 'Start time'),
+    ('end_date', 'End date'),
+    ('end_time', 'End time'),
+    ('expected_attendees', 'Expected attendees'),
+    ('approval_status', 'Status'),
+    ('created_at', 'Created at'),
+]
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+@renderer_classes([JSONRenderer, ExportRenderer])
+def export_bookings(request, extension):
+    """
+    Download the bookings visible to the user as CSV or XLSX, with the
+    same filters as the booking list
+    """
+    queryset = filter_bookings(
+        scope_bookings(Booking.objects.order_by('-created_at'), request.user.access_scope),
+        request.query_params
+    )
+    fields, header = zip(*BOOKING_EXPORT_COLUMNS)
+    rows = queryset.values_list(*fields)
+    if includes_archive(request.query_params):
+        archived = filter_bookings(
+            scope_bookings(ArchivedBooking.objects.order_by(), request.user.access_scope),
+            request.query_params
+        )
+        rows = rows.order_by().union(archived.values_list(*fields), all=True).order_by('-created_at')
+    rows = rows.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    try:
+        return stream_export('bookings', header, rows, extension)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
 class BookingDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -93,24 +166,14 @@ class BookingDetailView(generics.RetrieveUpdateDestroyAPIView):
         return BookingSerializer
     
     def get_queryset(self):
-        user = self.request.user
-        
-        if user.role == 'super_admin':
-            return Booking.objects.all()
-        elif user.role == 'room_admin':
-            managed_room_ids = user.managed_rooms.values_list('id', flat=True)
-            return Booking.objects.filter(
-                Q(room_id__in=managed_room_ids) | Q(user=user)
-            )
-        else:
-            return Booking.objects.filter(user=user)
+        return scope_bookings(Booking.objects.all(), self.request.user.access_scope)
     
     def perform_update(self, serializer):
         booking = self.get_object()
         
         # Check if user can modify this booking
         if not booking.can_be_modified_by(self.request.user):
-            raise permissions.PermissionDenied('You cannot modify this booking.')
+            raise PermissionDenied('You cannot modify this booking.')
         
         # Reset approval status if booking is modified
         if booking.approval_status == 'approved':
@@ -126,7 +189,7 @@ class BookingDetailView(generics.RetrieveUpdateDestroyAPIView):
     def perform_destroy(self, instance):
         # Check if user can delete this booking
         if not instance.can_be_modified_by(self.request.user):
-            raise permissions.PermissionDenied('You cannot delete this booking.')
+            raise PermissionDenied('You cannot delete this booking.')
         
         # Soft delete - mark as cancelled
         instance.approval_status = 'cancelled'
@@ -149,7 +212,7 @@ def approve_reject_booking(request, booking_id):
     
     # Check permissions
     if not booking.can_approve_booking(request.user):
-        raise permissions.PermissionDenied('You do not have permission to approve/reject this booking.')
+        raise PermissionDenied('You do not have permission to approve/reject this booking.')
     
     serializer = BookingApprovalSerializer(data=request.data)
     if not serializer.is_valid():
@@ -158,12 +221,15 @@ def approve_reject_booking(request, booking_id):
     action = serializer.validated_data['action']
     rejection_reason = serializer.validated_data.get('rejection_reason', '')
     
-    if action == 'approve':
-        booking.approve(request.user)
-        message = f'Booking approved successfully.'
-    else:
-        booking.reject(request.user, rejection_reason)
-        message = f'Booking rejected successfully.'
+    with transaction.atomic():
+        if action == 'approve':
+            booking.approve(request.user)
+            queue_booking_email(booking, 'booking_approved')
+            message = f'Booking approved successfully.'
+        else:
+            booking.reject(request.user, rejection_reason)
+            queue_booking_email(booking, 'booking_rejected')
+            message = f'Booking rejected successfully.'
     
     return Response({
         'message': message,
@@ -182,11 +248,11 @@ def my_bookings(request):
     # Get upcoming bookings
     upcoming = Booking.objects.filter(
         user=user,
-        start_date__gte=timezone.now().date()
-    ).order_by('start_date', 'start_time')[:5]
+        end_at__gt=timezone.now()
+    ).select_related('room', 'user').order_by('start_at')[:5]
     
     # Get recent bookings
-    recent = Booking.objects.filter(user=user).order_by('-created_at')[:10]
+    recent = Booking.objects.filter(user=user).select_related('room', 'user').order_by('-created_at')[:10]
     
     # Get statistics
     total = Booking.objects.filter(user=user).count()
@@ -213,20 +279,20 @@ def pending_approvals(request):
     user = request.user
     
     if user.role not in ['super_admin', 'room_admin']:
-        raise permissions.PermissionDenied('Only admins can view pending approvals.')
+        raise PermissionDenied('Only admins can view pending approvals.')
     
     # Get pending bookings based on user role
     if user.role == 'super_admin':
         pending_bookings = Booking.objects.filter(approval_status='pending')
     else:
         # Room admin can only see bookings for their managed rooms
-        managed_room_ids = user.managed_rooms.values_list('id', flat=True)
+        managed_room_ids = user.access_scope.managed_room_ids
         pending_bookings = Booking.objects.filter(
             approval_status='pending',
             room_id__in=managed_room_ids
         )
     
-    pending_bookings = pending_bookings.order_by('created_at')
+    pending_bookings = pending_bookings.select_related('room', 'user').order_by('created_at')
     
     return Response({
         'pending_bookings': BookingSerializer(pending_bookings, many=True).data,
@@ -234,9 +300,8 @@ def pending_approvals(request):
     })
 
 
-@api_view(['GET'])
-@permission_classes([permissions.IsAuthenticated])
-def booking_dashboard_stats(request):
+@async_api_view(['GET'])
+async def booking_dashboard_stats(request):
     """
     Get booking dashboard statistics
     """
@@ -246,54 +311,46 @@ def booking_dashboard_stats(request):
     if user.role == 'super_admin':
         all_bookings = Booking.objects.all()
     elif user.role == 'room_admin':
-        managed_room_ids = user.managed_rooms.values_list('id', flat=True)
-        all_bookings = Booking.objects.filter(room_id__in=managed_room_ids)
+        scope = await sync_to_async(lambda: user.access_scope)()
+        all_bookings = Booking.objects.filter(room_id__in=scope.managed_room_ids)
     else:
         all_bookings = Booking.objects.filter(user=user)
     
     # Get date range (default: last 30 days)
     end_date = timezone.now().date()
     start_date = end_date - timedelta(days=30)
-    
-    recent_bookings = all_bookings.filter(
-        start_date__range=[start_date, end_date]
-    )
-    
-    # Calculate statistics
-    stats = {
-        'total_bookings': all_bookings.count(),
-        'recent_bookings_count': recent_bookings.count(),
-        'approved_bookings': all_bookings.filter(approval_status='approved').count(),
-        'pending_bookings': all_bookings.filter(approval_status='pending').count(),
-        'rejected_bookings': all_bookings.filter(approval_status='rejected').count(),
+    today = end_date
+    
+    recent_bookings = all_bookings.starting_between(start_date, end_date)
+    approved = all_bookings.filter(approval_status='approved')
+    recent_list = recent_bookings.select_related('room', 'user').order_by('-created_at')[:10]
+    
+    # The counts are independent, so they are issued together
+    queries = {
+        'total_bookings': all_bookings.acount(),
+        'recent_bookings_count': recent_bookings.acount(),
+        'approved_bookings': approved.acount(),
+        'pending_bookings': all_bookings.filter(approval_status='pending').acount(),
+        'rejected_bookings': all_bookings.filter(approval_status='rejected').acount(),
+        'recent_list': alist(recent_list),
     }
     
     # Add admin-specific stats
     if user.role in ['super_admin', 'room_admin']:
-        today = timezone.now().date()
-        
-        stats.update({
-            'todays_bookings': all_bookings.filter(
-                start_date=today,
-                approval_status='approved'
-            ).count(),
-            'this_week_bookings': all_bookings.filter(
-                start_date__range=[today, today + timedelta(days=7)],
-                approval_status='approved'
-            ).count(),
+        queries.update({
+            'todays_bookings': approved.starting_between(today, today).acount(),
+            'this_week_bookings': approved.starting_between(today, today + timedelta(days=7)).acount(),
+            # Most popular room
+            'popular_room': approved.values('room__name').annotate(
+                count=Count('id')
+            ).order_by('-count').afirst(),
         })
-        
-        # Most popular room
-        popular_room = all_bookings.filter(
-            approval_status='approved'
-        ).values('room__name').annotate(
-            count=Count('id')
-        ).order_by('-count').first()
-        
-        stats['most_popular_room'] = popular_room['room__name'] if popular_room else 'N/A'
     
-    # Recent bookings for timeline
-    recent_list = recent_bookings.order_by('-created_at')[:10]
+    stats = dict(zip(queries, await asyncio.gather(*queries.values())))
+    recent_list = stats.pop('recent_list')
+    if 'popular_room' in stats:
+        popular_room = stats.pop('popular_room')
+        stats['most_popular_room'] = popular_room['room__name'] if popular_room else 'N/A'
     
     return Response({
         'statistics': stats,
@@ -305,80 +362,30 @@ def booking_dashboard_stats(request):
     })
 
 
-# Procurement Order Views
-
-class ProcurementOrderListView(generics.ListCreateAPIView):
-    """
-    List all procurement orders or create a new one
-    """
-    permission_classes = [permissions.IsAuthenticated]
-    
-    def get_serializer_class(self):
-        if self.request.method == 'POST':
-            return ProcurementOrderCreateSerializer
-        return ProcurementOrderSerializer
-    
-    def get_queryset(self):
-        user = self.request.user
-        
-        if user.role in ['super_admin', 'procurement_officer']:
-            return ProcurementOrder.objects.all().order_by('-created_at')
-        elif user.role == 'room_admin':
-            # Room admin can see orders for bookings in their managed rooms
-            managed_room_ids = user.managed_rooms.values_list('id', flat=True)
-            return ProcurementOrder.objects.filter(
-                Q(booking__room_id__in=managed_room_ids) | Q(created_by=user)
-            ).order_by('-created_at')
-        else:
-            # Regular users can see their own orders
-            return ProcurementOrder.objects.filter(
-                Q(created_by=user) | Q(booking__user=user)
-            ).order_by('-created_at')
-
-
-class ProcurementOrderDetailView(generics.RetrieveUpdateDestroyAPIView):
-    """
-    Retrieve, update or delete a procurement order
-    """
-    queryset = ProcurementOrder.objects.all()
-    serializer_class = ProcurementOrderSerializer
-    permission_classes = [permissions.IsAuthenticated]
-    
-    def get_queryset(self):
-        user = self.request.user
-        
-        if user.role in ['super_admin', 'procurement_officer']:
-            return ProcurementOrder.objects.all()
-        elif user.role == 'room_admin':
-            managed_room_ids = user.managed_rooms.values_list('id', flat=True)
-            return ProcurementOrder.objects.filter(
-                Q(booking__room_id__in=managed_room_ids) | Q(created_by=user)
-            )
-        else:
-            return ProcurementOrder.objects.filter(
-                Q(created_by=user) | Q(booking__user=user)
-            )
-    
-    def perform_update(self, serializer):
-        # Only procurement officers and super admin can update order status
-        if (self.request.user.role not in ['super_admin', 'procurement_officer'] and
-            'status' in self.request.data):
-            raise permissions.PermissionDenied('Only procurement officers can update order status.')
-        
-        serializer.save()
-    
-    def perform_destroy(self, instance):
-        # Only creator or super admin can delete
-        if (instance.created_by != self.request.user and 
-            self.request.user.role != 'super_admin'):
-            raise permissions.PermissionDenied('You can only delete your own orders.')
-        
-        instance.delete()
+def calendar_event(booking):
+    return {
+        'id': booking.id,
+        'title': f"{booking.room.name} - {booking.purpose}",
+        'start': f"{booking.start_date}T{booking.start_time}",
+        'end': f"{booking.end_date}T{booking.end_time}",
+        'backgroundColor': {
+            'approved': '#28a745',
+            'pending': '#ffc107',
+            'rejected': '#dc3545',
+            'cancelled': '#6c757d',
+            'expired': '#6c757d'
+        }.get(booking.approval_status, '#007bff'),
+        'extendedProps': {
+            'room': booking.room.name,
+            'user': booking.user.get_full_name(),
+            'status': booking.approval_status,
+            'attendees': booking.expected_attendees
+        }
+    }
 
 
-@api_view(['GET'])
-@permission_classes([permissions.IsAuthenticated])
-def calendar_events(request):
+@async_api_view(['GET'], authentication_classes=[TokenUserAuthentication, SessionAuthentication])
+async def calendar_events(request):
     """
     Get booking events for calendar display
     """
@@ -404,51 +411,28 @@ def calendar_events(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # Get bookings based on user role
-    if user.role == 'super_admin':
-        bookings = Booking.objects.filter(
-            start_date__lte=end_date,
-            end_date__gte=start_date,
-            approval_status='approved'
-        )
-    elif user.role == 'room_admin':
-        managed_room_ids = user.managed_rooms.values_list('id', flat=True)
-        bookings = Booking.objects.filter(
-            Q(room_id__in=managed_room_ids) | Q(user=user),
-            start_date__lte=end_date,
-            end_date__gte=start_date,
-            approval_status='approved'
-        )
-    else:
-        bookings = Booking.objects.filter(
-            user=user,
-            start_date__lte=end_date,
-            end_date__gte=start_date
-        )
+    scope = await sync_to_async(lambda: user.access_scope)()
+    
+    # Get bookings overlapping the requested days, from the archive as well
+    # when the range reaches it
+    range_start = combine_datetime(start_date, time.min)
+    range_end = combine_datetime(end_date, time.min) + timedelta(days=1)
+    sources = [Booking.objects]
+    if reaches_archive(range_start):
+        sources.append(ArchivedBooking.objects)
+    querysets = []
+    for source in sources:
+        bookings = source.overlapping(range_start, range_end).select_related('room', 'user')
+        if user.role in ['super_admin', 'room_admin']:
+            bookings = bookings.filter(approval_status='approved')
+        querysets.append(scope_bookings(bookings, scope))
     
     # Format events for calendar
-    events = []
-    for booking in bookings:
-        events.append({
-            'id': booking.id,
-            'title': f"{booking.room.name} - {booking.purpose}",
-            'start': f"{booking.start_date}T{booking.start_time}",
-            'end': f"{booking.end_date}T{booking.end_time}",
-            'backgroundColor': {
-                'approved': '#28a745',
-                'pending': '#ffc107',
-                'rejected': '#dc3545',
-                'cancelled': '#6c757d'
-            }.get(booking.approval_status, '#007bff'),
-            'extendedProps': {
-                'room': booking.room.name,
-                'user': booking.user.get_full_name(),
-                'status': booking.approval_status,
-                'attendees': booking.expected_attendees
-            }
-        })
+    results = await asyncio.gather(*(alist(queryset) for queryset in querysets))
+    events = [calendar_event(booking) for bookings in results for booking in bookings]
     
     return Response({
         'events': events,
         'total_events': len(events)
     })
+
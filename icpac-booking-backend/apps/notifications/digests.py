@@ -0,0 +1,115 @@
+"""
+Pending-approval digests for ICPAC Booking System room admins
+
+Instead of one email per admin per new booking, bookings that are still
+pending are collected per fixed time window and every admin receives at most
+one digest per window covering all of their managed rooms. Each run renders
+one message per admin from templates loaded once, and queues it through the
+outbox with a window-based dedupe key. Windows an earlier run already queued
+are skipped before rendering, so re-running a window is cheap and harmless.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.template.loader import get_template
+from django.utils import timezone
+
+from apps.bookings.models import Booking
+from .models import EmailOutbox
+from .outbox import queue_emails
+
+User = get_user_model()
+
+DIGEST_KIND = 'admin_digest'
+
+
+def digest_windows(now=None, lookback=None):
+    """
+    Return the most recent completed ``(start, end)`` windows, oldest first.
+
+    Windows are aligned to multiples of ``ADMIN_DIGEST_WINDOW_MINUTES`` since
+    the epoch, so every worker agrees on their boundaries.
+    """
+    now = now or timezone.now()
+    lookback = lookback or settings.ADMIN_DIGEST_LOOKBACK_WINDOWS
+    window = timedelta(minutes=settings.ADMIN_DIGEST_WINDOW_MINUTES)
+    epoch = now.replace(year=1970, month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+    end = epoch + ((now - epoch) // window) * window
+    return [(end - window * (index + 1), end - window * index) for index in reversed(range(lookback))]
+
+
+def build_digests(start, end):
+    """
+    Group bookings created in ``[start, end)`` and still pending by admin.
+
+    Returns ``{admin: [bookings]}``. Rooms without an active room admin fall
+    back to the super admins. Uses at most three queries whatever the number
+    of bookings and admins.
+    """
+    bookings = list(
+        Booking.objects.filter(approval_status='pending', created_at__gte=start, created_at__lt=end)
+        .select_related('room', 'user')
+        .order_by('start_date', 'start_time', 'id')
+    )
+    if not bookings:
+        return {}
+
+    bookings_by_room = defaultdict(list)
+    for booking in bookings:
+        bookings_by_room[booking.room_id].append(booking)
+
+    assignments = (
+        User.managed_rooms.through.objects
+        .filter(room_id__in=bookings_by_room, user__is_active=True, user__role='room_admin')
+        .select_related('user')
+        .order_by('user_id', 'room_id')
+    )
+    digests = {}
+    unassigned = set(bookings_by_room)
+    for assignment in assignments:
+        digests.setdefault(assignment.user, []).extend(bookings_by_room[assignment.room_id])
+        unassigned.discard(assignment.room_id)
+
+    if unassigned:
+        orphaned = [booking for booking in bookings if booking.room_id in unassigned]
+        for admin in User.objects.filter(role='super_admin', is_active=True):
+            digests.setdefault(admin, []).extend(orphaned)
+    return digests
+
+
+def digest_key(admin, start):
+    """Outbox dedupe key of an admin's digest for the window starting at ``start``"""
+    return f'{DIGEST_KIND}:{admin.pk}:{settings.ADMIN_DIGEST_WINDOW_MINUTES}:{start.isoformat()}'
+
+
+def send_admin_digests(now=None, lookback=None):
+    """Queue one digest per admin for each recent window; returns the number queued"""
+    pending = [
+        (start, end, admin, bookings)
+        for start, end in digest_windows(now, lookback)
+        for admin, bookings in build_digests(start, end).items()
+    ]
+    if not pending:
+        return 0
+
+    # Windows already covered by an earlier run are skipped before rendering
+    keys = [digest_key(admin, start) for start, end, admin, bookings in pending]
+    queued = set(EmailOutbox.objects.filter(dedupe_key__in=keys).values_list('dedupe_key', flat=True))
+
+    subject_template = get_template(f'notifications/email/{DIGEST_KIND}_subject.txt')
+    body_template = get_template(f'notifications/email/{DIGEST_KIND}.txt')
+    messages = []
+    for (start, end, admin, bookings), key in zip(pending, keys):
+        if key in queued:
+            continue
+        context = {'admin': admin, 'bookings': bookings, 'window_start': start, 'window_end': end}
+        messages.append(EmailOutbox(
+            kind=DIGEST_KIND,
+            to=[admin.email] if admin.email else [],
+            subject=' '.join(subject_template.render(context).split()),
+            body=body_template.render(context),
+            dedupe_key=key,
+        ))
+    return queue_emails(messages)
@@ -0,0 +1,21 @@
+"""
+Email notifications for ICPAC Booking System
+"""
+from .outbox import queue_templated_email
+
+BOOKING_EMAIL_KINDS = ('booking_received', 'booking_approved', 'booking_rejected')
+
+
+def queue_welcome_email(user):
+    """Queue the welcome email for a newly created account"""
+    return queue_templated_email(
+        'welcome', [user.email], {'user': user},
+        dedupe_key=f'welcome:{user.pk}'
+    )
+
+
+def queue_booking_email(booking, kind):
+    """Queue a booking status email to the person who made the booking"""
+    if kind not in BOOKING_EMAIL_KINDS:
+        raise ValueError(f'Unknown booking email kind: {kind}')
+    return queue_templated_email(kind, [booking.user.email], {'booking': booking})
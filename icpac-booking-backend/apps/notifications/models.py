@@ -0,0 +1,75 @@
+"""
+Notification models for ICPAC Booking System
+"""
+from django.db import models
+from django.utils import timezone
+
+
+class EmailOutbox(models.Model):
+    """
+    Transactional outbox for outgoing email
+
+    Rows are written in the same transaction as the change they announce and
+    delivered afterwards by the ``deliver_email_outbox`` Celery task.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    
+    kind = models.CharField(
+        max_length=50,
+        help_text='Type of notification (welcome, booking_approved, ...)'
+    )
+    
+    to = models.JSONField(
+        default=list,
+        help_text='List of recipient email addresses'
+    )
+    
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending',
+        help_text='Delivery status'
+    )
+    
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        help_text='Number of delivery attempts so far'
+    )
+    
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        help_text='Earliest time of the next delivery attempt (lease expiry while sending)'
+    )
+    
+    last_error = models.TextField(blank=True)
+    
+    dedupe_key = models.CharField(
+        max_length=255,
+        unique=True,
+        null=True,
+        blank=True,
+        help_text='Optional key preventing the same notification from being queued twice'
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'email_outbox'
+        verbose_name = 'Outgoing Email'
+        verbose_name_plural = 'Outgoing Emails'
+        ordering = ['next_attempt_at', 'id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='email_outbox_due_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} to {', '.join(self.to)} ({self.status})"
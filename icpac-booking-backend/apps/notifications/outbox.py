@@ -0,0 +1,176 @@
+"""
+Transactional email outbox for ICPAC Booking System
+
+Request handlers never talk to SMTP. They call ``queue_email`` inside the
+transaction that makes the change being announced, so the message is stored
+if and only if the change commits. Once the transaction commits the
+``deliver_email_outbox`` task is nudged; it drains due messages in batches
+over a single SMTP connection, retrying failures with exponential backoff.
+A periodic run of the same task picks up anything a lost nudge left behind.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import IntegrityError, transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+
+def render_email(template_name, context):
+    """Render ``<template_name>_subject.txt`` and ``<template_name>.txt``"""
+    subject = render_to_string(f'notifications/email/{template_name}_subject.txt', context)
+    body = render_to_string(f'notifications/email/{template_name}.txt', context)
+    return ' '.join(subject.split()), body
+
+
+def queue_email(kind, to, subject, body, dedupe_key=None):
+    """
+    Store an email in the outbox and schedule delivery after commit.
+
+    Returns the outbox row, or None when ``dedupe_key`` was already queued.
+    """
+    recipients = [address for address in to if address]
+    if not recipients:
+        return None
+
+    try:
+        with transaction.atomic():
+            message = EmailOutbox.objects.create(
+                kind=kind, to=recipients, subject=subject, body=body, dedupe_key=dedupe_key
+            )
+    except IntegrityError:
+        if dedupe_key is None:
+            raise
+        return None
+
+    transaction.on_commit(schedule_delivery)
+    return message
+
+
+def queue_emails(messages):
+    """
+    Store unsaved EmailOutbox rows with one INSERT and schedule delivery.
+
+    Rows whose ``dedupe_key`` was already queued are skipped. Returns the
+    number of rows inserted.
+    """
+    messages = [message for message in messages if message.to]
+    keys = [message.dedupe_key for message in messages if message.dedupe_key]
+    if keys:
+        queued = set(EmailOutbox.objects.filter(dedupe_key__in=keys).values_list('dedupe_key', flat=True))
+        messages = [message for message in messages if message.dedupe_key not in queued]
+    if messages:
+        # A concurrent caller may still insert the same key first
+        EmailOutbox.objects.bulk_create(messages, ignore_conflicts=True)
+        transaction.on_commit(schedule_delivery)
+    return len(messages)
+
+
+def queue_templated_email(kind, to, context, dedupe_key=None):
+    """Render the templates named after ``kind`` and queue the result"""
+    subject, body = render_email(kind, context)
+    return queue_email(kind, to, subject, body, dedupe_key=dedupe_key)
+
+
+def schedule_delivery():
+    """Ask a worker to drain the outbox; the periodic run covers failures"""
+    from .tasks import deliver_email_outbox
+
+    try:
+        deliver_email_outbox.apply_async(retry=False)
+    except Exception:
+        logger.warning('Could not publish outbox delivery task', exc_info=True)
+
+
+def claim_batch(batch_size):
+    """
+    Lease up to ``batch_size`` due messages to this worker.
+
+    Claimed rows move to ``sending`` with ``next_attempt_at`` pushed to the
+    lease expiry, so a worker that dies mid-batch only delays its messages.
+    """
+    now = timezone.now()
+    lease_until = now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS)
+    with transaction.atomic():
+        batch = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status__in=['pending', 'sending'], next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        for message in batch:
+            message.status = 'sending'
+            message.attempts += 1
+            message.next_attempt_at = lease_until
+        EmailOutbox.objects.bulk_update(batch, ['status', 'attempts', 'next_attempt_at'])
+    return batch
+
+
+def retry_delay(attempts):
+    """Exponential backoff: base, 2x base, 4x base, ... capped at one day"""
+    delay = settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, 24 * 60 * 60))
+
+
+def mark_failed_attempt(message, error, now):
+    message.last_error = str(error)[:1000]
+    if message.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        message.status = 'failed'
+        logger.error('Giving up on outbox email %s after %s attempts: %s',
+                     message.pk, message.attempts, error)
+    else:
+        message.status = 'pending'
+        message.next_attempt_at = now + retry_delay(message.attempts)
+
+
+def deliver_outbox(batch_size=None, connection=None):
+    """
+    Send one batch of due messages over a single SMTP connection.
+
+    Returns the number of messages claimed; fewer than ``batch_size`` means
+    the outbox has been drained.
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    batch = claim_batch(batch_size)
+    if not batch:
+        return 0
+
+    connection = connection or get_connection()
+    try:
+        connection.open()
+    except Exception as exc:
+        # Nothing could be sent, every message is retried later
+        logger.warning('Could not open email connection: %s', exc)
+        now = timezone.now()
+        for message in batch:
+            mark_failed_attempt(message, exc, now)
+    else:
+        try:
+            for message in batch:
+                email = EmailMessage(
+                    subject=message.subject,
+                    body=message.body,
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                    to=message.to,
+                    connection=connection,
+                )
+                try:
+                    email.send()
+                except Exception as exc:
+                    mark_failed_attempt(message, exc, timezone.now())
+                else:
+                    message.status = 'sent'
+                    message.sent_at = timezone.now()
+                    message.last_error = ''
+        finally:
+            connection.close()
+
+    EmailOutbox.objects.bulk_update(
+        batch, ['status', 'next_attempt_at', 'last_error', 'sent_at']
+    )
+    return len(batch)
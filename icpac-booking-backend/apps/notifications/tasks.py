@@ -0,0 +1,23 @@
+"""
+Celery tasks for ICPAC Booking System notifications
+"""
+from celery import shared_task
+from django.conf import settings
+
+from .outbox import deliver_outbox
+
+
+@shared_task(ignore_result=True)
+def deliver_email_outbox(max_batches=10):
+    """Drain due outbox messages, one SMTP connection per batch"""
+    for _ in range(max_batches):
+        if deliver_outbox() < settings.EMAIL_OUTBOX_BATCH_SIZE:
+            break
+
+
+@shared_task(ignore_result=True)
+def send_admin_digests():
+    """Queue pending-approval digests for the recently closed windows"""
+    from .digests import send_admin_digests as queue_digests
+
+    queue_digests()
@@ -0,0 +1,253 @@
+import socketserver
+import threading
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from smtplib import SMTPException
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import get_connection
+from django.core.mail.backends.locmem import EmailBackend
+from django.template.base import Template
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.bookings.models import Booking
+from apps.rooms.models import Room
+from .models import EmailOutbox
+from .digests import digest_windows, send_admin_digests
+from .outbox import deliver_outbox, queue_email
+
+User = get_user_model()
+
+
+class SMTPStandInHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept messages and count connections"""
+    def handle(self):
+        self.server.connections += 1
+        self.wfile.write(b'220 localhost ESMTP stand-in\r\n')
+        in_data = False
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                break
+            if in_data:
+                if line == b'.\r\n':
+                    in_data = False
+                    self.server.messages += 1
+                    self.wfile.write(b'250 OK\r\n')
+                continue
+            command = line[:4].upper()
+            if command == b'DATA':
+                in_data = True
+                self.wfile.write(b'354 End data with <CR><LF>.<CR><LF>\r\n')
+            elif command == b'QUIT':
+                self.wfile.write(b'221 Bye\r\n')
+                break
+            else:
+                self.wfile.write(b'250 OK\r\n')
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPStandInHandler)
+        self.connections = 0
+        self.messages = 0
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class EmailOutboxTests(TestCase):
+    def queue(self, count):
+        for index in range(count):
+            queue_email('test', [f'user{index}@icpac.net'], f'Subject {index}', 'Body')
+
+    def test_queue_is_delivered_after_commit(self):
+        with mock.patch('apps.notifications.tasks.deliver_email_outbox.apply_async') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.queue(2)
+                publish.assert_not_called()
+        self.assertEqual(publish.call_count, 2)
+        self.assertEqual(len(mail.outbox), 0)
+
+        self.assertEqual(deliver_outbox(), 2)
+        self.assertEqual([message.to for message in mail.outbox], [['user0@icpac.net'], ['user1@icpac.net']])
+        self.assertFalse(EmailOutbox.objects.exclude(status='sent').exists())
+        self.assertEqual(deliver_outbox(), 0)
+
+    def test_dedupe_key_queues_once(self):
+        self.assertIsNotNone(queue_email('test', ['a@icpac.net'], 'Hi', 'Body', dedupe_key='once'))
+        self.assertIsNone(queue_email('test', ['a@icpac.net'], 'Hi', 'Body', dedupe_key='once'))
+        self.assertEqual(EmailOutbox.objects.count(), 1)
+
+    def test_batch_reuses_one_connection(self):
+        self.queue(5)
+        with mock.patch.object(EmailBackend, 'open', autospec=True, side_effect=EmailBackend.open) as opened:
+            self.assertEqual(deliver_outbox(batch_size=3), 3)
+        self.assertEqual(opened.call_count, 1)
+        self.assertEqual(len(mail.outbox), 3)
+
+    @override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=2, EMAIL_OUTBOX_RETRY_DELAY=60)
+    def test_failures_back_off_then_give_up(self):
+        self.queue(1)
+        with mock.patch.object(EmailBackend, 'send_messages', side_effect=SMTPException('boom')):
+            deliver_outbox()
+            message = EmailOutbox.objects.get()
+            self.assertEqual((message.status, message.attempts), ('pending', 1))
+            self.assertGreater(message.next_attempt_at, timezone.now() + timedelta(seconds=50))
+
+            # Not due yet
+            self.assertEqual(deliver_outbox(), 0)
+
+            EmailOutbox.objects.update(next_attempt_at=timezone.now())
+            deliver_outbox()
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts, message.last_error), ('failed', 2, 'boom'))
+
+    def test_stale_lease_is_reclaimed(self):
+        self.queue(1)
+        EmailOutbox.objects.update(status='sending', next_attempt_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(deliver_outbox(), 1)
+        self.assertEqual(EmailOutbox.objects.get().status, 'sent')
+
+    def test_smtp_stand_in_receives_batch_over_one_connection(self):
+        server = SMTPStandIn()
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        self.queue(4)
+        connection = get_connection(
+            'django.core.mail.backends.smtp.EmailBackend',
+            host='127.0.0.1', port=server.server_address[1], username='', password='', use_tls=False, timeout=5
+        )
+        self.assertEqual(deliver_outbox(connection=connection), 4)
+        self.assertEqual((server.connections, server.messages), (1, 4))
+        self.assertEqual(EmailOutbox.objects.filter(status='sent').count(), 4)
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class NotificationWiringTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.room = Room.objects.create(name='Boardroom', capacity=10, category='boardroom')
+        self.super_admin = User.objects.create_user(
+            username='super', email='super@icpac.net', password='pass12345', role='super_admin'
+        )
+        self.member = User.objects.create_user(
+            username='member', email='member@icpac.net', password='pass12345',
+            first_name='Amina', last_name='Member'
+        )
+        self.client = APIClient()
+
+    def test_user_creation_queues_welcome_email(self):
+        self.client.force_authenticate(self.super_admin)
+        response = self.client.post('/api/auth/users/', {
+            'username': 'newbie', 'email': 'newbie@icpac.net', 'first_name': 'New',
+            'last_name': 'Bie', 'role': 'user',
+        })
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(len(mail.outbox), 0)
+        message = EmailOutbox.objects.get(kind='welcome')
+        self.assertEqual(message.to, ['newbie@icpac.net'])
+
+    def test_booking_lifecycle_queues_emails(self):
+        booking = Booking.objects.create(
+            room=self.room, user=self.member, purpose='Planning',
+            start_date=date.today() + timedelta(days=1), end_date=date.today() + timedelta(days=1),
+            start_time=time(9), end_time=time(10), expected_attendees=4,
+        )
+        self.client.force_authenticate(self.super_admin)
+        response = self.client.post(
+            f'/api/bookings/{booking.id}/approve-reject/', {'action': 'reject', 'rejection_reason': 'Maintenance'}
+        )
+        self.assertEqual(response.status_code, 200)
+
+        message = EmailOutbox.objects.get(kind='booking_rejected')
+        self.assertEqual(message.to, ['member@icpac.net'])
+        self.assertEqual(message.subject, 'Booking rejected: Planning')
+        self.assertIn('Reason: Maintenance', message.body)
+        self.assertIn('Room: Boardroom', message.body)
+
+        deliver_outbox()
+        self.assertEqual(mail.outbox[0].subject, 'Booking rejected: Planning')
+
+
+@override_settings(ADMIN_DIGEST_WINDOW_MINUTES=15, ADMIN_DIGEST_LOOKBACK_WINDOWS=1)
+class AdminDigestTests(TestCase):
+    def setUp(self):
+        self.rooms = [
+            Room.objects.create(name=f'Room {index}', capacity=20, category='meeting_room')
+            for index in range(3)
+        ]
+        self.admins = []
+        for index in range(2):
+            admin = User.objects.create_user(
+                username=f'admin{index}', email=f'admin{index}@icpac.net', password='pass12345',
+                role='room_admin'
+            )
+            self.admins.append(admin)
+        self.admins[0].managed_rooms.set(self.rooms[:2])
+        self.admins[1].managed_rooms.set(self.rooms[1:2])
+        self.super_admin = User.objects.create_user(
+            username='super', email='super@icpac.net', password='pass12345', role='super_admin'
+        )
+        self.member = User.objects.create_user(
+            username='member', email='member@icpac.net', password='pass12345'
+        )
+        self.now = datetime(2026, 3, 2, 10, 16, tzinfo=dt_timezone.utc)
+
+    def create_bookings(self, room, count, created_at, offset=0, **kwargs):
+        bookings = []
+        for index in range(count):
+            day = date.today() + timedelta(days=offset + index + 1)
+            bookings.append(Booking.objects.create(
+                room=room, user=self.member, purpose=f'{room.name} meeting {index}',
+                start_date=day, end_date=day, start_time=time(9), end_time=time(10),
+                expected_attendees=5, **kwargs
+            ))
+        Booking.objects.filter(pk__in=[booking.pk for booking in bookings]).update(created_at=created_at)
+        return bookings
+
+    def test_windows_are_aligned(self):
+        self.assertEqual(digest_windows(self.now, lookback=2), [
+            (datetime(2026, 3, 2, 9, 45, tzinfo=dt_timezone.utc), datetime(2026, 3, 2, 10, 0, tzinfo=dt_timezone.utc)),
+            (datetime(2026, 3, 2, 10, 0, tzinfo=dt_timezone.utc), datetime(2026, 3, 2, 10, 15, tzinfo=dt_timezone.utc)),
+        ])
+
+    def test_one_digest_per_admin_per_window(self):
+        in_window = datetime(2026, 3, 2, 10, 5, tzinfo=dt_timezone.utc)
+        self.create_bookings(self.rooms[0], 5, in_window)
+        self.create_bookings(self.rooms[1], 5, in_window)
+        self.create_bookings(self.rooms[1], 2, in_window, offset=10, approval_status='approved')
+        self.create_bookings(self.rooms[0], 3, datetime(2026, 3, 2, 10, 15, tzinfo=dt_timezone.utc), offset=10)
+
+        with mock.patch.object(Template, 'render', autospec=True, side_effect=Template.render) as render:
+            self.assertEqual(send_admin_digests(self.now), 2)
+        # One subject and one body per admin, not per booking
+        self.assertEqual(render.call_count, 4)
+
+        digests = {message.to[0]: message for message in EmailOutbox.objects.filter(kind='admin_digest')}
+        self.assertEqual(set(digests), {'admin0@icpac.net', 'admin1@icpac.net'})
+        self.assertEqual(digests['admin0@icpac.net'].subject, '10 bookings awaiting your approval')
+        self.assertEqual(digests['admin1@icpac.net'].subject, '5 bookings awaiting your approval')
+        self.assertIn('Room 1 meeting 4', digests['admin1@icpac.net'].body)
+        self.assertNotIn('Room 0', digests['admin1@icpac.net'].body)
+
+    def test_rerunning_a_window_is_idempotent(self):
+        self.create_bookings(self.rooms[0], 2, datetime(2026, 3, 2, 10, 5, tzinfo=dt_timezone.utc))
+        self.assertEqual(send_admin_digests(self.now), 1)
+        with mock.patch.object(Template, 'render', autospec=True, side_effect=Template.render) as render:
+            self.assertEqual(send_admin_digests(self.now), 0)
+        render.assert_not_called()
+        self.assertEqual(EmailOutbox.objects.filter(kind='admin_digest').count(), 1)
+
+    def test_unassigned_rooms_go_to_super_admins(self):
+        self.create_bookings(self.rooms[2], 1, datetime(2026, 3, 2, 10, 5, tzinfo=dt_timezone.utc))
+        self.assertEqual(send_admin_digests(self.now), 1)
+        self.assertEqual(EmailOutbox.objects.get(kind='admin_digest').to, ['super@icpac.net'])
@@ -0,0 +1,138 @@
+"""
+Procurement spend analytics for ICPAC Booking System
+
+Spend is aggregated in the database, grouped by the month an order was
+created, its order type, the booked room and the department of the booking's
+owner. Closed months are cached per month; saving or deleting an order drops
+the cached month it belongs to. A report over any range costs one cache
+``get_many`` plus at most one grouped query covering the months that are not
+cached, which always includes the current month. Orders of archived bookings
+are counted too; archiving moves rows without changing any month's totals.
+"""
+from datetime import datetime
+
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from apps.bookings.archive import reaches_archive
+from .models import ArchivedProcurementOrder, ProcurementOrder
+
+MONTH_CACHE_KEY = 'procurement_spend:%s'
+MONTH_CACHE_TIMEOUT = 60 * 60 * 24 * 31
+
+
+def month_start(year, month):
+    """Aware datetime at the start of a month"""
+    return timezone.make_aware(datetime(year, month, 1))
+
+
+def next_month(month):
+    """The ``(year, month)`` after ``month``"""
+    return (month[0] + month[1] // 12, month[1] % 12 + 1)
+
+
+def months_between(first, last):
+    """``(year, month)`` pairs from ``first`` to ``last`` inclusive"""
+    months = []
+    current = first
+    while current <= last:
+        months.append(current)
+        current = next_month(current)
+    return months
+
+
+def month_key(month):
+    return MONTH_CACHE_KEY % f'{month[0]:04d}-{month[1]:02d}'
+
+
+def grouped_spend(model, first, last):
+    return model.objects.filter(
+        created_at__gte=month_start(*first),
+        created_at__lt=month_start(*next_month(last)),
+    ).annotate(
+        month=TruncMonth('created_at')
+    ).values(
+        'month', 'order_type', 'booking__room_id', 'booking__room__name', 'booking__user__department'
+    ).annotate(
+        order_count=Count('id'),
+        estimated_total=Sum('estimated_cost', filter=~Q(status='cancelled'), default=0),
+        delivered_total=Sum('estimated_cost', filter=Q(status='delivered'), default=0),
+    ).order_by('month', 'order_type', 'booking__room__name', 'booking__user__department')
+
+
+def aggregate_spend(first, last):
+    """
+    Grouped spend rows per month from ``first`` to ``last``, in one query,
+    plus one on the archive when the range starts before the archive horizon
+    """
+    rows = list(grouped_spend(ProcurementOrder, first, last))
+    if reaches_archive(month_start(*first)):
+        # Merge groups split between live and archived orders
+        merged = {}
+        for row in rows + list(grouped_spend(ArchivedProcurementOrder, first, last)):
+            key = (row['month'], row['order_type'], row['booking__room_id'], row['booking__user__department'])
+            if key in merged:
+                for total in ('order_count', 'estimated_total', 'delivered_total'):
+                    merged[key][total] += row[total]
+            else:
+                merged[key] = row
+        rows = sorted(merged.values(), key=lambda row: (
+            row['month'], row['order_type'], row['booking__room__name'], row['booking__user__department']
+        ))
+
+    by_month = {month: [] for month in months_between(first, last)}
+    for row in rows:
+        month = timezone.localtime(row['month'])
+        by_month[(month.year, month.month)].append({
+            'month': f'{month.year:04d}-{month.month:02d}',
+            'order_type': row['order_type'],
+            'room_id': row['booking__room_id'],
+            'room_name': row['booking__room__name'],
+            'department': row['booking__user__department'],
+            'order_count': row['order_count'],
+            'estimated_total': row['estimated_total'],
+            'delivered_total': row['delivered_total'],
+        })
+    return by_month
+
+
+def spend_report(first, last, today=None):
+    """
+    Spend rows and totals for the months from ``first`` to ``last``, given
+    as ``(year, month)`` pairs. Closed months come from the cache when they
+    can; the current month and later are always recomputed.
+    """
+    today = today or timezone.localdate()
+    current = (today.year, today.month)
+    months = months_between(first, last)
+
+    cached = cache.get_many([month_key(month) for month in months if month < current])
+    by_month = {month: cached[month_key(month)] for month in months if month_key(month) in cached}
+    missing = [month for month in months if month not in by_month]
+    if missing:
+        computed = aggregate_spend(missing[0], missing[-1])
+        cache.set_many(
+            {month_key(month): rows for month, rows in computed.items() if month < current},
+            MONTH_CACHE_TIMEOUT
+        )
+        by_month.update({month: computed[month] for month in missing})
+
+    rows = [row for month in months for row in by_month[month]]
+    return {
+        'start': f'{first[0]:04d}-{first[1]:02d}',
+        'end': f'{last[0]:04d}-{last[1]:02d}',
+        'rows': rows,
+        'totals': {
+            'order_count': sum(row['order_count'] for row in rows),
+            'estimated_total': sum(row['estimated_total'] for row in rows),
+            'delivered_total': sum(row['delivered_total'] for row in rows),
+        },
+    }
+
+
+def invalidate_spend_month(created_at):
+    """Drop the cached month an order was created in"""
+    month = timezone.localtime(created_at)
+    cache.delete(month_key((month.year, month.month)))
@@ -0,0 +1,80 @@
+# Generated by Django 5.0.7 on 2026-10-19 17:02
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def move_content_type(apps, schema_editor):
+    """Keep the admin permissions of the moved model"""
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    if not ContentType.objects.filter(app_label='procurement', model='procurementorder').exists():
+        ContentType.objects.filter(app_label='bookings', model='procurementorder').update(app_label='procurement')
+
+
+def restore_content_type(apps, schema_editor):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    ContentType.objects.filter(app_label='procurement', model='procurementorder').update(app_label='bookings')
+
+
+def backfill_due_at(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+    ProcurementOrder = apps.get_model('procurement', 'ProcurementOrder')
+    ProcurementOrder.objects.update(due_at=Subquery(
+        Booking.objects.filter(pk=OuterRef('booking_id')).values('start_at')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('bookings', '0008_move_procurement_order'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # The table already exists, created by the bookings app
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='ProcurementOrder',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('order_type', models.CharField(choices=[('catering', 'Catering'), ('equipment', 'Equipment'), ('supplies', 'Office Supplies'), ('decoration', 'Decoration'), ('transport', 'Transportation'), ('other', 'Other')], default='other', help_text='Type of procurement order', max_length=20)),
+                        ('items_description', models.TextField(help_text='Detailed description of items to be procured')),
+                        ('estimated_cost', models.DecimalField(decimal_places=2, help_text='Estimated cost in local currency', max_digits=10, validators=[django.core.validators.MinValueValidator(0)])),
+                        ('priority', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High'), ('urgent', 'Urgent')], default='medium', help_text='Order priority level', max_length=20)),
+                        ('status', models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('ordered', 'Ordered'), ('delivered', 'Delivered'), ('cancelled', 'Cancelled')], default='pending', help_text='Order processing status', max_length=20)),
+                        ('notes', models.TextField(blank=True, help_text='Additional notes or requirements')),
+                        ('created_at', models.DateTimeField(auto_now_add=True)),
+                        ('updated_at', models.DateTimeField(auto_now=True)),
+                        ('booking', models.ForeignKey(help_text='Related booking', on_delete=django.db.models.deletion.CASCADE, related_name='procurement_orders', to='bookings.booking')),
+                        ('created_by', models.ForeignKey(help_text='User who created this order', on_delete=django.db.models.deletion.CASCADE, related_name='created_procurement_orders', to=settings.AUTH_USER_MODEL)),
+                    ],
+                    options={
+                        'verbose_name': 'Procurement Order',
+                        'verbose_name_plural': 'Procurement Orders',
+                        'db_table': 'procurement_orders',
+                        'ordering': ['-created_at'],
+                    },
+                ),
+            ],
+            database_operations=[],
+        ),
+        migrations.RunPython(move_content_type, restore_content_type),
+        migrations.AddField(
+            model_name='procurementorder',
+            name='due_at',
+            field=models.DateTimeField(editable=False, help_text='Start of the related booking', null=True),
+        ),
+        migrations.RunPython(backfill_due_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='procurementorder',
+            index=models.Index(fields=['status', 'priority', 'due_at'], name='procurement_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.0.7 on 2026-10-19 16:58
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcurementAttachment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(help_text='Stored document', upload_to='procurement/attachments/%Y/%m/')),
+                ('filename', models.CharField(help_text='Original file name', max_length=255)),
+                ('content_type', models.CharField(default='application/octet-stream', help_text='MIME type declared by the uploader', max_length=100)),
+                ('size', models.PositiveBigIntegerField(help_text='File size in bytes')),
+                ('sha256', models.CharField(help_text='SHA-256 checksum of the file', max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('order', models.ForeignKey(help_text='Procurement order the document belongs to', on_delete=django.db.models.deletion.CASCADE, related_name='attachments', to='procurement.procurementorder')),
+                ('uploaded_by', models.ForeignKey(help_text='User who uploaded the document', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='procurement_attachments', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Procurement Attachment',
+                'verbose_name_plural': 'Procurement Attachments',
+                'db_table': 'procurement_attachments',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AttachmentUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(help_text='Original file name', max_length=255)),
+                ('content_type', models.CharField(default='application/octet-stream', help_text='MIME type declared by the uploader', max_length=100)),
+                ('size', models.PositiveBigIntegerField(help_text='Total file size in bytes')),
+                ('sha256', models.CharField(blank=True, help_text='Expected SHA-256 checksum, verified on completion when given', max_length=64)),
+                ('offset', models.PositiveBigIntegerField(default=0, help_text='Number of bytes received so far')),
+                ('status', models.CharField(choices=[('uploading', 'Uploading'), ('complete', 'Complete')], default='uploading', help_text='Upload status', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('order', models.ForeignKey(help_text='Procurement order the document will be attached to', on_delete=django.db.models.deletion.CASCADE, related_name='attachment_uploads', to='procurement.procurementorder')),
+                ('uploaded_by', models.ForeignKey(help_text='User uploading the document', on_delete=django.db.models.deletion.CASCADE, related_name='procurement_attachment_uploads', to=settings.AUTH_USER_MODEL)),
+                ('attachment', models.OneToOneField(blank=True, help_text='Attachment created when the upload completed', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='upload', to='procurement.procurementattachment')),
+            ],
+            options={
+                'verbose_name': 'Attachment Upload',
+                'verbose_name_plural': 'Attachment Uploads',
+                'db_table': 'procurement_attachment_uploads',
+                'indexes': [models.Index(fields=['status', 'updated_at'], name='attachment_upload_stale_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.0.7 on 2026-10-19 17:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0009_booking_archive'),
+        ('procurement', '0002_attachments'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedProcurementOrder',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('order_type', models.CharField(choices=[('catering', 'Catering'), ('equipment', 'Equipment'), ('supplies', 'Office Supplies'), ('decoration', 'Decoration'), ('transport', 'Transportation'), ('other', 'Other')], max_length=20)),
+                ('items_description', models.TextField()),
+                ('estimated_cost', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('priority', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High'), ('urgent', 'Urgent')], max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('ordered', 'Ordered'), ('delivered', 'Delivered'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('notes', models.TextField(blank=True)),
+                ('due_at', models.DateTimeField(null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('booking', models.ForeignKey(help_text='Related archived booking', on_delete=django.db.models.deletion.CASCADE, related_name='procurement_orders', to='bookings.archivedbooking')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_procurement_orders', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Archived Procurement Order',
+                'verbose_name_plural': 'Archived Procurement Orders',
+                'db_table': 'procurement_orders_archive',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['created_at'], name='procurement_archive_idx')],
+            },
+        ),
+    ]
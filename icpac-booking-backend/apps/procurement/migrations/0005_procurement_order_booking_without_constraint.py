@@ -0,0 +1,27 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    bookings.0010 drops the foreign key from procurement orders to the
+    partitioned bookings table on PostgreSQL; record it in the model state
+    without touching the database.
+    """
+
+    dependencies = [
+        ('bookings', '0010_partition_bookings'),
+        ('procurement', '0004_attachment_upload_assembling'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='procurementorder',
+                    name='booking',
+                    field=models.ForeignKey(db_constraint=False, help_text='Related booking', on_delete=django.db.models.deletion.CASCADE, related_name='procurement_orders', to='bookings.booking'),
+                ),
+            ],
+        ),
+    ]
@@ -1,3 +1,335 @@
+"""
+Procurement models for ICPAC Booking System
+"""
+import uuid
+
 from django.db import models
+from django.db.models import Case, IntegerField, Value, When
+from django.contrib.auth import get_user_model
+from django.core.validators import MinValueValidator
+
+User = get_user_model()
+
+
+class ProcurementOrderQuerySet(models.QuerySet):
+    """
+    Work queue ordering for procurement officers
+    """
+    OPEN_STATUSES = ['pending', 'approved', 'ordered']
+    
+    def open(self):
+        """Orders that still need work"""
+        return self.filter(status__in=self.OPEN_STATUSES)
+    
+    def with_priority_rank(self):
+        """Annotate ``priority_rank``, 0 for urgent up to 3 for low"""
+        return self.annotate(priority_rank=Case(
+            *[
+                When(priority=priority, then=Value(rank))
+                for rank, priority in enumerate(ProcurementOrder.PRIORITY_RANKING)
+            ],
+            default=Value(len(ProcurementOrder.PRIORITY_RANKING)),
+            output_field=IntegerField(),
+        ))
+    
+    def due_soon(self):
+        """Most urgent first, then by how soon the event starts"""
+        return self.with_priority_rank().order_by('priority_rank', 'due_at', 'id')
+
+
+class ProcurementOrder(models.Model):
+    """
+    Procurement orders for booking-related purchases
+    """
+    ORDER_TYPE_CHOICES = [
+        ('catering', 'Catering'),
+        ('equipment', 'Equipment'),
+        ('supplies', 'Office Supplies'),
+        ('decoration', 'Decoration'),
+        ('transport', 'Transportation'),
+        ('other', 'Other'),
+    ]
+    
+    PRIORITY_CHOICES = [
+        ('low', 'Low'),
+        ('medium', 'Medium'),
+        ('high', 'High'),
+        ('urgent', 'Urgent'),
+    ]
+    PRIORITY_RANKING = ['urgent', 'high', 'medium', 'low']
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('approved', 'Approved'),
+        ('ordered', 'Ordered'),
+        ('delivered', 'Delivered'),
+        ('cancelled', 'Cancelled'),
+    ]
+    
+    # No database constraint: a partitioned bookings table cannot be
+    # referenced (see apps.bookings.partitioning)
+    booking = models.ForeignKey(
+        'bookings.Booking',
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        related_name='procurement_orders',
+        help_text='Related booking'
+    )
+    
+    order_type = models.CharField(
+        max_length=20,
+        choices=ORDER_TYPE_CHOICES,
+        default='other',
+        help_text='Type of procurement order'
+    )
+    
+    items_description = models.TextField(
+        help_text='Detailed description of items to be procured'
+    )
+    
+    estimated_cost = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        validators=[MinValueValidator(0)],
+        help_text='Estimated cost in local currency'
+    )
+    
+    priority = models.CharField(
+        max_length=20,
+        choices=PRIORITY_CHOICES,
+        default='medium',
+        help_text='Order priority level'
+    )
+    
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending',
+        help_text='Order processing status'
+    )
+    
+    notes = models.TextField(
+        blank=True,
+        help_text='Additional notes or requirements'
+    )
+    
+    # Copy of the booking's start, kept in sync by the booking's save(), so
+    # the work queue can filter and sort on one table
+    due_at = models.DateTimeField(
+        null=True,
+        editable=False,
+        help_text='Start of the related booking'
+    )
+    
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='created_procurement_orders',
+        help_text='User who created this order'
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    objects = ProcurementOrderQuerySet.as_manager()
+    
+    class Meta:
+        db_table = 'procurement_orders'
+        verbose_name = 'Procurement Order'
+        verbose_name_plural = 'Procurement Orders'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'priority', 'due_at'], name='procurement_queue_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Procurement Order #{self.id} - {self.get_order_type_display()} for {self.booking.purpose}"
+    
+    def save(self, *args, **kwargs):
+        if self.booking_id and (self.due_at is None or self._state.adding):
+            self.due_at = self.booking.get_start_at()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'due_at'}
+        super().save(*args, **kwargs)
+
+
+class ProcurementAttachment(models.Model):
+    """
+    Quotes, invoices and other documents attached to a procurement order
+    """
+    order = models.ForeignKey(
+        ProcurementOrder,
+        on_delete=models.CASCADE,
+        related_name='attachments',
+        help_text='Procurement order the document belongs to'
+    )
+    
+    file = models.FileField(
+        upload_to='procurement/attachments/%Y/%m/',
+        help_text='Stored document'
+    )
+    
+    filename = models.CharField(
+        max_length=255,
+        help_text='Original file name'
+    )
+    
+    content_type = models.CharField(
+        max_length=100,
+        default='application/octet-stream',
+        help_text='MIME type declared by the uploader'
+    )
+    
+    size = models.PositiveBigIntegerField(help_text='File size in bytes')
+    
+    sha256 = models.CharField(
+        max_length=64,
+        help_text='SHA-256 checksum of the file'
+    )
+    
+    uploaded_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='procurement_attachments',
+        help_text='User who uploaded the document'
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'procurement_attachments'
+        verbose_name = 'Procurement Attachment'
+        verbose_name_plural = 'Procurement Attachments'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.filename} for Procurement Order #{self.order_id}"
+
+
+class AttachmentUpload(models.Model):
+    """
+    A chunked upload in progress; ``offset`` bytes have been received
+    """
+    STATUS_CHOICES = [
+        ('uploading', 'Uploading'),
+        ('assembling', 'Assembling'),
+        ('complete', 'Complete'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    
+    order = models.ForeignKey(
+        ProcurementOrder,
+        on_delete=models.CASCADE,
+        related_name='attachment_uploads',
+        help_text='Procurement order the document will be attached to'
+    )
+    
+    filename = models.CharField(max_length=255, help_text='Original file name')
+    
+    content_type = models.CharField(
+        max_length=100,
+        default='application/octet-stream',
+        help_text='MIME type declared by the uploader'
+    )
+    
+    size = models.PositiveBigIntegerField(help_text='Total file size in bytes')
+    
+    sha256 = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text='Expected SHA-256 checksum, verified on completion when given'
+    )
+    
+    offset = models.PositiveBigIntegerField(
+        default=0,
+        help_text='Number of bytes received so far'
+    )
+    
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='uploading',
+        help_text='Upload status'
+    )
+    
+    attachment = models.OneToOneField(
+        ProcurementAttachment,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='upload',
+        help_text='Attachment created when the upload completed'
+    )
+    
+    uploaded_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='procurement_attachment_uploads',
+        help_text='User uploading the document'
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'procurement_attachment_uploads'
+        verbose_name = 'Attachment Upload'
+        verbose_name_plural = 'Attachment Uploads'
+        indexes = [
+            models.Index(fields=['status', 'updated_at'], name='attachment_upload_stale_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Upload of {self.filename} ({self.offset}/{self.size} bytes)"
+    
+    @property
+    def chunk_prefix(self):
+        """Storage directory holding the received chunks"""
+        return f'procurement/uploads/{self.pk}'
+
 
-# Create your models here.
+class ArchivedProcurementOrder(models.Model):
+    """
+    Procurement orders of archived bookings, with the field names of
+    ``ProcurementOrder`` so analytics can aggregate both the same way
+    """
+    id = models.BigIntegerField(primary_key=True)
+    
+    booking = models.ForeignKey(
+        'bookings.ArchivedBooking',
+        on_delete=models.CASCADE,
+        related_name='procurement_orders',
+        help_text='Related archived booking'
+    )
+    
+    order_type = models.CharField(max_length=20, choices=ProcurementOrder.ORDER_TYPE_CHOICES)
+    items_description = models.TextField()
+    estimated_cost = models.DecimalField(max_digits=10, decimal_places=2)
+    priority = models.CharField(max_length=20, choices=ProcurementOrder.PRIORITY_CHOICES)
+    status = models.CharField(max_length=20, choices=ProcurementOrder.STATUS_CHOICES)
+    notes = models.TextField(blank=True)
+    due_at = models.DateTimeField(null=True)
+    
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_procurement_orders'
+    )
+    
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    
+    class Meta:
+        db_table = 'procurement_orders_archive'
+        verbose_name = 'Archived Procurement Order'
+        verbose_name_plural = 'Archived Procurement Orders'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at'], name='procurement_archive_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Archived Procurement Order #{self.id}"
@@ -0,0 +1,23 @@
+"""
+Role-scoped procurement querysets for ICPAC Booking System
+"""
+from django.db.models import Q
+
+from apps.bookings.scoping import union_scope
+
+
+def scope_procurement_orders(queryset, scope):
+    """Restrict a ProcurementOrder queryset to the orders visible to ``scope``"""
+    if scope.is_super_admin or scope.is_procurement_officer:
+        return queryset
+    if scope.is_room_admin:
+        return union_scope(
+            queryset,
+            Q(booking__room_id__in=scope.managed_room_ids),
+            Q(created_by_id=scope.user_id),
+        )
+    return union_scope(
+        queryset,
+        Q(created_by_id=scope.user_id),
+        Q(booking__user_id=scope.user_id),
+    )
@@ -0,0 +1,126 @@
+"""
+Procurement serializers for ICPAC Booking System
+"""
+import os
+import re
+
+from django.urls import reverse
+from rest_framework import serializers
+from apps.bookings.serializers import BookingListSerializer
+from .models import AttachmentUpload, ProcurementAttachment, ProcurementOrder
+from .uploads import CHUNK_SIZE, MAX_ATTACHMENT_SIZE
+
+
+class ProcurementOrderSerializer(serializers.ModelSerializer):
+    """
+    Serializer for procurement orders
+    """
+    booking_details = BookingListSerializer(source='booking', read_only=True)
+    created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    
+    class Meta:
+        model = ProcurementOrder
+        fields = [
+            'id', 'booking', 'booking_details', 'order_type', 'items_description',
+            'estimated_cost', 'priority', 'status', 'status_display', 'due_at',
+            'notes', 'created_by', 'created_by_name', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'created_by', 'due_at', 'created_at', 'updated_at']
+    
+    def validate_estimated_cost(self, value):
+        """Validate estimated cost"""
+        if value <= 0:
+            raise serializers.ValidationError('Estimated cost must be greater than zero.')
+        return value
+
+
+class ProcurementOrderCreateSerializer(serializers.ModelSerializer):
+    """
+    Serializer for creating procurement orders
+    """
+    class Meta:
+        model = ProcurementOrder
+        fields = [
+            'booking', 'order_type', 'items_description',
+            'estimated_cost', 'priority', 'notes'
+        ]
+    
+    def validate_booking(self, value):
+        """Validate booking"""
+        request = self.context.get('request')
+        
+        # Check if booking exists and is approved
+        if value.approval_status != 'approved':
+            raise serializers.ValidationError('Can only create orders for approved bookings.')
+        
+        # Check if user has permission to create orders for this booking
+        if (request.user.pk != value.user_id and 
+            request.user.role not in ['super_admin', 'room_admin', 'procurement_officer']):
+            raise serializers.ValidationError('You can only create orders for your own bookings.')
+        
+        return value
+    
+    def create(self, validated_data):
+        """Create order with current user"""
+        request = self.context.get('request')
+        validated_data['created_by'] = request.user
+        return super().create(validated_data)
+
+
+class ProcurementAttachmentSerializer(serializers.ModelSerializer):
+    """
+    Serializer for procurement order attachments
+    """
+    uploaded_by_name = serializers.CharField(source='uploaded_by.get_full_name', read_only=True, default='')
+    download_url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ProcurementAttachment
+        fields = [
+            'id', 'order', 'filename', 'content_type', 'size', 'sha256',
+            'uploaded_by', 'uploaded_by_name', 'download_url', 'created_at'
+        ]
+        read_only_fields = fields
+    
+    def get_download_url(self, obj):
+        url = reverse('procurement:attachment_download', args=[obj.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+
+class AttachmentUploadSerializer(serializers.ModelSerializer):
+    """
+    Serializer for opening and resuming chunked attachment uploads
+    """
+    chunk_size = serializers.SerializerMethodField()
+    attachment = ProcurementAttachmentSerializer(read_only=True)
+    
+    class Meta:
+        model = AttachmentUpload
+        fields = [
+            'id', 'order', 'filename', 'content_type', 'size', 'sha256',
+            'offset', 'status', 'chunk_size', 'attachment', 'created_at'
+        ]
+        read_only_fields = ['id', 'order', 'offset', 'status', 'attachment', 'created_at']
+    
+    def get_chunk_size(self, obj):
+        return CHUNK_SIZE
+    
+    def validate_size(self, value):
+        if not 0 < value <= MAX_ATTACHMENT_SIZE:
+            raise serializers.ValidationError(
+                f'Attachments must be between 1 byte and {MAX_ATTACHMENT_SIZE} bytes.'
+            )
+        return value
+    
+    def validate_filename(self, value):
+        value = os.path.basename(value.replace('\\', '/')).strip()
+        if not value:
+            raise serializers.ValidationError('A file name is required.')
+        return value
+    
+    def validate_sha256(self, value):
+        if value and not re.fullmatch(r'[0-9a-fA-F]{64}', value):
+            raise serializers.ValidationError('Give the SHA-256 checksum as 64 hex digits.')
+        return value.lower()
@@ -0,0 +1,15 @@
+"""
+Procurement signal handlers for ICPAC Booking System
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .analytics import invalidate_spend_month
+from .models import ProcurementOrder
+
+
+@receiver(post_save, sender=ProcurementOrder)
+@receiver(post_delete, sender=ProcurementOrder)
+def procurement_order_changed(sender, instance, **kwargs):
+    """Recompute the spend of the month the order belongs to"""
+    invalidate_spend_month(instance.created_at)
@@ -0,0 +1,12 @@
+"""
+Celery tasks for ICPAC Booking System procurement
+"""
+from celery import shared_task
+
+from .uploads import remove_stale_uploads as remove
+
+
+@shared_task(ignore_result=True)
+def remove_stale_uploads():
+    """Delete attachment uploads abandoned part way and their chunks"""
+    remove()
@@ -1,3 +1,310 @@
-from django.test import TestCase
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.bookings.models import Booking, combine_datetime
+from apps.rooms.models import Room
+from icpac_booking.exports import openpyxl
+from .analytics import spend_report
+from .models import AttachmentUpload, ProcurementOrder
+from .uploads import chunk_starts
+
+User = get_user_model()
+
+
+class ProcurementQueueTests(TestCase):
+    def setUp(self):
+        self.officer = User.objects.create_user(
+            username='officer', email='officer@icpac.net', password='pass12345',
+            role='procurement_officer'
+        )
+        self.member = User.objects.create_user(
+            username='member', email='member@icpac.net', password='pass12345'
+        )
+        self.room = Room.objects.create(name='Boardroom', capacity=20, category='boardroom')
+        self.bookings = [self.book(days) for days in (1, 2, 3)]
+
+        self.soon_medium = self.order(self.bookings[0], 'medium')
+        self.later_urgent = self.order(self.bookings[2], 'urgent')
+        self.soon_urgent = self.order(self.bookings[1], 'urgent')
+        self.order(self.bookings[0], 'high', status='delivered')
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.officer)
+
+    def book(self, days):
+        day = timezone.now().date() + timedelta(days=days)
+        return Booking.objects.create(
+            room=self.room, user=self.member, purpose='Workshop', start_date=day, end_date=day,
+            start_time=time(9), end_time=time(10), approval_status='approved'
+        )
+
+    def order(self, booking, priority, status='pending'):
+        return ProcurementOrder.objects.create(
+            booking=booking, created_by=self.member, items_description='Tea',
+            estimated_cost=10, priority=priority, status=status
+        )
+
+    def test_queue_is_ordered_by_priority_then_due_date(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/procurement/queue/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [order['id'] for order in response.data['results']],
+            [self.soon_urgent.id, self.later_urgent.id, self.soon_medium.id]
+        )
+        self.assertEqual(response.data['results'][0]['booking_details']['room_name'], 'Boardroom')
+
+    def test_queue_is_for_procurement_officers(self):
+        self.client.force_authenticate(self.member)
+        self.assertEqual(self.client.get('/api/procurement/queue/').status_code, 403)
+
+    def test_due_date_follows_booking(self):
+        booking = self.bookings[2]
+        self.assertEqual(self.later_urgent.due_at, booking.start_at)
+
+        booking.start_time = time(8)
+        booking.save()
+        self.later_urgent.refresh_from_db()
+        self.assertEqual(self.later_urgent.due_at, combine_datetime(booking.start_date, time(8)))
+
+    @skipIf(openpyxl is None, 'openpyxl is not installed')
+    def test_xlsx_export(self):
+        response = self.client.get('/api/procurement/orders/export.xlsx')
+        self.assertEqual(response.status_code, 200)
+        sheet = openpyxl.load_workbook(BytesIO(b''.join(response.streaming_content))).active
+        rows = list(sheet.values)
+        self.assertEqual(rows[0][:2], ('ID', 'Booking ID'))
+        self.assertEqual(len(rows), 5)
+
+    def test_list_is_served_under_both_prefixes(self):
+        for url in ('/api/procurement/orders/', '/api/bookings/procurement-orders/'):
+            with self.assertNumQueries(2):
+                response = self.client.get(url)
+            self.assertEqual(response.data['count'], 4)
+
+
+class SpendAnalyticsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.officer = User.objects.create_user(
+            username='officer', email='officer@icpac.net', password='pass12345',
+            role='procurement_officer'
+        )
+        member = User.objects.create_user(
+            username='member', email='member@icpac.net', password='pass12345', department='Climate'
+        )
+        room = Room.objects.create(name='Boardroom', capacity=20, category='boardroom')
+        day = timezone.now().date() + timedelta(days=1)
+        self.booking = Booking.objects.create(
+            room=room, user=member, purpose='Workshop', start_date=day, end_date=day,
+            start_time=time(9), end_time=time(10), approval_status='approved'
+        )
+        self.orders = [
+            self.order('catering', 100, 'delivered', datetime(2025, 3, 10)),
+            self.order('catering', 50, 'pending', datetime(2025, 3, 20)),
+            self.order('equipment', 70, 'cancelled', datetime(2025, 3, 21)),
+            self.order('catering', 30, 'pending', datetime(2025, 11, 2)),
+        ]
+
+    def order(self, order_type, cost, status, created_at):
+        order = ProcurementOrder.objects.create(
+            booking=self.booking, created_by=self.officer, items_description='Items',
+            order_type=order_type, estimated_cost=cost, status=status
+        )
+        ProcurementOrder.objects.filter(pk=order.pk).update(created_at=timezone.make_aware(created_at))
+        return order
+
+    def test_closed_months_are_served_from_cache(self):
+        # Live orders plus the archive, which the range reaches
+        with self.assertNumQueries(2):
+            report = spend_report((2025, 1), (2025, 12))
+        march = [row for row in report['rows'] if row['month'] == '2025-03']
+        self.assertEqual(
+            [(row['order_type'], row['order_count'], row['estimated_total'], row['delivered_total'])
+             for row in march],
+            [('catering', 2, Decimal('150'), Decimal('100')), ('equipment', 1, Decimal('0'), Decimal('0'))]
+        )
+        self.assertEqual(march[0]['department'], 'Climate')
+        self.assertEqual(report['totals']['estimated_total'], Decimal('180'))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(spend_report((2025, 1), (2025, 12)), report)
+
+    def test_current_month_is_recomputed(self):
+        today = timezone.localdate()
+        spend_report((2025, 1), (today.year, today.month))
+        with self.assertNumQueries(1):
+            spend_report((2025, 1), (today.year, today.month))
+
+    def test_saving_an_order_refreshes_its_month(self):
+        spend_report((2025, 1), (2025, 12))
+        order = self.orders[1]
+        order.refresh_from_db()
+        order.status = 'delivered'
+        order.save()
+        report = spend_report((2025, 1), (2025, 12))
+        self.assertEqual(report['totals']['delivered_total'], Decimal('150'))
+
+    def test_spend_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.officer)
+        response = client.get('/api/procurement/analytics/spend/', {'year': 2025})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['totals']['order_count'], 4)
+        self.assertEqual(
+            client.get('/api/procurement/analytics/spend/', {'start': '2025-01'}).status_code, 400
+        )
+
+
+class AttachmentUploadTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.officer = User.objects.create_user(
+            username='officer', email='officer@icpac.net', password='pass12345',
+            role='procurement_officer'
+        )
+        room = Room.objects.create(name='Boardroom', capacity=20, category='boardroom')
+        day = timezone.now().date() + timedelta(days=1)
+        booking = Booking.objects.create(
+            room=room, user=self.officer, purpose='Workshop', start_date=day, end_date=day,
+            start_time=time(9), end_time=time(10), approval_status='approved'
+        )
+        self.order = ProcurementOrder.objects.create(
+            booking=booking, created_by=self.officer, items_description='Chairs', estimated_cost=10
+        )
+        self.data = os.urandom(2500)
+        self.client = APIClient()
+        self.client.force_authenticate(self.officer)
+
+    def open_upload(self, sha256=None):
+        response = self.client.post(f'/api/procurement/orders/{self.order.id}/uploads/', {
+            'filename': 'quote.pdf', 'content_type': 'application/pdf', 'size': len(self.data),
+            'sha256': sha256 or hashlib.sha256(self.data).hexdigest(),
+        })
+        self.assertEqual(response.status_code, 201, response.data)
+        return f"/api/procurement/uploads/{response.data['id']}/"
+
+    def put_chunk(self, url, start, end):
+        return self.client.generic(
+            'PUT', url, self.data[start:end + 1], content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{end}/{len(self.data)}'
+        )
+
+    def upload(self):
+        url = self.open_upload()
+        for start in range(0, len(self.data), 1000):
+            response = self.put_chunk(url, start, min(start + 999, len(self.data) - 1))
+        return response.data['attachment']
+
+    def test_upload_resumes_and_assembles(self):
+        url = self.open_upload()
+        self.assertEqual(self.put_chunk(url, 0, 999).data['offset'], 1000)
+
+        # A chunk sent after a dropped connection lost track of the offset
+        response = self.put_chunk(url, 2000, 2499)
+        self.assertEqual((response.status_code, response.data['offset']), (409, 1000))
+        self.assertEqual(self.client.get(url).data['offset'], 1000)
+
+        self.assertEqual(self.put_chunk(url, 1000, 1999).status_code, 200)
+        response = self.put_chunk(url, 2000, 2499)
+        self.assertEqual(response.status_code, 201)
+        attachment = response.data['attachment']
+        self.assertEqual(attachment['sha256'], hashlib.sha256(self.data).hexdigest())
+        self.assertEqual(attachment['size'], 2500)
+
+        stored = self.order.attachments.get()
+        with stored.file.open('rb') as file:
+            self.assertEqual(file.read(), self.data)
+        self.assertEqual(chunk_starts(AttachmentUpload.objects.get()), [])
+
+    def test_repeated_last_chunk_returns_the_same_attachment(self):
+        url = self.open_upload()
+        self.put_chunk(url, 0, 1999)
+        first = self.put_chunk(url, 2000, 2499)
+        self.assertEqual(first.status_code, 201)
+
+        with mock.patch('apps.procurement.uploads.assemble_upload') as assemble:
+            second = self.put_chunk(url, 2000, 2499)
+        assemble.assert_not_called()
+        self.assertEqual(second.data['attachment']['id'], first.data['attachment']['id'])
+        self.assertEqual(self.order.attachments.count(), 1)
+        self.assertEqual(self.put_chunk(url, 0, 1999).status_code, 409)
+
+    def test_last_chunk_during_assembly_is_rejected(self):
+        url = self.open_upload()
+        self.put_chunk(url, 0, 1999)
+        # A concurrent request stored the last chunk and claimed the assembly
+        AttachmentUpload.objects.update(offset=2500, status='assembling')
+
+        response = self.put_chunk(url, 2000, 2499)
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(self.order.attachments.exists())
+        self.assertEqual(len(chunk_starts(AttachmentUpload.objects.get())), 1)
+
+    def test_failed_assembly_is_retried_by_the_last_chunk(self):
+        url = self.open_upload()
+        self.put_chunk(url, 0, 1999)
+        with mock.patch('apps.procurement.uploads.ProcurementAttachment.save', side_effect=OSError):
+            with self.assertRaises(OSError):
+                self.put_chunk(url, 2000, 2499)
+        self.assertEqual(AttachmentUpload.objects.get().status, 'uploading')
+
+        self.assertEqual(self.put_chunk(url, 2000, 2499).status_code, 201)
+        self.assertEqual(self.order.attachments.count(), 1)
+
+    def test_checksum_mismatch_resets_upload(self):
+        url = self.open_upload(sha256='0' * 64)
+        self.put_chunk(url, 0, 1999)
+        response = self.put_chunk(url, 2000, 2499)
+        self.assertEqual((response.status_code, response.data['offset']), (422, 0))
+        self.assertFalse(self.order.attachments.exists())
+
+    def test_short_chunk_is_rejected(self):
+        url = self.open_upload()
+        response = self.client.generic(
+            'PUT', url, self.data[:500], content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes 0-999/{len(self.data)}'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(AttachmentUpload.objects.get().offset, 0)
+
+    def test_download_supports_ranges(self):
+        url = self.upload()['download_url']
+        response = self.client.get(url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/2500')
+        self.assertEqual(b''.join(response.streaming_content), self.data[10:20])
+
+        response = self.client.get(url, HTTP_RANGE='bytes=-100')
+        self.assertEqual(b''.join(response.streaming_content), self.data[-100:])
+
+        response = self.client.get(url)
+        self.assertEqual((response.status_code, response['Accept-Ranges']), (200, 'bytes'))
+        self.assertEqual(b''.join(response.streaming_content), self.data)
+
+        self.assertEqual(self.client.get(url, HTTP_RANGE='bytes=5000-').status_code, 416)
+
+    def test_uploads_are_private_to_the_uploader(self):
+        url = self.open_upload()
+        other = User.objects.create_user(
+            username='other', email='other@icpac.net', password='pass12345', role='procurement_officer'
+        )
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(url).status_code, 404)
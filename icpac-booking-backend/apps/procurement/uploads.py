@@ -0,0 +1,211 @@
+"""
+Chunked, resumable attachment uploads for ICPAC Booking System
+
+Large scans do not fit in a single request on a slow uplink, so an upload
+is a session the client fills chunk by chunk:
+
+1. ``POST /api/procurement/orders/<id>/uploads/`` with the file name, size
+   and optionally its SHA-256 opens a session
+2. ``PUT /api/procurement/uploads/<uuid>/`` sends the next chunk as the raw
+   request body with ``Content-Range: bytes <start>-<end>/<size>``
+3. ``GET /api/procurement/uploads/<uuid>/`` returns the ``offset`` to resume
+   from after a dropped connection
+
+Every chunk is streamed straight from the request into its own storage
+object. When the last chunk arrives the chunks are copied in order into a
+temporary file while being hashed, so the whole file is never held in
+memory, and the result is saved as a ``ProcurementAttachment``. The request
+that stores the last chunk claims the assembly by moving the upload to
+``assembling`` under the row lock, so a repeated or concurrent last chunk
+neither assembles a second attachment nor discards chunks being read.
+"""
+import hashlib
+import logging
+import re
+import tempfile
+from datetime import timedelta
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from .models import AttachmentUpload, ProcurementAttachment
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 5 * 1024 * 1024
+MAX_CHUNK_SIZE = 16 * 1024 * 1024
+MAX_ATTACHMENT_SIZE = 500 * 1024 * 1024
+COPY_BUFFER_SIZE = 1024 * 1024
+STALE_UPLOAD_HOURS = 24
+
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+class UploadError(Exception):
+    """A chunk was rejected; ``status`` is the HTTP status to answer with"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_content_range(header):
+    """Return ``(start, length, total)`` from a ``Content-Range`` header"""
+    match = CONTENT_RANGE_RE.match(header or '')
+    if not match:
+        raise UploadError('Content-Range must be "bytes <start>-<end>/<size>".')
+    start, end, total = (int(value) for value in match.groups())
+    if end < start:
+        raise UploadError('Content-Range end is before its start.')
+    return start, end - start + 1, total
+
+
+def chunk_name(upload, start):
+    return f'{upload.chunk_prefix}/{start:015d}'
+
+
+def store_chunk(upload_id, content_range, stream):
+    """
+    Append the chunk in ``stream`` to an upload and return the upload. The
+    chunk must start at the current offset; a client that lost track of it
+    gets a 409 and can ask for the offset again. The last chunk completes
+    the upload; sending it again returns the upload with its attachment.
+    """
+    start, length, total = parse_content_range(content_range)
+    if stream is None:
+        raise UploadError('The chunk is empty.')
+    if length > MAX_CHUNK_SIZE:
+        raise UploadError(f'Chunks may not exceed {MAX_CHUNK_SIZE} bytes.', status=413)
+
+    with transaction.atomic():
+        # The row lock keeps a retried chunk from racing the original
+        upload = AttachmentUpload.objects.select_for_update().get(pk=upload_id)
+        if total != upload.size or start + length > upload.size:
+            raise UploadError('Content-Range does not match the upload size.')
+        if upload.status == 'complete':
+            if start + length != upload.size:
+                raise UploadError('This upload is already complete.', status=409)
+            # A retried last chunk whose response was lost
+            return upload
+        if upload.status == 'assembling':
+            raise UploadError('The upload is being assembled; ask for its status again.', status=409)
+        if upload.offset == upload.size:
+            # Every byte arrived earlier and only the assembly failed; the
+            # repeated last chunk retries it
+            pass
+        elif start != upload.offset:
+            raise UploadError(f'Expected a chunk starting at byte {upload.offset}.', status=409)
+        else:
+            write_chunk(chunk_name(upload, start), length, stream)
+            upload.offset = start + length
+
+        update_fields = ['offset', 'updated_at']
+        if upload.offset == upload.size:
+            upload.status = 'assembling'
+            update_fields.append('status')
+        upload.save(update_fields=update_fields)
+
+    if upload.status == 'assembling':
+        try:
+            assemble_upload(upload)
+        except Exception:
+            if upload.status == 'assembling':
+                # Let the repeated last chunk retry the assembly
+                upload.status = 'uploading'
+                upload.save(update_fields=['status', 'updated_at'])
+            raise
+    return upload
+
+
+def write_chunk(name, length, stream):
+    """Stream a request body into storage, checking it is ``length`` bytes"""
+    if default_storage.exists(name):
+        # Left over from an attempt that failed part way
+        default_storage.delete(name)
+    try:
+        default_storage.save(name, File(stream))
+    except Exception:
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        raise
+    if default_storage.size(name) != length:
+        default_storage.delete(name)
+        raise UploadError('The chunk does not match its Content-Range.')
+
+
+def assemble_upload(upload):
+    """
+    Join the chunks of an upload claimed for assembly into an attachment.
+    A checksum mismatch discards the chunks and resets the upload to byte 0.
+    """
+    digest = hashlib.sha256()
+    with tempfile.TemporaryFile() as assembled:
+        for start in chunk_starts(upload):
+            with default_storage.open(chunk_name(upload, start), 'rb') as chunk:
+                while block := chunk.read(COPY_BUFFER_SIZE):
+                    digest.update(block)
+                    assembled.write(block)
+
+        checksum = digest.hexdigest()
+        if assembled.tell() != upload.size or (upload.sha256 and upload.sha256.lower() != checksum):
+            discard_chunks(upload)
+            upload.offset = 0
+            upload.status = 'uploading'
+            upload.save(update_fields=['offset', 'status', 'updated_at'])
+            raise UploadError('Checksum mismatch; the upload was reset.', status=422)
+
+        assembled.seek(0)
+        with transaction.atomic():
+            attachment = ProcurementAttachment(
+                order_id=upload.order_id,
+                filename=upload.filename,
+                content_type=upload.content_type,
+                size=upload.size,
+                sha256=checksum,
+                uploaded_by_id=upload.uploaded_by_id,
+            )
+            attachment.file.save(upload.filename, File(assembled), save=False)
+            attachment.save()
+
+            upload.attachment = attachment
+            upload.status = 'complete'
+            upload.save(update_fields=['attachment', 'status', 'updated_at'])
+
+    discard_chunks(upload)
+    return attachment
+
+
+def chunk_starts(upload):
+    """Byte offsets of the stored chunks, in order"""
+    try:
+        _, files = default_storage.listdir(upload.chunk_prefix)
+    except FileNotFoundError:
+        return []
+    return sorted(int(name) for name in files)
+
+
+def discard_chunks(upload):
+    for start in chunk_starts(upload):
+        default_storage.delete(chunk_name(upload, start))
+
+
+def remove_stale_uploads(now=None):
+    """
+    Delete uploads abandoned for ``STALE_UPLOAD_HOURS``, including those
+    whose assembly never finished, and their chunks
+    """
+    now = now or timezone.now()
+    stale = AttachmentUpload.objects.filter(
+        status__in=['uploading', 'assembling'],
+        updated_at__lt=now - timedelta(hours=STALE_UPLOAD_HOURS)
+    )
+    count = 0
+    for upload in stale.iterator():
+        discard_chunks(upload)
+        upload.delete()
+        count += 1
+    if count:
+        logger.info('Removed %s stale attachment uploads', count)
+    return count
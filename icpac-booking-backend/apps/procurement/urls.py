@@ -0,0 +1,26 @@
+"""
+Procurement URLs for ICPAC Booking System
+"""
+from django.urls import path
+from . import views
+
+app_name = 'procurement'
+
+urlpatterns = [
+    # Procurement order endpoints
+    path('orders/', views.ProcurementOrderListView.as_view(), name='order_list'),
+    path('orders/<int:pk>/', views.ProcurementOrderDetailView.as_view(), name='order_detail'),
+    path('orders/export.<str:extension>', views.export_procurement_orders, name='order_export'),
+    
+    # Attachments, uploaded in resumable chunks
+    path('orders/<int:order_id>/attachments/', views.ProcurementAttachmentListView.as_view(), name='attachment_list'),
+    path('orders/<int:order_id>/uploads/', views.AttachmentUploadCreateView.as_view(), name='attachment_upload_create'),
+    path('uploads/<uuid:upload_id>/', views.attachment_upload, name='attachment_upload'),
+    path('attachments/<int:pk>/download/', views.download_attachment, name='attachment_download'),
+    
+    # Work queue for procurement officers
+    path('queue/', views.ProcurementQueueView.as_view(), name='queue'),
+    
+    # Spend analytics
+    path('analytics/spend/', views.procurement_spend, name='spend'),
+]
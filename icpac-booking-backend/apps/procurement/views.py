@@ -1,3 +1,248 @@
-from django.shortcuts import render
+"""
+Procurement views for ICPAC Booking System
+"""
+from datetime import datetime
+from rest_framework import generics, permissions, status
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from icpac_booking.exports import EXPORT_CHUNK_SIZE, ExportRenderer, stream_export
+from icpac_booking.downloads import ranged_file_response
+from .analytics import spend_report
+from .models import AttachmentUpload, ProcurementAttachment, ProcurementOrder
+from .scoping import scope_procurement_orders
+from .serializers import (
+    AttachmentUploadSerializer,
+    ProcurementAttachmentSerializer,
+    ProcurementOrderSerializer,
+    ProcurementOrderCreateSerializer
+)
+from .uploads import UploadError, store_chunk
 
-# Create your views here.
+
+class ProcurementOrderListView(generics.ListCreateAPIView):
+    """
+    List all procurement orders or create a new one
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_serializer_class(self):
+        if self.request.method == 'POST':
+            return ProcurementOrderCreateSerializer
+        return ProcurementOrderSerializer
+    
+    def get_queryset(self):
+        # Super admin and procurement officers see all orders, room admins
+        # orders for their managed rooms plus their own, regular users orders
+        # they created or that belong to their bookings
+        return scope_procurement_orders(
+            ProcurementOrder.objects.select_related(
+                'booking__room', 'booking__user', 'created_by'
+            ).order_by('-created_at'),
+            self.request.user.access_scope
+        )
+
+
+class ProcurementOrderDetailView(generics.RetrieveUpdateDestroyAPIView):
+    """
+    Retrieve, update or delete a procurement order
+    """
+    queryset = ProcurementOrder.objects.all()
+    serializer_class = ProcurementOrderSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        return scope_procurement_orders(
+            ProcurementOrder.objects.select_related('booking__room', 'booking__user', 'created_by'),
+            self.request.user.access_scope
+        )
+    
+    def perform_update(self, serializer):
+        # Only procurement officers and super admin can update order status
+        if (self.request.user.role not in ['super_admin', 'procurement_officer'] and
+            'status' in self.request.data):
+            raise PermissionDenied('Only procurement officers can update order status.')
+        
+        serializer.save()
+    
+    def perform_destroy(self, instance):
+        # Only creator or super admin can delete
+        if (instance.created_by != self.request.user and 
+            self.request.user.role != 'super_admin'):
+            raise PermissionDenied('You can only delete your own orders.')
+        
+        instance.delete()
+
+
+PROCUREMENT_EXPORT_COLUMNS = [
+    ('id', 'ID'),
+    ('booking_id', 'Booking ID'),
+    ('booking__purpose', 'Booking purpose'),
+    ('booking__room__name', 'Room'),
+    ('booking__user__department', 'Department'),
+    ('order_type', 'Order type'),
+    ('items_description', 'Items'),
+    ('estimated_cost', 'Estimated cost'),
+    ('priority', 'Priority'),
+    ('status', 'Status'),
+    ('due_at', 'Due at'),
+    ('created_by__email', 'Created by'),
+    ('created_at', 'Created at'),
+]
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+@renderer_classes([JSONRenderer, ExportRenderer])
+def export_procurement_orders(request, extension):
+    """
+    Download the procurement orders visible to the user as CSV or XLSX
+    """
+    queryset = scope_procurement_orders(
+        ProcurementOrder.objects.order_by('-created_at'),
+        request.user.access_scope
+    )
+    fields, header = zip(*PROCUREMENT_EXPORT_COLUMNS)
+    rows = queryset.values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    try:
+        return stream_export('procurement-orders', header, rows, extension)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class ProcurementQueueView(generics.ListAPIView):
+    """
+    Open procurement orders for procurement officers, most urgent and
+    soonest due first
+    """
+    serializer_class = ProcurementOrderSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        if self.request.user.role not in ['super_admin', 'procurement_officer']:
+            raise PermissionDenied('Only procurement officers can view the work queue.')
+        
+        queryset = ProcurementOrder.objects.select_related(
+            'booking__room', 'booking__user', 'created_by'
+        )
+        status = self.request.query_params.get('status')
+        if status:
+            queryset = queryset.filter(status=status)
+        else:
+            queryset = queryset.open()
+        
+        priority = self.request.query_params.get('priority')
+        if priority:
+            queryset = queryset.filter(priority=priority)
+        
+        return queryset.due_soon()
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def procurement_spend(request):
+    """
+    Spend by month, order type, room and department, with estimated and
+    delivered totals. Takes ``year=YYYY`` or ``start=YYYY-MM&end=YYYY-MM``
+    and defaults to the current year.
+    """
+    if request.user.role not in ['super_admin', 'procurement_officer']:
+        raise PermissionDenied('Only procurement officers can view spend analytics.')
+    
+    try:
+        if request.query_params.get('start') or request.query_params.get('end'):
+            start = datetime.strptime(request.query_params['start'], '%Y-%m')
+            end = datetime.strptime(request.query_params['end'], '%Y-%m')
+        else:
+            year = int(request.query_params.get('year', timezone.localdate().year))
+            start, end = datetime(year, 1, 1), datetime(year, 12, 1)
+    except (KeyError, ValueError):
+        return Response(
+            {'error': 'Use year=YYYY, or both start and end as YYYY-MM.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    months = (end.year - start.year) * 12 + end.month - start.month + 1
+    if not 1 <= months <= 60:
+        return Response(
+            {'error': 'The range must cover between 1 and 60 months.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    return Response(spend_report((start.year, start.month), (end.year, end.month)))
+
+
+def visible_order(request, order_id):
+    """The procurement order ``order_id`` if the user may see it, else 404"""
+    return get_object_or_404(
+        scope_procurement_orders(ProcurementOrder.objects.all(), request.user.access_scope),
+        pk=order_id
+    )
+
+
+class ProcurementAttachmentListView(generics.ListAPIView):
+    """
+    List the documents attached to a procurement order
+    """
+    serializer_class = ProcurementAttachmentSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        order = visible_order(self.request, self.kwargs['order_id'])
+        return order.attachments.select_related('uploaded_by')
+
+
+class AttachmentUploadCreateView(generics.CreateAPIView):
+    """
+    Open a chunked upload of a document for a procurement order
+    """
+    serializer_class = AttachmentUploadSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def perform_create(self, serializer):
+        order = visible_order(self.request, self.kwargs['order_id'])
+        serializer.save(order=order, uploaded_by=self.request.user)
+
+
+@api_view(['GET', 'PUT'])
+@permission_classes([permissions.IsAuthenticated])
+def attachment_upload(request, upload_id):
+    """
+    GET returns the offset to resume from; PUT sends the next chunk as the
+    raw request body with a ``Content-Range`` header
+    """
+    upload = get_object_or_404(AttachmentUpload, pk=upload_id, uploaded_by=request.user)
+    
+    if request.method == 'PUT':
+        try:
+            upload = store_chunk(upload.pk, request.headers.get('Content-Range'), request.stream)
+        except UploadError as e:
+            upload.refresh_from_db()
+            return Response(
+                {'error': str(e), 'offset': upload.offset},
+                status=e.status
+            )
+    
+    # The chunk that completes the upload creates the attachment
+    completed = request.method == 'PUT' and upload.status == 'complete'
+    serializer = AttachmentUploadSerializer(upload, context={'request': request})
+    return Response(serializer.data, status=status.HTTP_201_CREATED if completed else status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+@renderer_classes([JSONRenderer, ExportRenderer])
+def download_attachment(request, pk):
+    """
+    Download an attachment; single byte ranges are served as 206 responses
+    """
+    attachment = get_object_or_404(
+        ProcurementAttachment.objects.filter(order__in=scope_procurement_orders(
+            ProcurementOrder.objects.all(), request.user.access_scope
+        )),
+        pk=pk
+    )
+    return ranged_file_response(request, attachment.file, attachment.filename, attachment.content_type)
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.7 on 2026-10-19 17:57
+
+import apps.rooms.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='room',
+            name='closing_time',
+            field=models.TimeField(default=apps.rooms.models.default_closing_time, help_text='End of the hours alternative slots are suggested in'),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='opening_time',
+            field=models.TimeField(default=apps.rooms.models.default_opening_time, help_text='Start of the hours alternative slots are suggested in'),
+        ),
+    ]
@@ -3,6 +3,15 @@ Room models for ICPAC Booking System
 """
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
+from datetime import time as datetime_time, timedelta
+
+
+def default_opening_time():
+    return datetime_time(8)
+
+
+def default_closing_time():
+    return datetime_time(18)
 
 
 class Room(models.Model):
@@ -82,6 +91,16 @@ class Room(models.Model):
         help_text='Maximum booking duration in hours'
     )
     
+    opening_time = models.TimeField(
+        default=default_opening_time,
+        help_text='Start of the hours alternative slots are suggested in'
+    )
+    
+    closing_time = models.TimeField(
+        default=default_closing_time,
+        help_text='End of the hours alternative slots are suggested in'
+    )
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -124,11 +143,61 @@ class Room(models.Model):
         """Get all bookings for a specific date"""
         from apps.bookings.models import Booking
         return Booking.objects.filter(
+            occurrences__room=self,
+            occurrences__date=date,
+            occurrences__approval_status__in=['pending', 'approved']
+        ).order_by('start_at')
+    
+    def get_availability_for_date(self, date, start_time=None, end_time=None):
+        """
+        Get booked and free periods of a day from its booking occurrences.
+        
+        With ``start_time`` and ``end_time``, ``is_available`` tells whether
+        that slot is free; otherwise whether any part of the day is free.
+        """
+        from apps.bookings.models import BookingOccurrence, combine_datetime
+        
+        occurrences = BookingOccurrence.objects.filter(
             room=self,
-            start_date__lte=date,
-            end_date__gte=date,
+            date=date,
             approval_status__in=['pending', 'approved']
-        ).order_by('start_time')
+        ).order_by('start_at').values(
+            'booking_id', 'booking__purpose', 'approval_status', 'start_at', 'end_at'
+        )
+        
+        day_start = combine_datetime(date, datetime_time.min)
+        day_end = day_start + timedelta(days=1)
+        booked_slots = []
+        free_slots = []
+        free_from = day_start
+        for occurrence in occurrences:
+            booked_slots.append({
+                'booking_id': occurrence['booking_id'],
+                'purpose': occurrence['booking__purpose'],
+                'status': occurrence['approval_status'],
+                'start': occurrence['start_at'],
+                'end': occurrence['end_at'],
+            })
+            if occurrence['start_at'] > free_from:
+                free_slots.append({'start': free_from, 'end': occurrence['start_at']})
+            free_from = max(free_from, occurrence['end_at'])
+        if free_from < day_end:
+            free_slots.append({'start': free_from, 'end': day_end})
+        
+        if start_time and end_time:
+            slot_start = combine_datetime(date, start_time)
+            slot_end = combine_datetime(date, end_time)
+            is_available = not any(
+                slot['start'] < slot_end and slot['end'] > slot_start for slot in booked_slots
+            )
+        else:
+            is_available = bool(free_slots)
+        
+        return {
+            'is_available': self.is_active and is_available,
+            'booked_slots': booked_slots,
+            'free_slots': free_slots,
+        }
 
 
 class RoomAmenity(models.Model):
@@ -2,7 +2,7 @@
 Room serializers for ICPAC Booking System
 """
 from rest_framework import serializers
-from .models import Room, RoomAmenity
+from .models import Room, RoomAmenity, default_closing_time, default_opening_time
 
 
 class RoomAmenitySerializer(serializers.ModelSerializer):
@@ -30,7 +30,7 @@ class RoomSerializer(serializers.ModelSerializer):
             'location', 'description', 'amenities', 'amenities_list',
             'image', 'is_active', 'is_large_room',
             'advance_booking_days', 'min_booking_duration', 'max_booking_duration',
-            'created_at', 'updated_at'
+            'opening_time', 'closing_time', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
     
@@ -87,8 +87,8 @@ class RoomDetailSerializer(RoomSerializer):
         
         upcoming = obj.bookings.filter(
             approval_status='approved',
-            start_date__gte=timezone.now().date()
-        ).order_by('start_date', 'start_time')[:5]
+            end_at__gt=timezone.now()
+        ).select_related('user').order_by('start_at')[:5]
         
         # Return simple representation to avoid circular imports
         return [
@@ -158,7 +158,8 @@ class RoomCreateUpdateSerializer(serializers.ModelSerializer):
         fields = [
             'name', 'capacity', 'category', 'location', 'description',
             'amenities', 'image', 'is_active',
-            'advance_booking_days', 'min_booking_duration', 'max_booking_duration'
+            'advance_booking_days', 'min_booking_duration', 'max_booking_duration',
+            'opening_time', 'closing_time'
         ]
     
     def validate_name(self, value):
@@ -191,6 +192,13 @@ class RoomCreateUpdateSerializer(serializers.ModelSerializer):
                 'max_booking_duration': 'Maximum duration must be greater than minimum duration.'
             })
         
+        opening_time = attrs.get('opening_time', getattr(self.instance, 'opening_time', default_opening_time()))
+        closing_time = attrs.get('closing_time', getattr(self.instance, 'closing_time', default_closing_time()))
+        if opening_time >= closing_time:
+            raise serializers.ValidationError({
+                'closing_time': 'Closing time must be after opening time.'
+            })
+        
         if attrs.get('advance_booking_days', 30) > 365:
             raise serializers.ValidationError({
                 'advance_booking_days': 'Advance booking days cannot exceed 365.'
@@ -0,0 +1,16 @@
+"""
+Room signal handlers for ICPAC Booking System
+"""
+from django.dispatch import receiver
+
+from apps.bookings.signals import bookings_status_changed
+
+from .stats import invalidate_room_utilization
+from .status import invalidate_room_status
+
+
+@receiver(bookings_status_changed)
+def booking_statuses_changed(sender, room_ids, **kwargs):
+    """Drop the cached room status and utilization after bulk status changes"""
+    invalidate_room_status()
+    invalidate_room_utilization()
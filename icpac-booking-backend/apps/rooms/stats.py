@@ -0,0 +1,82 @@
+"""
+Room utilization statistics for ICPAC Booking System
+
+Utilization is the share of working hours in a date range covered by
+approved bookings on those days. The rolling 30-day figures shown
+on the rooms overview are rolled up periodically by
+``apps.rooms.tasks.rollup_room_utilization`` and served from the cache.
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, DurationField, F, Sum
+from django.utils import timezone
+
+WORKING_HOURS_PER_DAY = 8  # Assume 8 working hours per day
+ROLLUP_DAYS = 30
+ROLLUP_CACHE_KEY = 'room_utilization:rollup'
+ROLLUP_CACHE_TIMEOUT = 60 * 60  # 1 hour, refreshed every 10 minutes
+
+
+def room_utilization(start_date, end_date, room_ids=None):
+    """
+    Return ``{room_id: {'total_bookings', 'booked_hours'}}`` for approved
+    bookings on the days from ``start_date`` to ``end_date``, aggregated per
+    room in one query over their per-day occurrences. Multi-day bookings only
+    count the hours that fall inside the range.
+    """
+    from apps.bookings.models import BookingOccurrence
+
+    occurrences = BookingOccurrence.objects.filter(
+        approval_status='approved',
+        date__range=[start_date, end_date]
+    )
+    if room_ids is not None:
+        occurrences = occurrences.filter(room_id__in=room_ids)
+
+    rows = (
+        occurrences.order_by()
+        .values('room_id')
+        .annotate(
+            total_bookings=Count('booking_id', distinct=True),
+            booked=Sum(F('end_at') - F('start_at'), output_field=DurationField()),
+        )
+    )
+    return {
+        row['room_id']: {
+            'total_bookings': row['total_bookings'],
+            'booked_hours': row['booked'].total_seconds() / 3600,
+        }
+        for row in rows
+    }
+
+def utilization_rate(booked_hours, start_date, end_date):
+    """Booked hours as a percentage of the working hours in the range"""
+    total_available_hours = ((end_date - start_date).days + 1) * WORKING_HOURS_PER_DAY
+    return (booked_hours / total_available_hours * 100) if total_available_hours > 0 else 0
+
+
+def rollup_room_utilization(today=None):
+    """Compute the rolling 30-day utilization of every room and cache it"""
+    end_date = today or timezone.now().date()
+    start_date = end_date - timedelta(days=ROLLUP_DAYS)
+    rollup = {
+        'start_date': start_date,
+        'end_date': end_date,
+        'rooms': room_utilization(start_date, end_date),
+    }
+    cache.set(ROLLUP_CACHE_KEY, rollup, ROLLUP_CACHE_TIMEOUT)
+    return rollup
+
+
+def cached_room_utilization(start_date, end_date, room_ids=None):
+    """Serve utilization from the rollup when it covers the range, else compute it"""
+    rollup = cache.get(ROLLUP_CACHE_KEY)
+    if rollup and rollup['start_date'] == start_date and rollup['end_date'] == end_date:
+        return rollup['rooms']
+    return room_utilization(start_date, end_date, room_ids)
+
+
+def invalidate_room_utilization():
+    """Drop the rollup; ranges are computed directly until the next rollup"""
+    cache.delete(ROLLUP_CACHE_KEY)
@@ -0,0 +1,141 @@
+"""
+Live room status for ICPAC Booking System
+
+Lobby and kiosk screens show whether each room is busy or free right now and
+until when. The status of every active room is computed from one query over
+the approved booking occurrences of today and tomorrow, and shared through
+the cache for ``STATUS_CACHE_TIMEOUT`` seconds, so any number of screens
+polling the endpoint or listening on the event stream cost one query per
+refresh interval. The event stream is meant to be served under ASGI.
+"""
+import asyncio
+import json
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import FilteredRelation, Q
+from django.utils import timezone
+
+STATUS_CACHE_KEY = 'room_status:snapshot'
+STATUS_CACHE_TIMEOUT = 15
+# Streams are closed after a while so that long-lived connections are spread
+# over workers; EventSource reconnects on its own after ``retry``.
+STREAM_MAX_SECONDS = 5 * 60
+STREAM_RETRY_MILLISECONDS = 5000
+
+
+def build_room_status(now=None):
+    """
+    Return ``{'generated_at', 'rooms'}`` where each room is
+    ``{'id', 'name', 'location', 'status', 'until'}``. A busy room is busy
+    until its back-to-back bookings end; a free room is free until its next
+    booking starts, or ``None`` when nothing is booked before tomorrow ends.
+    """
+    from .models import Room
+
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    rows = Room.objects.filter(is_active=True).annotate(
+        upcoming=FilteredRelation('booking_occurrences', condition=Q(
+            booking_occurrences__approval_status='approved',
+            booking_occurrences__date__range=[today, today + timedelta(days=1)],
+            booking_occurrences__end_at__gt=now,
+        ))
+    ).order_by('name', 'id', 'upcoming__start_at').values_list(
+        'id', 'name', 'location', 'upcoming__start_at', 'upcoming__end_at'
+    )
+
+    rooms = {}
+    slots = {}
+    for room_id, name, location, start_at, end_at in rows:
+        rooms.setdefault(room_id, {'id': room_id, 'name': name, 'location': location})
+        slots.setdefault(room_id, [])
+        if start_at is not None:
+            slots[room_id].append((start_at, end_at))
+
+    for room_id, room in rooms.items():
+        room_slots = slots[room_id]
+        if room_slots and room_slots[0][0] <= now:
+            until = room_slots[0][1]
+            for start_at, end_at in room_slots[1:]:
+                if start_at > until:
+                    break
+                until = max(until, end_at)
+            room.update(status='busy', until=until)
+        else:
+            room.update(status='free', until=room_slots[0][0] if room_slots else None)
+
+    return {'generated_at': now, 'rooms': list(rooms.values())}
+
+
+def get_room_status():
+    """The shared status snapshot, rebuilt at most once per cache timeout"""
+    snapshot = cache.get(STATUS_CACHE_KEY)
+    if snapshot is None:
+        snapshot = build_room_status()
+        cache.set(STATUS_CACHE_KEY, snapshot, STATUS_CACHE_TIMEOUT)
+    return snapshot
+
+
+def invalidate_room_status():
+    """Drop the snapshot so the next request rebuilds it"""
+    cache.delete(STATUS_CACHE_KEY)
+
+
+def changed_rooms(previous, rooms):
+    """Rooms whose status differs from the ``{id: room}`` map last sent"""
+    return [room for room in rooms if previous.get(room['id']) != room]
+
+
+def format_event(event, data):
+    """Serialize one Server-Sent Event"""
+    return f'event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n'
+
+
+def room_status_snapshot_events():
+    """
+    The ``retry`` hint and one ``status`` event with every room, for WSGI
+    workers that must not be held open; screens reconnect after ``retry``
+    """
+    snapshot = get_room_status()
+    return [f'retry: {STREAM_RETRY_MILLISECONDS}\n\n', format_event('status', snapshot)]
+
+
+async def aget_room_status():
+    """``get_room_status`` for async code"""
+    snapshot = await cache.aget(STATUS_CACHE_KEY)
+    if snapshot is None:
+        snapshot = await sync_to_async(build_room_status)()
+        await cache.aset(STATUS_CACHE_KEY, snapshot, STATUS_CACHE_TIMEOUT)
+    return snapshot
+
+
+async def room_status_events(interval=STATUS_CACHE_TIMEOUT, max_seconds=STREAM_MAX_SECONDS,
+                             sleep=asyncio.sleep, clock=time.monotonic):
+    """
+    Yield a ``status`` event with every room first, then only the rooms
+    whose status changed since the last event. Intervals without changes
+    send a comment line to keep proxies from closing the connection.
+
+    An async generator, so under ASGI a waiting stream holds no thread.
+    WSGI servers can only serve it by reading it to the end; they send
+    ``room_status_snapshot_events`` instead.
+    """
+    yield f'retry: {STREAM_RETRY_MILLISECONDS}\n\n'
+    previous = {}
+    started = clock()
+    while True:
+        snapshot = await aget_room_status()
+        changed = changed_rooms(previous, snapshot['rooms'])
+        previous = {room['id']: room for room in snapshot['rooms']}
+        if changed:
+            yield format_event('status', {'generated_at': snapshot['generated_at'], 'rooms': changed})
+        else:
+            yield ': keep-alive\n\n'
+
+        if clock() - started + interval > max_seconds:
+            return
+        await sleep(interval)
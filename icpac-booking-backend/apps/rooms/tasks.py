@@ -0,0 +1,12 @@
+"""
+Celery tasks for ICPAC Booking System rooms
+"""
+from celery import shared_task
+
+from .stats import rollup_room_utilization as rollup
+
+
+@shared_task(ignore_result=True)
+def rollup_room_utilization():
+    """Refresh the cached 30-day utilization shown on the rooms overview"""
+    rollup()
@@ -1,3 +1,172 @@
-from django.test import TestCase
+import json
+from datetime import time, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import F
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.bookings.expiry import expire_stale_bookings
+from apps.bookings.models import Booking
+from .models import Room
+from .stats import ROLLUP_CACHE_KEY, room_utilization
+from .status import STATUS_CACHE_KEY, build_room_status, get_room_status, room_status_events
+from .tasks import rollup_room_utilization
+
+User = get_user_model()
+
+
+class RoomUtilizationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            username='super', email='super@icpac.net', password='pass12345', role='super_admin'
+        )
+        self.rooms = [
+            Room.objects.create(name=f'Room {index}', capacity=20, category='meeting_room')
+            for index in range(4)
+        ]
+        tomorrow = timezone.now().date() + timedelta(days=1)
+        for index, room in enumerate(self.rooms[:3]):
+            for hour in range(index + 1):
+                booking = Booking.objects.create(
+                    room=room, user=self.admin, purpose='Meeting', start_date=tomorrow,
+                    end_date=tomorrow, start_time=time(9 + hour), end_time=time(10 + hour),
+                    approval_status='approved'
+                )
+                # Move into the past 30 days, which cannot be booked directly
+                shift = timedelta(days=6)
+                Booking.objects.filter(pk=booking.pk).update(
+                    start_date=F('start_date') - shift, end_date=F('end_date') - shift,
+                    start_at=F('start_at') - shift, end_at=F('end_at') - shift
+                )
+                booking.refresh_from_db()
+                booking.sync_occurrences()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def overview(self):
+        response = self.client.get('/api/rooms/stats/overview/')
+        self.assertEqual(response.status_code, 200)
+        return {row['name']: row for row in response.data['room_statistics']}
+
+    def test_overview_queries_do_not_grow_with_rooms(self):
+        with self.assertNumQueries(5):
+            stats = self.overview()
+        self.assertEqual(stats['Room 2']['total_bookings'], 3)
+        self.assertEqual(stats['Room 2']['utilization_rate'], round(3 / (31 * 8) * 100, 2))
+        self.assertEqual(stats['Room 3']['total_bookings'], 0)
+
+    def test_booked_hours_are_summed_per_room(self):
+        day = timezone.now().date() - timedelta(days=5)
+        with self.assertNumQueries(1):
+            usage = room_utilization(day, day, room_ids=[room.id for room in self.rooms[1:]])
+        self.assertEqual(usage, {
+            self.rooms[1].id: {'total_bookings': 2, 'booked_hours': 2.0},
+            self.rooms[2].id: {'total_bookings': 3, 'booked_hours': 3.0},
+        })
+
+    def test_overview_serves_rollup(self):
+        rollup_room_utilization.delay()
+        with self.assertNumQueries(4):
+            stats = self.overview()
+        self.assertEqual(stats['Room 1']['total_bookings'], 2)
+
+
+class RoomStatusTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='member', email='member@icpac.net', password='pass12345'
+        )
+        self.rooms = [
+            Room.objects.create(name=f'Room {index}', capacity=20, category='meeting_room')
+            for index in range(3)
+        ]
+        self.tomorrow = timezone.now().date() + timedelta(days=1)
+        self.book(self.rooms[0], 9, 10)
+        self.book(self.rooms[0], 10, 11)
+        self.book(self.rooms[0], 12, 13)
+        self.book(self.rooms[1], 14, 15)
+        self.book(self.rooms[2], 9, 10, approval_status='pending')
+
+    def book(self, room, start_hour, end_hour, approval_status='approved'):
+        return Booking.objects.create(
+            room=room, user=self.user, purpose='Meeting', start_date=self.tomorrow,
+            end_date=self.tomorrow, start_time=time(start_hour), end_time=time(end_hour),
+            approval_status=approval_status
+        )
+
+    def at(self, hour, minute=0):
+        return timezone.make_aware(
+            timezone.datetime.combine(self.tomorrow, time(hour, minute))
+        )
+
+    def test_status_of_all_rooms_in_one_query(self):
+        with self.assertNumQueries(1):
+            rooms = {room['name']: room for room in build_room_status(self.at(9, 30))['rooms']}
+        self.assertEqual((rooms['Room 0']['status'], rooms['Room 0']['until']), ('busy', self.at(11)))
+        self.assertEqual((rooms['Room 1']['status'], rooms['Room 1']['until']), ('free', self.at(14)))
+        self.assertEqual((rooms['Room 2']['status'], rooms['Room 2']['until']), ('free', None))
+
+    def test_endpoint_serves_shared_snapshot(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with self.assertNumQueries(1):
+            response = client.get('/api/rooms/status/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['rooms']), 3)
+        with self.assertNumQueries(0):
+            client.get('/api/rooms/status/')
+
+    def test_expiry_sweep_drops_cached_status_and_utilization(self):
+        get_room_status()
+        rollup_room_utilization.delay()
+        Booking.objects.filter(approval_status='pending').update(start_at=timezone.now())
+        self.assertEqual(expire_stale_bookings(), 1)
+        self.assertIsNone(cache.get(STATUS_CACHE_KEY))
+        self.assertIsNone(cache.get(ROLLUP_CACHE_KEY))
+
+    async def collect_events(self, **kwargs):
+        async def no_sleep(seconds):
+            pass
+        return [event async for event in room_status_events(sleep=no_sleep, **kwargs)]
+
+    def test_stream_only_emits_changes(self):
+        snapshots = [build_room_status(self.at(hour)) for hour in (8, 8, 9)]
+        with mock.patch('apps.rooms.status.aget_room_status', side_effect=snapshots):
+            events = async_to_sync(self.collect_events)(
+                interval=1, max_seconds=2, clock=iter([0, 0, 1, 2]).__next__
+            )
+
+        self.assertTrue(events[0].startswith('retry:'))
+        first = json.loads(events[1].split('data: ', 1)[1])
+        self.assertEqual(len(first['rooms']), 3)
+        self.assertEqual(events[2], ': keep-alive\n\n')
+        changed = json.loads(events[3].split('data: ', 1)[1])
+        self.assertEqual([(room['name'], room['status']) for room in changed['rooms']], [('Room 0', 'busy')])
+        self.assertEqual(len(events), 4)
+
+    def test_stream_endpoint_under_wsgi_sends_one_snapshot(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get('/api/rooms/status/stream/', HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = list(response.streaming_content)
+        self.assertEqual(len(chunks), 2)
+        self.assertIn(b'event: status', chunks[1])
+
+    async def test_stream_endpoint_under_asgi_streams_events(self):
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        response = await client.get('/api/rooms/status/stream/', headers={'accept': 'text/event-stream'})
+        self.assertEqual(response.status_code, 200)
+        chunks = aiter(response.streaming_content)
+        self.assertTrue((await anext(chunks)).startswith(b'retry:'))
+        self.assertIn(b'event: status', await anext(chunks))
+        await chunks.aclose()
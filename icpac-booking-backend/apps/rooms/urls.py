@@ -21,6 +21,10 @@ urlpatterns = [
     path('<int:room_id>/stats/', views.room_booking_stats, name='room_stats'),
     path('stats/overview/', views.rooms_overview_stats, name='rooms_overview_stats'),
     
+    # Live status for lobby screens
+    path('status/', views.room_status, name='room_status'),
+    path('status/stream/', views.room_status_stream, name='room_status_stream'),
+    
     # Room categories
     path('categories/', views.room_categories, name='room_categories'),
 ]
\ No newline at end of file
@@ -1,13 +1,26 @@
 """
 Room views for ICPAC Booking System
 """
+import asyncio
+
 from rest_framework import generics, status, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, renderer_classes
+from rest_framework.renderers import BaseRenderer
 from rest_framework.response import Response
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from django.db.models import Q, Count, Avg
 from datetime import datetime, timedelta
+from asgiref.sync import sync_to_async
+from apps.authentication.authentication import TokenUserAuthentication
+from icpac_booking.async_views import alist, async_api_view
+from icpac_booking.db_routing import read_only_view
 from .models import Room, RoomAmenity
+from .stats import cached_room_utilization, room_utilization, utilization_rate
+from .status import get_room_status, room_status_events, room_status_snapshot_events
 from .serializers import (
     RoomSerializer,
     RoomListSerializer,
@@ -24,6 +37,7 @@ class RoomListView(generics.ListCreateAPIView):
     List all rooms or create a new room
     """
     queryset = Room.objects.filter(is_active=True).order_by('name')
+    authentication_classes = [TokenUserAuthentication, SessionAuthentication]
     permission_classes = [permissions.IsAuthenticated]
     
     def get_serializer_class(self):
@@ -67,7 +81,7 @@ class RoomListView(generics.ListCreateAPIView):
     def perform_create(self, serializer):
         # Only super admin and room admin can create rooms
         if self.request.user.role not in ['super_admin', 'room_admin']:
-            raise permissions.PermissionDenied('Only admins can create rooms.')
+            raise PermissionDenied('Only admins can create rooms.')
         
         serializer.save()
 
@@ -87,14 +101,14 @@ class RoomDetailView(generics.RetrieveUpdateDestroyAPIView):
     def perform_update(self, serializer):
         # Only super admin and room admin can update rooms
         if self.request.user.role not in ['super_admin', 'room_admin']:
-            raise permissions.PermissionDenied('Only admins can update rooms.')
+            raise PermissionDenied('Only admins can update rooms.')
         
         serializer.save()
     
     def perform_destroy(self, instance):
         # Only super admin can delete rooms
         if self.request.user.role != 'super_admin':
-            raise permissions.PermissionDenied('Only super admins can delete rooms.')
+            raise PermissionDenied('Only super admins can delete rooms.')
         
         # Soft delete - just mark as inactive
         instance.is_active = False
@@ -112,25 +126,17 @@ class RoomAmenityListView(generics.ListCreateAPIView):
     def perform_create(self, serializer):
         # Only super admin can create amenities
         if self.request.user.role != 'super_admin':
-            raise permissions.PermissionDenied('Only super admins can create amenities.')
+            raise PermissionDenied('Only super admins can create amenities.')
         
         serializer.save()
 
 
-@api_view(['POST'])
-@permission_classes([permissions.IsAuthenticated])
-def check_room_availability(request, room_id):
+@read_only_view
+@async_api_view(['POST'], authentication_classes=[TokenUserAuthentication, SessionAuthentication])
+async def check_room_availability(request, room_id):
     """
     Check if a room is available for booking
     """
-    try:
-        room = Room.objects.get(id=room_id, is_active=True)
-    except Room.DoesNotExist:
-        return Response(
-            {'error': 'Room not found.'}, 
-            status=status.HTTP_404_NOT_FOUND
-        )
-    
     serializer = RoomAvailabilitySerializer(data=request.data)
     if not serializer.is_valid():
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -139,9 +145,14 @@ def check_room_availability(request, room_id):
     start_time = serializer.validated_data.get('start_time')
     end_time = serializer.validated_data.get('end_time')
     
-    # Get availability for the entire day or specific time slot
-    availability_data = room.get_availability_for_date(date, start_time, end_time)
+    room = await Room.objects.filter(id=room_id, is_active=True).afirst()
+    if room is None:
+        return Response(
+            {'error': 'Room not found.'}, 
+            status=status.HTTP_404_NOT_FOUND
+        )
     
+    availability_data = await sync_to_async(room.get_availability_for_date)(date, start_time, end_time)
     return Response({
         'room_id': room.id,
         'room_name': room.name,
@@ -166,9 +177,8 @@ def room_booking_stats(request, room_id):
     
     # Only room admin can view stats for their rooms, or super admin
     if (request.user.role == 'room_admin' and 
-        room not in request.user.managed_rooms.all() and 
-        request.user.role != 'super_admin'):
-        raise permissions.PermissionDenied('You can only view stats for rooms you manage.')
+        not request.user.can_manage_room(room)):
+        raise PermissionDenied('You can only view stats for rooms you manage.')
     
     # Get date range (default: last 30 days)
     end_date = timezone.now().date()
@@ -191,9 +201,7 @@ def room_booking_stats(request, room_id):
             pass
     
     # Get bookings in date range
-    bookings = room.bookings.filter(
-        start_date__range=[start_date, end_date]
-    )
+    bookings = room.bookings.starting_between(start_date, end_date)
     
     total_bookings = bookings.count()
     approved_bookings = bookings.filter(approval_status='approved').count()
@@ -205,10 +213,8 @@ def room_booking_stats(request, room_id):
     total_available_hours = total_days * working_hours_per_day
     
     # Sum up approved booking durations
-    total_booked_hours = 0
-    for booking in bookings.filter(approval_status='approved'):
-        duration = booking.get_duration_hours()
-        total_booked_hours += duration
+    usage = room_utilization(start_date, end_date, room_ids=[room.id]).get(room.id)
+    total_booked_hours = usage['booked_hours'] if usage else 0
     
     utilization_rate = (total_booked_hours / total_available_hours * 100) if total_available_hours > 0 else 0
     
@@ -241,24 +247,13 @@ def room_booking_stats(request, room_id):
     return Response(stats_data)
 
 
-@api_view(['GET'])
-@permission_classes([permissions.IsAuthenticated])
-def rooms_overview_stats(request):
+@async_api_view(['GET'])
+async def rooms_overview_stats(request):
     """
     Get overview statistics for all rooms (admin only)
     """
     if request.user.role not in ['super_admin', 'room_admin']:
-        raise permissions.PermissionDenied('Only admins can view room statistics.')
-    
-    # Get rooms based on user role
-    if request.user.role == 'super_admin':
-        rooms = Room.objects.filter(is_active=True)
-    else:
-        # Room admin can only see their managed rooms
-        rooms = request.user.managed_rooms.filter(is_active=True)
-    
-    # Calculate overall stats
-    total_rooms = rooms.count()
+        raise PermissionDenied('Only admins can view room statistics.')
     
     # Get booking stats for last 30 days
     end_date = timezone.now().date()
@@ -266,44 +261,44 @@ def rooms_overview_stats(request):
     
     from apps.bookings.models import Booking
     
+    # Get rooms based on user role
     if request.user.role == 'super_admin':
-        recent_bookings = Booking.objects.filter(
-            start_date__range=[start_date, end_date]
-        )
+        rooms = Room.objects.filter(is_active=True)
+        room_ids = None
+        recent_bookings = Booking.objects.starting_between(start_date, end_date)
     else:
-        room_ids = rooms.values_list('id', flat=True)
+        # Room admin can only see their managed rooms
+        scope = await sync_to_async(lambda: request.user.access_scope)()
+        room_ids = list(scope.managed_room_ids)
+        rooms = Room.objects.filter(id__in=room_ids, is_active=True)
         recent_bookings = Booking.objects.filter(
-            room_id__in=room_ids,
-            start_date__range=[start_date, end_date]
-        )
-    
-    total_bookings = recent_bookings.count()
-    approved_bookings = recent_bookings.filter(approval_status='approved').count()
-    pending_bookings = recent_bookings.filter(approval_status='pending').count()
+            room_id__in=rooms.values('id')
+        ).starting_between(start_date, end_date)
+    
+    # The counts, the rooms and their utilization (served from the periodic
+    # rollup when it is current) are independent, so they are issued together
+    total_bookings, approved_bookings, pending_bookings, room_list, usage = await asyncio.gather(
+        recent_bookings.acount(),
+        recent_bookings.filter(approval_status='approved').acount(),
+        recent_bookings.filter(approval_status='pending').acount(),
+        alist(rooms.order_by('name')),
+        sync_to_async(cached_room_utilization)(start_date, end_date, room_ids=room_ids),
+    )
+    total_rooms = len(room_list)
     
-    # Room utilization by category
     room_stats = []
-    for room in rooms.order_by('name'):
-        room_bookings = recent_bookings.filter(room=room, approval_status='approved')
-        
-        # Calculate utilization
-        total_days = (end_date - start_date).days + 1
-        working_hours_per_day = 8
-        total_available_hours = total_days * working_hours_per_day
-        
-        total_booked_hours = sum([
-            booking.get_duration_hours() for booking in room_bookings
-        ])
-        
-        utilization_rate = (total_booked_hours / total_available_hours * 100) if total_available_hours > 0 else 0
+    for room in room_list:
+        room_usage = usage.get(room.id, {'total_bookings': 0, 'booked_hours': 0})
         
         room_stats.append({
             'id': room.id,
             'name': room.name,
             'category': room.category,
             'capacity': room.capacity,
-            'total_bookings': room_bookings.count(),
-            'utilization_rate': round(utilization_rate, 2)
+            'total_bookings': room_usage['total_bookings'],
+            'utilization_rate': round(
+                utilization_rate(room_usage['booked_hours'], start_date, end_date), 2
+            )
         })
     
     # Sort by utilization rate (most used first)
@@ -325,6 +320,7 @@ def rooms_overview_stats(request):
 
 
 @api_view(['GET'])
+@authentication_classes([TokenUserAuthentication, SessionAuthentication])
 @permission_classes([permissions.IsAuthenticated])
 def room_categories(request):
     """
@@ -355,3 +351,42 @@ def room_categories(request):
         'categories': category_data,
         'total_categories': len(category_data)
     })
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Lets ``text/event-stream`` requests through content negotiation"""
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
+
+
+@api_view(['GET'])
+@authentication_classes([TokenUserAuthentication, SessionAuthentication])
+@permission_classes([permissions.IsAuthenticated])
+def room_status(request):
+    """
+    Busy/free status of every active room right now, for lobby screens
+    """
+    return Response(get_room_status())
+
+
+@api_view(['GET'])
+@authentication_classes([TokenUserAuthentication, SessionAuthentication])
+@permission_classes([permissions.IsAuthenticated])
+@renderer_classes([EventStreamRenderer])
+def room_status_stream(request):
+    """
+    Server-Sent Events stream of room status changes. Under WSGI only the
+    current status is sent, so the stream does not hold a worker.
+    """
+    if isinstance(request._request, ASGIRequest):
+        events = room_status_events()
+    else:
+        events = room_status_snapshot_events()
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,15 @@
+"""
+Gunicorn configuration for ICPAC Booking System
+
+Loaded automatically when gunicorn starts from this directory. With
+PROMETHEUS_MULTIPROC_DIR set, the metrics files of exited workers are
+removed so /metrics only aggregates live ones.
+"""
+import os
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,92 @@
+"""
+Async API views for ICPAC Booking System
+
+DRF 3.14 views are synchronous, so under ASGI every request to one holds a
+worker thread for as long as its queries take. Read endpoints that fan
+out into several independent queries are written as ``async def`` views
+instead, using Django's async ORM and ``asyncio.gather``, and wrapped in
+``async_api_view``. The wrapper authenticates and checks permissions with
+the DRF classes the sync views use, converts DRF exceptions to error
+responses and renders the returned ``Response`` as JSON, so clients and
+tests see no difference.
+
+Django 5.0 still runs each ORM call in the thread-sensitive executor; the
+event loop is free while they run and gathered queries are issued back to
+back with no view code in between.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.views import exception_handler
+
+
+def render(response):
+    response.accepted_renderer = JSONRenderer()
+    response.accepted_media_type = JSONRenderer.media_type
+    response.renderer_context = {}
+    return response.render()
+
+
+def async_api_view(methods, authentication_classes=None, permission_classes=None):
+    """
+    Decorate an ``async def view(request, ...)`` returning a DRF ``Response``.
+    ``request`` is a DRF ``Request`` whose ``user`` is already resolved. The
+    class lists are attributes of the view, so they can be patched.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            drf_request = Request(
+                request,
+                authenticators=[auth() for auth in wrapper.authentication_classes],
+                parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES],
+            )
+            try:
+                if request.method not in methods:
+                    raise exceptions.MethodNotAllowed(request.method)
+                await sync_to_async(check_permissions)(drf_request, wrapper.permission_classes)
+                response = await view(drf_request, *args, **kwargs)
+            except exceptions.APIException as exc:
+                response = handle_exception(drf_request, exc)
+            return render(response)
+
+        wrapper.authentication_classes = list(
+            api_settings.DEFAULT_AUTHENTICATION_CLASSES if authentication_classes is None
+            else authentication_classes
+        )
+        wrapper.permission_classes = list(
+            api_settings.DEFAULT_PERMISSION_CLASSES if permission_classes is None
+            else permission_classes
+        )
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+async def alist(queryset):
+    """Evaluate a queryset with the async ORM"""
+    return [row async for row in queryset]
+
+
+def check_permissions(request, permission_classes):
+    """Authenticate ``request`` and apply the permission classes, as APIView does"""
+    for permission in (permission() for permission in permission_classes):
+        if not permission.has_permission(request, None):
+            if request.authenticators and not request.successful_authenticator:
+                raise exceptions.NotAuthenticated()
+            raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+
+
+def handle_exception(request, exc):
+    """Answer 401 when the first authenticator names a scheme, else 403, as APIView does"""
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        auth_header = request.authenticators[0].authenticate_header(request) if request.authenticators else None
+        if auth_header:
+            exc.auth_header = auth_header
+        else:
+            exc.status_code = status.HTTP_403_FORBIDDEN
+    return exception_handler(exc, {'request': request})
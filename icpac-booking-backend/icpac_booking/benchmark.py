@@ -0,0 +1,68 @@
+"""
+Benchmark helpers for ICPAC Booking System management commands
+"""
+import statistics
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections, reset_queries
+from django.test.utils import CaptureQueriesContext
+
+
+def percentile(samples, pct):
+    """Return the pct-th percentile of a list of samples (nearest rank)"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def measure(func, iterations=20, warmup=2):
+    """
+    Call ``func`` repeatedly and return latency statistics in milliseconds,
+    together with the number of SQL queries the last call issued on every
+    database alias, so reads routed to a replica are counted too.
+    """
+    for _ in range(warmup):
+        func()
+
+    samples = []
+    queries = 0
+    for _ in range(iterations):
+        reset_queries()
+        with ExitStack() as stack:
+            captured = [
+                stack.enter_context(CaptureQueriesContext(connection)) for connection in connections.all()
+            ]
+            started = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - started) * 1000)
+        queries = sum(len(context) for context in captured)
+
+    return {
+        'iterations': iterations,
+        'mean_ms': round(statistics.fmean(samples), 3) if samples else 0.0,
+        'p50_ms': round(percentile(samples, 50), 3),
+        'p95_ms': round(percentile(samples, 95), 3),
+        'p99_ms': round(percentile(samples, 99), 3),
+        'max_ms': round(max(samples), 3) if samples else 0.0,
+        'queries': queries,
+    }
+
+
+def format_stats(label, stats):
+    """Format a measure() result as a single report line"""
+    return (
+        f"{label:<40} p50={stats['p50_ms']:>9.2f}ms p95={stats['p95_ms']:>9.2f}ms "
+        f"p99={stats['p99_ms']:>9.2f}ms queries={stats['queries']}"
+    )
+
+
+def api_client():
+    """APIClient whose requests pass the ALLOWED_HOSTS check"""
+    from rest_framework.test import APIClient
+
+    hosts = [host for host in settings.ALLOWED_HOSTS if host and '*' not in host]
+    return APIClient(SERVER_NAME=(hosts or ['localhost'])[0].lstrip('.'))
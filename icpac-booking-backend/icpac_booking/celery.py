@@ -0,0 +1,23 @@
+"""
+Celery application for ICPAC Booking System
+
+Tasks live in the ``tasks`` module of each app and are routed to queues by
+latency class (see ``CELERY_TASK_ROUTES``). Run one worker per class so bulk
+work never delays user-facing email:
+
+    celery -A icpac_booking worker -Q realtime -c 4
+    celery -A icpac_booking worker -Q default,bulk -c 2
+    celery -A icpac_booking beat
+
+Set ``CELERY_TASK_ALWAYS_EAGER=True`` to run tasks in-process without Redis;
+the test runner does the same.
+"""
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'icpac_booking.settings')
+
+app = Celery('icpac_booking')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
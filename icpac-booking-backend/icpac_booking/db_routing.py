@@ -0,0 +1,212 @@
+"""
+Read replica routing for ICPAC Booking System
+
+When ``DATABASE_REPLICA_URL`` configures a ``replica`` database alias,
+``ReplicaReadMiddleware`` sends the reads of GET, HEAD and OPTIONS
+requests to it, so dashboards, the calendar and the room catalogue do not
+compete with booking writes on the primary. Everything else reads from
+the primary: unsafe requests, Celery tasks, management commands and any
+code inside ``use_primary()``, which wraps overlap checks.
+
+Replicas lag behind the primary. After a client writes, its reads are
+pinned to the primary for ``DATABASE_REPLICA_PIN_SECONDS`` so the booking
+it just made is visible straight away. Clients are recognised by their
+user id, taken from a valid access token or a logged in session, so the
+pin survives a token refresh; anonymous clients by their ``Authorization``
+header, else their session cookie, else their address. The pin is kept in
+the shared cache so every worker honours it, and is set before the view
+runs, so it is in place by the time the write commits. Unsafe requests to
+views marked ``read_only_view``, such as the availability check, do not pin.
+
+Streaming responses run their queries while the body is sent, after the
+view returned, so their content is iterated with the request's read alias.
+"""
+import hashlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.http import FileResponse
+
+REPLICA_DB_ALIAS = 'replica'
+PIN_CACHE_KEY = 'db_pin:%s'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+read_alias = ContextVar('read_alias', default=DEFAULT_DB_ALIAS)
+
+
+def replica_configured():
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+@contextmanager
+def use_primary():
+    """Read from the primary inside the block, whatever the request"""
+    token = read_alias.set(DEFAULT_DB_ALIAS)
+    try:
+        yield
+    finally:
+        read_alias.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """Writes and migrations go to the primary; reads follow ``read_alias``"""
+
+    def db_for_read(self, model, **hints):
+        return read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def read_only_view(view):
+    """Mark a view whose unsafe requests only read, so they do not pin"""
+    view.read_only = True
+    return view
+
+
+def token_user_id(request):
+    """
+    The user id of a valid access token in the request, if any. The
+    validated token is kept on the request for DRF authentication to reuse.
+    """
+    from apps.authentication.authentication import RevocableJWTAuthentication
+    from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+    from rest_framework_simplejwt.settings import api_settings
+
+    authentication = RevocableJWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    try:
+        return authentication.get_request_token(request, raw_token).get(api_settings.USER_ID_CLAIM)
+    except (InvalidToken, TokenError):
+        return None
+
+
+def user_id(request):
+    # DRF sets request.user on the Django request once it authenticates,
+    # which is after this middleware hands the request on
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.pk
+    found = token_user_id(request)
+    if found is None and hasattr(request, 'session'):
+        found = request.session.get(SESSION_KEY)
+    return found
+
+
+def client_key(request):
+    found = user_id(request)
+    identity = f'user:{found}' if found is not None else (
+        request.META.get('HTTP_AUTHORIZATION')
+        or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        or request.META.get('REMOTE_ADDR', '')
+    )
+    return PIN_CACHE_KEY % hashlib.sha256(identity.encode()).hexdigest()
+
+
+def pin_to_primary(request):
+    cache.set(client_key(request), True, settings.DATABASE_REPLICA_PIN_SECONDS)
+
+
+def is_pinned(request):
+    return cache.get(client_key(request)) is not None
+
+
+def stream_with_alias(content, alias):
+    """Iterate ``content`` reading from ``alias`` while each chunk is made"""
+    iterator = iter(content)
+    while True:
+        token = read_alias.set(alias)
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            read_alias.reset(token)
+        yield chunk
+
+
+async def astream_with_alias(content, alias):
+    iterator = aiter(content)
+    while True:
+        token = read_alias.set(alias)
+        try:
+            chunk = await anext(iterator)
+        except StopAsyncIteration:
+            return
+        finally:
+            read_alias.reset(token)
+        yield chunk
+
+
+def keep_read_alias(response, alias):
+    # File responses read storage, not the database, and keep their file
+    # for the server's sendfile support
+    if response.streaming and not isinstance(response, FileResponse):
+        if response.is_async:
+            response.streaming_content = astream_with_alias(response.streaming_content, alias)
+        else:
+            response.streaming_content = stream_with_alias(response.streaming_content, alias)
+    return response
+
+
+class ReplicaReadMiddleware:
+    """
+    Route the reads of safe requests to the replica unless the client is
+    pinned, and pin clients making unsafe requests. Async-capable, so async
+    views are not pushed onto a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not replica_configured() or request.method not in SAFE_METHODS:
+            return self.get_response(request)
+
+        alias = DEFAULT_DB_ALIAS if is_pinned(request) else REPLICA_DB_ALIAS
+        token = read_alias.set(alias)
+        try:
+            return keep_read_alias(self.get_response(request), alias)
+        finally:
+            read_alias.reset(token)
+
+    async def __acall__(self, request):
+        if not replica_configured() or request.method not in SAFE_METHODS:
+            return await self.get_response(request)
+
+        pinned = await cache.aget(await sync_to_async(client_key)(request)) is not None
+        alias = DEFAULT_DB_ALIAS if pinned else REPLICA_DB_ALIAS
+        token = read_alias.set(alias)
+        try:
+            return keep_read_alias(await self.get_response(request), alias)
+        finally:
+            read_alias.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Runs once the URL is resolved, so read-only views can be told apart
+        if not replica_configured() or request.method in SAFE_METHODS:
+            return None
+        if not getattr(view_func, 'read_only', False):
+            pin_to_primary(request)
+        return None
@@ -0,0 +1,212 @@
+"""
+Endpoint benchmark suite for ICPAC Booking System
+
+``ENDPOINTS`` lists every URL of the apps with the request a client
+typically sends to it and the most SQL queries it may issue for any role.
+``run_suite`` requests each endpoint as a user of every role, authenticated
+with a JWT like the frontend, and records latency percentiles and the
+query count. ``compare`` checks a run against the query budgets and the
+median latencies of a stored baseline run.
+
+Budgets are the counts for a page of results, so a view that starts
+issuing a query per row exceeds its budget as soon as a page holds a row.
+``EXCLUDED`` names the URLs that are not benchmarked and why.
+"""
+import json
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+
+from .benchmark import api_client, measure
+
+User = get_user_model()
+
+ROLES = ('user', 'room_admin', 'super_admin', 'procurement_officer')
+
+# url name: (method, query params or body, query budget)
+ENDPOINTS = {
+    'authentication:current_user': ('GET', None, 3),
+    'authentication:dashboard_stats': ('GET', None, 6),
+    'authentication:user_list': ('GET', None, 4),
+    'authentication:user_detail': ('GET', None, 3),
+    'rooms:room_list': ('GET', None, 2),
+    'rooms:room_detail': ('GET', None, 4),
+    'rooms:amenity_list': ('GET', None, 2),
+    'rooms:check_availability': ('POST', {'date': 'tomorrow', 'start_time': '09:00', 'end_time': '10:00'}, 2),
+    'rooms:room_stats': ('GET', None, 7),
+    'rooms:rooms_overview_stats': ('GET', None, 6),
+    'rooms:room_status': ('GET', None, 1),
+    'rooms:room_categories': ('GET', None, 1),
+    'bookings:booking_list': ('GET', None, 3),
+    'bookings:booking_detail': ('GET', None, 4),
+    'bookings:booking_export': ('GET', {'date_from': 'month_ago'}, 2),
+    'bookings:my_bookings': ('GET', None, 6),
+    'bookings:pending_approvals': ('GET', None, 2),
+    'bookings:booking_dashboard_stats': ('GET', None, 10),
+    'bookings:calendar_events': ('GET', {'start': 'today', 'end': 'month_ahead'}, 1),
+    'bookings:procurement_order_list': ('GET', None, 3),
+    'bookings:procurement_order_detail': ('GET', None, 2),
+    'bookings:procurement_order_export': ('GET', None, 2),
+    'procurement:order_list': ('GET', None, 3),
+    'procurement:order_detail': ('GET', None, 2),
+    'procurement:order_export': ('GET', None, 2),
+    'procurement:attachment_list': ('GET', None, 4),
+    'procurement:attachment_upload': ('GET', None, 2),
+    'procurement:attachment_download': ('GET', None, 2),
+    'procurement:queue': ('GET', None, 3),
+    'procurement:spend': ('GET', None, 2),
+}
+
+EXCLUDED = {
+    'authentication:login': 'credential check, measured by benchmark_login',
+    'authentication:register': 'creates a user',
+    'authentication:logout': 'adds the refresh token to the deny-list',
+    'authentication:token_refresh': 'rotates the refresh token and deny-lists the old one',
+    'authentication:password_change': 'changes the password',
+    'bookings:approve_reject_booking': 'changes the booking status',
+    'procurement:attachment_upload_create': 'creates an upload',
+    'rooms:room_status_stream': 'server-sent events stream that does not end',
+}
+
+
+def relative_date(value):
+    """Resolve the relative dates used in ``ENDPOINTS`` against today"""
+    today = timezone.localdate()
+    offsets = {'today': 0, 'tomorrow': 1, 'month_ago': -30, 'month_ahead': 31}
+    return str(today + timedelta(days=offsets[value])) if value in offsets else value
+
+
+def url_kwargs(name, user):
+    """
+    Path arguments for ``name`` naming an object ``user`` can see, or None
+    when the dataset has none
+    """
+    from apps.bookings.models import Booking
+    from apps.bookings.scoping import scope_bookings
+    from apps.procurement.models import AttachmentUpload, ProcurementAttachment, ProcurementOrder
+    from apps.procurement.scoping import scope_procurement_orders
+    from apps.rooms.models import Room
+
+    scope = user.access_scope
+    if name.endswith('_export'):
+        return {'extension': 'csv'}
+    if name == 'authentication:user_detail':
+        return {'pk': user.pk}
+    if name in ('rooms:room_detail', 'rooms:check_availability', 'rooms:room_stats'):
+        rooms = Room.objects.filter(is_active=True)
+        if user.role == 'room_admin':
+            rooms = rooms.filter(admins=user)
+        room_id = rooms.order_by('id').values_list('id', flat=True).first()
+        return None if room_id is None else {'room_id' if name != 'rooms:room_detail' else 'pk': room_id}
+    if name == 'bookings:booking_detail':
+        pk = scope_bookings(Booking.objects.order_by('-start_at'), scope).values_list('id', flat=True).first()
+        return None if pk is None else {'pk': pk}
+    if name.endswith('order_detail') or name == 'procurement:attachment_list':
+        pk = scope_procurement_orders(ProcurementOrder.objects.order_by('-id'), scope).values_list(
+            'id', flat=True
+        ).first()
+        return None if pk is None else {'order_id' if name == 'procurement:attachment_list' else 'pk': pk}
+    if name == 'procurement:attachment_download':
+        pk = ProcurementAttachment.objects.filter(
+            order__in=scope_procurement_orders(ProcurementOrder.objects.all(), scope)
+        ).order_by('-id').values_list('id', flat=True).first()
+        return None if pk is None else {'pk': pk}
+    if name == 'procurement:attachment_upload':
+        pk = AttachmentUpload.objects.filter(uploaded_by=user).values_list('id', flat=True).first()
+        return None if pk is None else {'upload_id': pk}
+    return {}
+
+
+def role_users():
+    """The first active user of each role"""
+    users = {}
+    for role in ROLES:
+        user = User.objects.filter(is_active=True, role=role).order_by('id').first()
+        if user is not None:
+            users[role] = user
+    return users
+
+
+def request_endpoint(client, method, path, data):
+    if method == 'POST':
+        response = client.post(path, data, format='json')
+    else:
+        response = client.get(path, data)
+    if response.streaming:
+        # Exports and downloads do their work while the body is consumed
+        b''.join(response.streaming_content)
+    return response
+
+
+def run_suite(users, names=None, iterations=20, warmup=2):
+    """
+    Measure every endpoint in ``names`` (default all) for each ``role: user``
+    in ``users``. Returns ``{role: {name: stats}}``; endpoints with nothing
+    to request for a role get ``{'skipped': reason}``.
+    """
+    from apps.authentication.serializers import CustomTokenObtainPairSerializer
+
+    results = {}
+    for role, user in users.items():
+        client = api_client()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {CustomTokenObtainPairSerializer.get_token(user).access_token}'
+        )
+        results[role] = {}
+        for name in names or ENDPOINTS:
+            method, data, _ = ENDPOINTS[name]
+            kwargs = url_kwargs(name, user)
+            if kwargs is None:
+                results[role][name] = {'skipped': 'nothing visible to request'}
+                continue
+            path = reverse(name, kwargs=kwargs)
+            data = {key: relative_date(value) for key, value in (data or {}).items()}
+
+            response = request_endpoint(client, method, path, data)
+            if response.status_code >= 400:
+                results[role][name] = {'skipped': f'status {response.status_code}'}
+                continue
+            results[role][name] = measure(
+                lambda: request_endpoint(client, method, path, data), iterations, warmup
+            )
+    return results
+
+
+def compare(results, baseline=None, threshold=0.25, min_delta_ms=5.0):
+    """
+    Failures of ``results``: query counts over budget, and median latencies
+    more than ``threshold`` (a fraction) and ``min_delta_ms`` above the
+    baseline. The median is compared because a single slow sample moves the
+    tail percentiles of a short run; small absolute changes never fail.
+    """
+    failures = []
+    for role, endpoints in results.items():
+        for name, stats in endpoints.items():
+            if 'skipped' in stats:
+                continue
+            budget = ENDPOINTS[name][2]
+            if stats['queries'] > budget:
+                failures.append(f'{role} {name}: {stats["queries"]} queries, budget {budget}')
+
+            before = (baseline or {}).get(role, {}).get(name)
+            if not before or 'skipped' in before:
+                continue
+            limit = max(before['p50_ms'] * (1 + threshold), before['p50_ms'] + min_delta_ms)
+            if stats['p50_ms'] > limit:
+                failures.append(
+                    f'{role} {name}: p50 {stats["p50_ms"]:.2f}ms, baseline {before["p50_ms"]:.2f}ms'
+                )
+    return failures
+
+
+def load_baseline(path):
+    with open(path) as baseline_file:
+        return json.load(baseline_file)['results']
+
+
+def save_baseline(path, results, dataset):
+    with open(path, 'w') as baseline_file:
+        json.dump({'dataset': dataset, 'results': results}, baseline_file, indent=2, sort_keys=True)
+        baseline_file.write('\n')
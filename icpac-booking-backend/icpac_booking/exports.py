@@ -0,0 +1,93 @@
+"""
+Streaming exports for ICPAC Booking System
+
+Export views pass a header row and a lazy iterable of row tuples, usually
+``queryset.values_list(...).iterator(chunk_size=EXPORT_CHUNK_SIZE)``. CSV
+is written to the response as rows are fetched, so memory stays flat
+however many rows are exported. XLSX needs the optional ``openpyxl``
+package; its write-only workbook spools rows to a temporary file, which is
+then streamed.
+"""
+import csv
+import tempfile
+from datetime import datetime
+from itertools import islice
+
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import openpyxl
+except ImportError:  # pragma: no cover - optional dependency
+    openpyxl = None
+
+EXPORT_CHUNK_SIZE = 2000
+ROWS_PER_WRITE = 500
+EXPORT_FORMATS = ('csv', 'xlsx')
+
+
+class ExportRenderer(BaseRenderer):
+    """
+    Accepts any media type so downloads pass content negotiation; error
+    responses are still rendered as JSON
+    """
+    media_type = '*/*'
+    format = 'export'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return JSONRenderer().render(data, renderer_context=renderer_context)
+
+
+class Echo:
+    """File-like object whose write() returns the value, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def export_value(value):
+    """Render aware datetimes in local time without tzinfo, as spreadsheets expect"""
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        return timezone.localtime(value).replace(tzinfo=None)
+    return value
+
+
+def csv_chunks(header, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, ROWS_PER_WRITE))
+        if not batch:
+            return
+        yield ''.join(writer.writerow([export_value(value) for value in row]) for row in batch)
+
+
+def stream_export(filename, header, rows, file_format='csv'):
+    """
+    Return a download response for ``rows``; ``filename`` has no extension.
+    Raises ``ValueError`` for an unknown format or when XLSX is not available.
+    """
+    if file_format == 'csv':
+        response = StreamingHttpResponse(csv_chunks(header, rows), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+        return response
+
+    if file_format == 'xlsx':
+        if openpyxl is None:
+            raise ValueError('XLSX export requires the openpyxl package.')
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet(title=filename[:31])
+        sheet.append(header)
+        for row in rows:
+            sheet.append([export_value(value) for value in row])
+        output = tempfile.TemporaryFile()
+        workbook.save(output)
+        output.seek(0)
+        return FileResponse(
+            output, as_attachment=True, filename=f'{filename}.xlsx',
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+
+    raise ValueError(f'Unsupported export format: {file_format}')
@@ -0,0 +1,230 @@
+"""
+Per-endpoint request metrics for ICPAC Booking System
+
+``RequestMetricsMiddleware`` records, for every request, the latency, the
+number of SQL queries and the time spent in them, and the response size,
+labelled with the resolved URL name (``bookings:calendar_events``). The
+``/metrics`` view exposes them with the throttle rejection counters in the
+Prometheus text format to scrapers sending ``METRICS_AUTH_TOKEN`` as a
+bearer token; while it is unset the endpoint is closed.
+
+Under gunicorn each worker keeps its own metrics. Set
+``PROMETHEUS_MULTIPROC_DIR`` to an empty directory before the workers
+start and ``/metrics`` aggregates the files every worker writes there;
+``gunicorn.conf.py`` removes the files of workers that exit.
+
+With ``SLOW_REQUEST_THRESHOLD_MS`` set, requests slower than that are logged
+to ``icpac_booking.slow_requests`` with their slowest statements and the
+plan of the slowest one. Streaming responses are timed to their first
+byte and their size is not recorded.
+
+``prometheus_client`` is optional; without it the middleware does nothing
+and ``/metrics`` answers 503.
+"""
+import hmac
+import json
+import logging
+import os
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+    from prometheus_client.core import CounterMetricFamily
+except ImportError:  # pragma: no cover - optional dependency
+    prometheus_client = None
+
+logger = logging.getLogger('icpac_booking.slow_requests')
+
+UNRESOLVED_VIEW = '<unresolved>'
+SLOW_QUERIES_LOGGED = 5
+
+if prometheus_client is not None:
+    LABELS = ['view', 'method']
+    REQUESTS = prometheus_client.Counter(
+        'http_requests', 'Requests by view, method and status', LABELS + ['status']
+    )
+    LATENCY = prometheus_client.Histogram(
+        'http_request_duration_seconds', 'Request latency', LABELS,
+        buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+    )
+    SQL_QUERIES = prometheus_client.Histogram(
+        'http_request_sql_queries', 'SQL queries per request', LABELS,
+        buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250)
+    )
+    SQL_DURATION = prometheus_client.Histogram(
+        'http_request_sql_duration_seconds', 'Time spent in SQL per request', LABELS,
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+    )
+    RESPONSE_SIZE = prometheus_client.Histogram(
+        'http_response_size_bytes', 'Response body size', LABELS,
+        buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+    )
+
+
+class QueryRecorder:
+    """``execute_wrapper`` hook counting and timing statements on every connection"""
+
+    def __init__(self, keep_statements=False):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = [] if keep_statements else None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+            if self.statements is not None:
+                self.statements.append((elapsed, context['connection'].alias, sql, params))
+
+    def install(self):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self))
+        return stack
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else UNRESOLVED_VIEW
+
+
+def response_size(response):
+    if response.streaming:
+        return None
+    return len(response.content)
+
+
+def observe(request, response, elapsed, recorder):
+    labels = {'view': view_name(request), 'method': request.method}
+    REQUESTS.labels(status=str(response.status_code), **labels).inc()
+    LATENCY.labels(**labels).observe(elapsed)
+    SQL_QUERIES.labels(**labels).observe(recorder.count)
+    SQL_DURATION.labels(**labels).observe(recorder.duration)
+    size = response_size(response)
+    if size is not None:
+        RESPONSE_SIZE.labels(**labels).observe(size)
+
+    threshold = settings.SLOW_REQUEST_THRESHOLD_MS
+    if threshold and elapsed * 1000 >= threshold:
+        log_slow_request(request, response, elapsed, recorder)
+
+
+def explain(alias, sql, params):
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+        return [' '.join(str(column) for column in row) for row in cursor.fetchall()]
+
+
+def log_slow_request(request, response, elapsed, recorder):
+    """Log the slowest statements of a request and the plan of the slowest SELECT"""
+    slowest = sorted(recorder.statements, key=lambda statement: statement[0], reverse=True)
+    entry = {
+        'view': view_name(request),
+        'method': request.method,
+        'path': request.path,
+        'status': response.status_code,
+        'duration_ms': round(elapsed * 1000, 1),
+        'sql_queries': recorder.count,
+        'sql_ms': round(recorder.duration * 1000, 1),
+        'slowest_queries': [
+            {'ms': round(duration * 1000, 2), 'database': alias, 'sql': sql}
+            for duration, alias, sql, _ in slowest[:SLOW_QUERIES_LOGGED]
+        ],
+    }
+    selects = [statement for statement in slowest if statement[2].lstrip().upper().startswith('SELECT')]
+    if selects:
+        _, alias, sql, params = selects[0]
+        try:
+            entry['plan'] = explain(alias, sql, params)
+        except Exception as exc:
+            entry['plan_error'] = str(exc)
+    logger.warning(json.dumps(entry, default=str))
+
+
+class RequestMetricsMiddleware:
+    """Record latency, SQL and response size per resolved URL name"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if prometheus_client is None:
+            return self.get_response(request)
+
+        recorder = QueryRecorder(keep_statements=bool(settings.SLOW_REQUEST_THRESHOLD_MS))
+        started = time.perf_counter()
+        with recorder.install():
+            response = self.get_response(request)
+        observe(request, response, time.perf_counter() - started, recorder)
+        return response
+
+    async def __acall__(self, request):
+        if prometheus_client is None:
+            return await self.get_response(request)
+
+        recorder = QueryRecorder(keep_statements=bool(settings.SLOW_REQUEST_THRESHOLD_MS))
+        started = time.perf_counter()
+        with recorder.install():
+            response = await self.get_response(request)
+        await sync_to_async(observe)(request, response, time.perf_counter() - started, recorder)
+        return response
+
+
+class ThrottleCollector:
+    """Expose the cache-backed throttle rejection counters at scrape time"""
+
+    def collect(self):
+        from apps.authentication.throttling import rejection_counts
+
+        family = CounterMetricFamily(
+            'throttle_rejections', 'Requests rejected by the credential throttles', labels=['scope']
+        )
+        for scope, count in rejection_counts().items():
+            family.add_metric([scope], count)
+        yield family
+
+
+def metrics_registry():
+    registry = prometheus_client.CollectorRegistry()
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        for collector in (REQUESTS, LATENCY, SQL_QUERIES, SQL_DURATION, RESPONSE_SIZE):
+            registry.register(collector)
+    registry.register(ThrottleCollector())
+    return registry
+
+
+def metrics(request):
+    """Prometheus scrape endpoint, only served to holders of ``METRICS_AUTH_TOKEN``"""
+    token = settings.METRICS_AUTH_TOKEN
+    if not token:
+        return HttpResponse('METRICS_AUTH_TOKEN is not set.', status=403, content_type='text/plain')
+    if not hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'):
+        return HttpResponse(status=401)
+
+    if prometheus_client is None:
+        return HttpResponse('prometheus_client is not installed.', status=503, content_type='text/plain')
+
+    return HttpResponse(
+        prometheus_client.generate_latest(metrics_registry()),
+        content_type=prometheus_client.CONTENT_TYPE_LATEST
+    )
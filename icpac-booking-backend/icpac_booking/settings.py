@@ -3,6 +3,7 @@ Django settings for ICPAC Booking System
 """
 
 from pathlib import Path
+from celery.schedules import crontab
 from decouple import config
 from datetime import timedelta
 import dj_database_url
@@ -56,16 +57,19 @@ LOCAL_APPS = [
     'apps.rooms',
     'apps.bookings',
     'apps.procurement',
+    'apps.notifications',
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    'icpac_booking.metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'icpac_booking.db_routing.ReplicaReadMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -104,10 +108,22 @@ DATABASES = {
     )
 }
 
-# Cache Configuration (fallback to dummy cache if Redis not available)
+# Optional read replica (icpac_booking.db_routing). Test databases mirror it
+# onto the test primary.
+DATABASE_REPLICA_URL = config('DATABASE_REPLICA_URL', default='')
+if DATABASE_REPLICA_URL:
+    DATABASES['replica'] = dj_database_url.parse(DATABASE_REPLICA_URL)
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['icpac_booking.db_routing.PrimaryReplicaRouter']
+
+# Seconds a client's reads stay on the primary after it writes
+DATABASE_REPLICA_PIN_SECONDS = config('DATABASE_REPLICA_PIN_SECONDS', default=10, cast=int)
+
+# Cache Configuration (fallback to local memory cache if Redis not available)
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.dummy.DummyCache' if DEBUG else 'django.core.cache.backends.redis.RedisCache',
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache' if DEBUG else 'django.core.cache.backends.redis.RedisCache',
         'LOCATION': config('REDIS_URL', default='redis://127.0.0.1:6379/1'),
     }
 }
@@ -130,6 +146,93 @@ CELERY_RESULT_SERIALIZER = 'json'
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TIMEZONE = 'UTC'
 CELERY_ENABLE_UTC = True
+CELERY_TASK_IGNORE_RESULT = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+# Queues by latency class: ``realtime`` for work a user is waiting on,
+# ``default`` for everything else and ``bulk`` for rollups, sweeps and
+# reports, so a long report never delays an email
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+CELERY_TASK_ROUTES = {
+    'apps.notifications.tasks.deliver_email_outbox': {'queue': 'realtime'},
+    'apps.notifications.tasks.send_admin_digests': {'queue': 'bulk'},
+    'apps.bookings.tasks.send_meeting_reminders': {'queue': 'default'},
+    'apps.rooms.tasks.*': {'queue': 'bulk'},
+    'apps.bookings.tasks.*': {'queue': 'bulk'},
+    'apps.authentication.tasks.*': {'queue': 'bulk'},
+    'apps.procurement.tasks.*': {'queue': 'bulk'},
+}
+
+# Run tasks in-process without a broker (local development without Redis)
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=False, cast=bool)
+CELERY_TASK_EAGER_PROPAGATES = CELERY_TASK_ALWAYS_EAGER
+if CELERY_TASK_ALWAYS_EAGER:
+    CELERY_BROKER_URL = 'memory://'
+    CELERY_RESULT_BACKEND = 'cache+memory://'
+
+TEST_RUNNER = 'icpac_booking.test_runner.EagerCeleryTestRunner'
+
+# Pending-approval digests for room admins (apps.notifications.digests)
+ADMIN_DIGEST_WINDOW_MINUTES = config('ADMIN_DIGEST_WINDOW_MINUTES', default=15, cast=int)
+ADMIN_DIGEST_LOOKBACK_WINDOWS = config('ADMIN_DIGEST_LOOKBACK_WINDOWS', default=4, cast=int)
+
+# Stale pending booking sweep (apps.bookings.expiry)
+BOOKING_EXPIRY_BATCH_SIZE = config('BOOKING_EXPIRY_BATCH_SIZE', default=500, cast=int)
+
+# Meeting reminders (apps.bookings.reminders)
+MEETING_REMINDER_LEAD_MINUTES = config('MEETING_REMINDER_LEAD_MINUTES', default=30, cast=int)
+MEETING_REMINDER_BATCH_SIZE = config('MEETING_REMINDER_BATCH_SIZE', default=500, cast=int)
+
+# Hot/cold booking archive (apps.bookings.archive)
+BOOKING_ARCHIVE_AFTER_DAYS = config('BOOKING_ARCHIVE_AFTER_DAYS', default=365, cast=int)
+BOOKING_ARCHIVE_BATCH_SIZE = config('BOOKING_ARCHIVE_BATCH_SIZE', default=500, cast=int)
+
+# Monthly bookings partitions on PostgreSQL (apps.bookings.partitioning)
+BOOKING_PARTITION_MONTHS_AHEAD = config('BOOKING_PARTITION_MONTHS_AHEAD', default=12, cast=int)
+
+CELERY_BEAT_SCHEDULE = {
+    # Safety net for outbox nudges lost while the broker was unavailable
+    'deliver-email-outbox': {
+        'task': 'apps.notifications.tasks.deliver_email_outbox',
+        'schedule': 60.0,
+    },
+    'send-admin-digests': {
+        'task': 'apps.notifications.tasks.send_admin_digests',
+        'schedule': 60.0 * ADMIN_DIGEST_WINDOW_MINUTES,
+    },
+    'rollup-room-utilization': {
+        'task': 'apps.rooms.tasks.rollup_room_utilization',
+        'schedule': 60.0 * 10,
+    },
+    'warm-access-scopes': {
+        'task': 'apps.authentication.tasks.warm_access_scopes',
+        'schedule': 60.0 * 10,
+    },
+    'send-meeting-reminders': {
+        'task': 'apps.bookings.tasks.send_meeting_reminders',
+        'schedule': 60.0,
+    },
+    'expire-stale-bookings': {
+        'task': 'apps.bookings.tasks.expire_stale_bookings',
+        'schedule': 60.0 * 5,
+    },
+    'remove-stale-attachment-uploads': {
+        'task': 'apps.procurement.tasks.remove_stale_uploads',
+        'schedule': 60.0 * 60,
+    },
+    'archive-old-bookings': {
+        'task': 'apps.bookings.tasks.archive_old_bookings',
+        'schedule': crontab(hour=2, minute=30),
+    },
+    'create-booking-partitions': {
+        'task': 'apps.bookings.tasks.create_booking_partitions',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    'send-weekly-usage-report': {
+        'task': 'apps.bookings.tasks.send_weekly_usage_report',
+        'schedule': crontab(hour=6, minute=0, day_of_week='mon'),
+    },
+}
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -182,7 +285,7 @@ WAGTAILSEARCH_BACKENDS = {
 # Django REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.authentication.authentication.RevocableJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
@@ -198,6 +301,16 @@ REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
     ],
+    # Proxies in front of Django (nginx). Throttles identify clients by the
+    # X-Forwarded-For entry the last proxy appended; without it DRF would key
+    # on the whole header, which clients choose.
+    'NUM_PROXIES': config('NUM_PROXIES', default=1, cast=int),
+    # Token bucket sizes for the credential endpoints (apps.authentication.throttling)
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': config('LOGIN_THROTTLE_IP_RATE', default='30/min'),
+        'login_email': config('LOGIN_THROTTLE_EMAIL_RATE', default='10/min'),
+        'register_ip': config('REGISTER_THROTTLE_IP_RATE', default='10/hour'),
+    },
 }
 
 # Simple JWT Settings
@@ -238,6 +351,13 @@ EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
 EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@icpac.net')
+EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=10, cast=int)
+
+# Email outbox delivery (apps.notifications)
+EMAIL_OUTBOX_BATCH_SIZE = config('EMAIL_OUTBOX_BATCH_SIZE', default=50, cast=int)
+EMAIL_OUTBOX_MAX_ATTEMPTS = config('EMAIL_OUTBOX_MAX_ATTEMPTS', default=6, cast=int)
+EMAIL_OUTBOX_RETRY_DELAY = config('EMAIL_OUTBOX_RETRY_DELAY', default=60, cast=int)  # seconds
+EMAIL_OUTBOX_LEASE_SECONDS = config('EMAIL_OUTBOX_LEASE_SECONDS', default=300, cast=int)
 
 # Security Settings (for production)
 if not DEBUG:
@@ -251,6 +371,13 @@ if not DEBUG:
     CSRF_COOKIE_SECURE = True
 
 # Logging Configuration
+# Request metrics at /metrics (icpac_booking.metrics), served only to
+# requests bearing METRICS_AUTH_TOKEN; while it is empty /metrics answers 403.
+# Requests slower than the threshold are logged with their SQL and query
+# plan; 0 disables it.
+METRICS_AUTH_TOKEN = config('METRICS_AUTH_TOKEN', default='')
+SLOW_REQUEST_THRESHOLD_MS = config('SLOW_REQUEST_THRESHOLD_MS', default=0, cast=int)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -281,4 +408,11 @@ LOGGING = {
         'handlers': ['console'],
         'level': 'INFO',
     },
+    'loggers': {
+        'icpac_booking.slow_requests': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
 }
\ No newline at end of file
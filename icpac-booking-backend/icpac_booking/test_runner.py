@@ -0,0 +1,30 @@
+"""
+Test runner for ICPAC Booking System
+"""
+from django.test.runner import DiscoverRunner
+
+from .celery import app as celery_app
+
+
+class EagerCeleryTestRunner(DiscoverRunner):
+    """
+    Run Celery tasks in-process with an in-memory broker, so ``delay()``
+    and ``apply_async()`` execute synchronously and tests need no Redis.
+    """
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        # Settings are namespaced, so overrides must use the CELERY_ prefix
+        self._celery_conf = {
+            f'CELERY_{key.upper()}': celery_app.conf[key]
+            for key in ('task_always_eager', 'task_eager_propagates', 'broker_url', 'result_backend')
+        }
+        celery_app.conf.update(
+            CELERY_TASK_ALWAYS_EAGER=True,
+            CELERY_TASK_EAGER_PROPAGATES=True,
+            CELERY_BROKER_URL='memory://',
+            CELERY_RESULT_BACKEND='cache+memory://',
+        )
+
+    def teardown_test_environment(self, **kwargs):
+        celery_app.conf.update(self._celery_conf)
+        super().teardown_test_environment(**kwargs)
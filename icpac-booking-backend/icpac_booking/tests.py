@@ -0,0 +1,302 @@
+import itertools
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipIf, skipUnless
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connections, router
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.authentication.authentication import RevocableJWTAuthentication
+from apps.bookings.models import Booking
+from apps.procurement.models import AttachmentUpload, ProcurementAttachment, ProcurementOrder
+from apps.rooms.models import Room
+from . import metrics
+from .benchmark import measure
+from .db_routing import REPLICA_DB_ALIAS, ReplicaReadMiddleware, is_pinned, replica_configured, use_primary
+from .endpoint_benchmarks import ENDPOINTS, EXCLUDED, role_users, run_suite
+
+User = get_user_model()
+
+
+class BenchmarkTests(TestCase):
+    def test_measure_counts_the_queries_of_the_last_call(self):
+        stats = measure(lambda: (Room.objects.count(), Booking.objects.count()), iterations=3, warmup=0)
+        self.assertEqual((stats['iterations'], stats['queries']), (3, 2))
+
+
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch('icpac_booking.db_routing.replica_configured', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.factory = RequestFactory()
+        self.middleware = ReplicaReadMiddleware(self.view)
+
+    def view(self, request):
+        # The handler calls process_view between the middleware and the view
+        self.middleware.process_view(request, self.view, (), {})
+        return HttpResponse(router.db_for_read(Booking))
+
+    def read_alias(self, method='get', token='alice'):
+        request = getattr(self.factory, method)('/api/bookings/', HTTP_AUTHORIZATION=token)
+        return self.middleware(request).content.decode()
+
+    def test_safe_requests_read_from_replica(self):
+        self.assertEqual(self.read_alias(), 'replica')
+        self.assertEqual(router.db_for_read(Booking), 'default')
+        self.assertEqual(router.db_for_write(Booking), 'default')
+
+    def test_writer_is_pinned_to_primary(self):
+        self.read_alias('post')
+        self.assertEqual(self.read_alias(), 'default')
+        self.assertEqual(self.read_alias(token='bob'), 'replica')
+
+        cache.clear()  # the pin expired
+        self.assertEqual(self.read_alias(), 'replica')
+
+    def test_pin_is_set_before_the_view_runs(self):
+        def view(request):
+            middleware.process_view(request, view, (), {})
+            return HttpResponse(str(is_pinned(request)))
+
+        middleware = ReplicaReadMiddleware(view)
+        request = self.factory.post('/api/bookings/', HTTP_AUTHORIZATION='alice')
+        self.assertEqual(middleware(request).content, b'True')
+
+    def test_token_is_decoded_once_per_request(self):
+        user = User.objects.create_user(username='member', email='member@icpac.net', password='pass12345')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        with mock.patch.object(
+            RevocableJWTAuthentication, 'get_validated_token', autospec=True,
+            side_effect=RevocableJWTAuthentication.get_validated_token
+        ) as get_validated_token:
+            self.assertEqual(client.post('/api/bookings/', {}, format='json').status_code, 400)
+        self.assertEqual(get_validated_token.call_count, 1)
+        self.assertTrue(is_pinned(self.factory.get('/', HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')))
+
+    def test_pin_survives_a_token_refresh(self):
+        user = User.objects.create_user(username='member', email='member@icpac.net', password='pass12345')
+        other = User.objects.create_user(username='other', email='other@icpac.net', password='pass12345')
+        tokens = [f'Bearer {AccessToken.for_user(user)}' for _ in range(2)]
+        self.assertNotEqual(*tokens)
+
+        self.read_alias('post', token=tokens[0])
+        self.assertEqual(self.read_alias(token=tokens[1]), 'default')
+        self.assertEqual(self.read_alias(token=f'Bearer {AccessToken.for_user(other)}'), 'replica')
+
+    def test_read_only_posts_do_not_pin(self):
+        user = User.objects.create_user(username='member', email='member@icpac.net', password='pass12345')
+        room = Room.objects.create(name='Boardroom', capacity=20, category='boardroom')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        response = client.post(f'/api/rooms/{room.id}/availability/', {
+            'date': str(timezone.localdate() + timedelta(days=1)), 'start_time': '09:00', 'end_time': '10:00',
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        request = self.factory.get('/')
+        request.user = user
+        self.assertFalse(is_pinned(request))
+        client.post('/api/bookings/', {}, format='json')
+        self.assertTrue(is_pinned(request))
+
+    def test_streamed_content_reads_from_replica(self):
+        def stream(request):
+            return StreamingHttpResponse(router.db_for_read(Booking) for _ in range(2))
+
+        response = ReplicaReadMiddleware(stream)(self.factory.get('/'))
+        self.assertEqual(router.db_for_read(Booking), 'default')
+        self.assertEqual(b''.join(response.streaming_content), b'replicareplica')
+        self.assertEqual(router.db_for_read(Booking), 'default')
+
+    def test_async_streamed_content_reads_from_replica(self):
+        async def events():
+            for _ in range(2):
+                yield router.db_for_read(Booking)
+
+        async def stream(request):
+            return StreamingHttpResponse(events())
+
+        async def consume():
+            response = await ReplicaReadMiddleware(stream)(self.factory.get('/'))
+            return [chunk async for chunk in response.streaming_content]
+
+        self.assertEqual(async_to_sync(consume)(), [b'replica', b'replica'])
+        self.assertEqual(router.db_for_read(Booking), 'default')
+
+    def test_overlap_checks_use_primary(self):
+        middleware = ReplicaReadMiddleware(lambda request: self.check_in_primary_block())
+        self.assertEqual(middleware(self.factory.get('/')).content, b'default replica')
+
+    def check_in_primary_block(self):
+        with use_primary():
+            inside = router.db_for_read(Booking)
+        return HttpResponse(f'{inside} {router.db_for_read(Booking)}')
+
+
+@skipUnless(replica_configured(), 'set DATABASE_REPLICA_URL to test against a second alias')
+class ReplicaConsistencyTests(TransactionTestCase):
+    """
+    Run against two aliases with, for example,
+    ``DATABASE_REPLICA_URL=sqlite:///replica.sqlite3 python manage.py test
+    icpac_booking.tests.ReplicaConsistencyTests``
+    """
+    databases = {'default', REPLICA_DB_ALIAS} if replica_configured() else {'default'}
+
+    def setUp(self):
+        cache.clear()
+        self.room = Room.objects.create(name='Boardroom', capacity=20, category='boardroom')
+        self.user = User.objects.create_user(username='member', email='member@icpac.net', password='pass12345')
+        self.client = APIClient()
+        # A real token, as the pin is keyed on the user the middleware can identify
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def test_own_booking_is_visible_after_writing(self):
+        day = timezone.now().date() + timedelta(days=2)
+        response = self.client.post('/api/bookings/', {
+            'room': self.room.id, 'start_date': day, 'end_date': day,
+            'start_time': '09:00', 'end_time': '10:00', 'purpose': 'Planning', 'expected_attendees': 3,
+        })
+        self.assertEqual(response.status_code, 201, response.data)
+
+        with CaptureQueriesContext(connections[REPLICA_DB_ALIAS]) as replica_queries:
+            response = self.client.get('/api/bookings/')
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(len(replica_queries), 0)
+
+        cache.clear()
+        with CaptureQueriesContext(connections[REPLICA_DB_ALIAS]) as replica_queries:
+            response = self.client.get('/api/bookings/')
+        self.assertEqual(response.data['count'], 1)
+        self.assertGreater(len(replica_queries), 0)
+
+    def test_benchmarks_count_replica_queries(self):
+        stats = measure(lambda: list(Room.objects.using(REPLICA_DB_ALIAS)), iterations=1, warmup=0)
+        self.assertEqual(stats['queries'], 1)
+
+
+@skipIf(metrics.prometheus_client is None, 'prometheus_client is not installed')
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(
+            username='chief', email='chief@icpac.net', password='pass12345', role='super_admin'
+        ))
+
+    def sample(self, name, **labels):
+        return metrics.metrics_registry().get_sample_value(name, labels) or 0
+
+    def test_requests_are_labelled_with_url_name(self):
+        labels = {'view': 'bookings:calendar_events', 'method': 'GET'}
+        before = self.sample('http_request_sql_queries_sum', **labels)
+        count = self.sample('http_request_duration_seconds_count', **labels)
+        self.client.get('/api/bookings/calendar/events/')
+        self.assertEqual(self.sample('http_request_duration_seconds_count', **labels), count + 1)
+        self.assertEqual(self.sample('http_request_sql_queries_sum', **labels), before + 1)
+        self.assertGreater(self.sample('http_response_size_bytes_sum', **labels), 0)
+
+        with self.settings(METRICS_AUTH_TOKEN='scrape-token'):
+            response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-token')
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('http_request_duration_seconds_bucket{le="0.01",method="GET",view="bookings:calendar_events"}', body)
+        self.assertIn('throttle_rejections_total{scope="login_ip"}', body)
+
+    @override_settings(METRICS_AUTH_TOKEN='scrape-token')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer other').status_code, 401)
+        self.assertEqual(
+            self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-token').status_code, 200
+        )
+
+    @override_settings(METRICS_AUTH_TOKEN='')
+    def test_metrics_are_closed_without_a_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer ').status_code, 403)
+
+    @override_settings(SLOW_REQUEST_THRESHOLD_MS=1)
+    def test_slow_requests_are_logged_with_plan(self):
+        with mock.patch('icpac_booking.metrics.time.perf_counter', side_effect=itertools.count()):
+            with self.assertLogs('icpac_booking.slow_requests', 'WARNING') as logs:
+                self.client.get('/api/bookings/calendar/events/')
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual(entry['view'], 'bookings:calendar_events')
+        self.assertEqual(entry['sql_queries'], 1)
+        self.assertIn('FROM "bookings"', entry['slowest_queries'][0]['sql'])
+        self.assertTrue(entry['plan'])
+
+
+class EndpointBudgetTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def seed(self, bookings):
+        call_command(
+            'generate_data', clear=True, rooms=3, users=12, room_admins=2, super_admins=1,
+            procurement_officers=1, bookings=bookings, days=60,
+            origin=timezone.localdate() - timedelta(days=30), now=timezone.now(), stdout=StringIO()
+        )
+        officer = User.objects.get(role='procurement_officer')
+        order = ProcurementOrder.objects.order_by('-id').first()
+        ProcurementAttachment.objects.create(
+            order=order, file=ContentFile(b'quote', name='quote.pdf'), filename='quote.pdf',
+            content_type='application/pdf', size=5, sha256='0' * 64, uploaded_by=officer
+        )
+        AttachmentUpload.objects.create(
+            order=order, filename='invoice.pdf', content_type='application/pdf', size=10,
+            sha256='0' * 64, uploaded_by=officer
+        )
+
+    def query_counts(self):
+        results = run_suite(role_users(), iterations=1, warmup=1)
+        return {
+            (role, name): stats.get('queries', stats.get('skipped'))
+            for role, endpoints in results.items() for name, stats in endpoints.items()
+        }
+
+    def test_every_url_is_benchmarked_or_excluded(self):
+        names = {
+            f'{resolver.namespace}:{pattern.name}'
+            for resolver in get_resolver().url_patterns
+            if isinstance(resolver, URLResolver) and resolver.namespace in (
+                'authentication', 'rooms', 'bookings', 'procurement'
+            )
+            for pattern in resolver.url_patterns
+        }
+        self.assertEqual(names, set(ENDPOINTS) | set(EXCLUDED))
+        self.assertFalse(set(ENDPOINTS) & set(EXCLUDED))
+
+    def test_query_counts_stay_within_budget_as_data_grows(self):
+        self.seed(40)
+        small = self.query_counts()
+        self.seed(200)
+        large = self.query_counts()
+
+        # Any query per row shows up as a count that grows with the data
+        self.assertEqual(small, large)
+        for (role, name), queries in large.items():
+            if isinstance(queries, int):
+                self.assertLessEqual(queries, ENDPOINTS[name][2], f'{role} {name}')
+        measured = {name for (_, name), queries in large.items() if isinstance(queries, int)}
+        self.assertEqual(measured, set(ENDPOINTS))
@@ -11,6 +11,8 @@ from wagtail.admin import urls as wagtailadmin_urls
 from wagtail import urls as wagtail_urls
 from wagtail.documents import urls as wagtaildocs_urls
 
+from .metrics import metrics
+
 def api_info(request):
     return JsonResponse({
         'message': 'ICPAC Booking API',
@@ -33,6 +35,10 @@ urlpatterns = [
     path('api/auth/', include('apps.authentication.urls')),
     path('api/rooms/', include('apps.rooms.urls')),
     path('api/bookings/', include('apps.bookings.urls')),
+    path('api/procurement/', include('apps.procurement.urls')),
+    
+    # Prometheus scrape endpoint
+    path('metrics', metrics, name='metrics'),
     
     # Wagtail pages (keep at the end)
     path('', include(wagtail_urls)),